@@ -45,6 +45,7 @@ import matplotlib.pyplot as plt
 import time as TI
 import SALAR_MATH as S01
 import ANALYSIS_FUNCTION as S02
+import RESPONSE_REDUCERS as S08
 from scipy.stats import norm
 
 #------------------------------------------------------------------------------------------------
@@ -92,7 +93,7 @@ MAX_ITERATIONS = 1000000   # Convergence iteration for test
 MAX_TOLERANCE = 1.0e-10    # Convergence tolerance for test
 #------------------------------------------------------------------------------------------------
 ### OPENSEES FUNCTION
-def ANALYSIS_DYN_SDOF(Damping_Ratio, u0, M):
+def ANALYSIS_DYN_SDOF(Damping_Ratio, u0, M, TRACE=False):
     # Initialize OpenSees model
     ops.wipe()
     ops.model('basic', '-ndm', 1, '-ndf', 1)
@@ -178,12 +179,8 @@ def ANALYSIS_DYN_SDOF(Damping_Ratio, u0, M):
     PERIOD = np.pi / Omega01   # Structure Period  
     
     # Dynamic analysis
-    time = []
-    displacement = []
-    velocity = []
-    acceleration = []
-    base_reaction = []
-    DI = []
+    # Responses are reduced step by step - full time histories only if TRACE is True
+    STREAM = S08.ResponseStream(S08.SDOF_REDUCERS() + [S08.LogDecrement('DISP')], TRACE=TRACE)
         
     stable = 0
     current_time = 0.0
@@ -191,17 +188,17 @@ def ANALYSIS_DYN_SDOF(Damping_Ratio, u0, M):
         stable = ops.analyze(1, dt)
         S02.ANALYSIS(stable, 1, MAX_TOLERANCE, MAX_ITERATIONS) # CHECK THE ANALYSIS
         current_time = ops.getTime()
-        time.append(current_time)
-        displacement.append(ops.nodeDisp(2, 1))
-        velocity.append(ops.nodeVel(2, 1))
-        acceleration.append(ops.nodeAccel(2, 1)) # Structure Acceleration
-        base_reaction.append(-ops.eleResponse(1, 'force')[0])  # Reaction force
-        DI.append((displacement[-1] - DY) / (DU - DY))        # Structural Ductility Damage Index 
+        disp = ops.nodeDisp(2, 1)
+        STREAM.update({'TIME': current_time,
+                       'DISP': disp,
+                       'VELO': ops.nodeVel(2, 1),
+                       'ACCEL': ops.nodeAccel(2, 1),                # Structure Acceleration
+                       'BASE': -ops.eleResponse(1, 'force')[0],     # Reaction force
+                       'DI': (disp - DY) / (DU - DY)})              # Structural Ductility Damage Index 
         
     # Calculating Damping Ratio Using Logarithmic Decrement Analysis    
-    peaks = np.array([displacement[i] for i in range(1, len(displacement)-1) if displacement[i] > displacement[i-1] and displacement[i] > displacement[i+1]])
-    # Natural logarithm
-    delta = np.log(peaks[:-1] / peaks[1:])
+    # Mean of the natural logarithm of successive peak ratios (computed while streaming)
+    delta = STREAM.result()['LOG_DECREMENT_DISP']
     #----------------------------------------------------------
     # APPROXIMATE SOLUTION:
     # Compute average logarithmic decrement - approximate equation
@@ -209,7 +206,7 @@ def ANALYSIS_DYN_SDOF(Damping_Ratio, u0, M):
     C_xi_calculated = 2 * xi_calculated * Omega01 * M  # [N/(m/s)] Damping coefficient 
     print(f'C: {C_xi_calculated:.8e}')
     ops.wipe()
-    return time, displacement, velocity, acceleration, base_reaction, DI, PERIOD, xi_calculated
+    return STREAM, PERIOD, xi_calculated
 
 #------------------------------------------------------------------------------------------------
 # DAMPING RATIO OPTIMIZATION:
@@ -243,18 +240,18 @@ for I in range(NI):
         X = DR             # Intial Guess Damping Ratio
         while (RESIDUAL > TOLERANCE):
             # X -------------------------------------------------------
-            time, displacement, velocity, acceleration, base_reaction, DI, T, XI = ANALYSIS_DYN_SDOF(X, U, M)
+            STREAM, T, XI = ANALYSIS_DYN_SDOF(X, U, M)
             print(f'XI: {XI:.8e}')
             F = XI - X
             print('F: ', F)
             # Xmin -------------------------------------------------------
             XMIN = X - ESP  
-            time, displacement, velocity, acceleration, base_reaction, DI, T, XImin = ANALYSIS_DYN_SDOF(XMIN, U, M)
+            STREAM, T, XImin = ANALYSIS_DYN_SDOF(XMIN, U, M)
             Fmin = XImin - XMIN
             print('Fmin: ', Fmin)
             # Xmax -------------------------------------------------------
             XMAX = X + ESP  
-            time, displacement, velocity, acceleration, base_reaction, DI, T, XImax = ANALYSIS_DYN_SDOF(XMAX, U, M)
+            STREAM, T, XImax = ANALYSIS_DYN_SDOF(XMAX, U, M, TRACE=(I == NI - 1 and J == NJ - 1)) # Full time histories only for the last (plotted) case
             Fmax = XImax - XMAX
             print('Fmax: ', Fmax)
             # DF -------------------------------------------------------
@@ -285,11 +282,12 @@ for I in range(NI):
             UI.append(U)
             XXI.append(X)
             TII.append(T)
-            DISP.append(np.max(np.abs(displacement)))
-            VELO.append(np.max(np.abs(velocity)))
-            ACCEL.append(np.max(np.abs(acceleration)))
-            REACTION.append(np.max(np.abs(base_reaction)))
-            DII.append(np.max(np.abs(DI)))
+            R = STREAM.result()
+            DISP.append(R['MAX_ABS_DISP'])
+            VELO.append(R['MAX_ABS_VELO'])
+            ACCEL.append(R['MAX_ABS_ACCEL'])
+            REACTION.append(R['MAX_ABS_BASE'])
+            DII.append(R['MAX_ABS_DI'])
             
 
 #totaltime = TI.process_time() - starttime
@@ -298,6 +296,8 @@ current_time = TI.strftime("%H:%M:%S", TI.localtime())
 print(f"Current time (HH:MM:SS): {current_time}\n\n")
 #------------------------------------------------------------------------------------------------
 # Compute the Cumulative Maximum Absolute Value of Last Analysis Data
+time, displacement, velocity, acceleration, base_reaction, DI = [STREAM.trace[KEY] for KEY in ('TIME', 'DISP', 'VELO', 'ACCEL', 'BASE', 'DI')]
+
 def MAX_ABS(X):
     import numpy as np
     X = np.asarray(X)  # Convert input to a numpy array for faster operations
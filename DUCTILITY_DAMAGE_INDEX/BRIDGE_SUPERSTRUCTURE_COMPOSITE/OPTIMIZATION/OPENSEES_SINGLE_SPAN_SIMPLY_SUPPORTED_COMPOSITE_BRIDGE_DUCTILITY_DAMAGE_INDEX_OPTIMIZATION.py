@@ -25,6 +25,7 @@ import numpy as np
 import openseespy.opensees as op
 import opsvis as opsv
 import matplotlib.pyplot as plt
+import GROUND_MOTION_STORE as S07
 # #######################################
 # to create a directory at specified path with name "Data"
 os.mkdir('C:\\OPENSEESPY_SALAR')
@@ -1070,7 +1071,8 @@ def DYNAMIC_ANALYSIS(Length, SideWalk_z, SideWalk_y, SideWalk_C, Deck_z, Deck_y,
     IDloadTag = 400			# load tag
     dt = 0.01			# time step for input ground motion
     maxNumIter = 1000
-    op.timeSeries('Path', 2, '-dt', dt, '-filePath', GMfile, '-factor', GMfact)
+    GM_VALUES, dt = S07.LOAD_RECORD(GMfile, dt) # Text parsed once, afterwards read from the binary sidecar
+    op.timeSeries('Path', 2, '-dt', dt, '-values', *GM_VALUES.tolist(), '-factor', GMfact)
     op.pattern('UniformExcitation', IDloadTag, GMdirection, '-accel', 2) 
 
     op.wipeAnalysis()
@@ -0,0 +1,248 @@
+"""
+Constant-ductility inelastic response spectra with a bracketing root-finder on the yield strength.
+
+INE_SPEC_CONFINED.tcl, INE_SPEC_UNCONFINED.tcl and ANALYSIS_SPECTRUM_SDOF of the fragility scripts sweep the
+periods one after the other with a fixed strength, so every run gives the ductility demand of one strength only.
+A constant-ductility spectrum needs the opposite: for every period T, record and target ductility MU_T the yield
+strength FY of a bilinear SDOF (Steel01, initial stiffness K = M * (2 pi / T)^2) with
+
+    MU(FY) = max|u| / (FY / K) = MU_T
+
+MU(FY) decreases with FY (not always monotonically), so the root is bracketed and refined on log(FY):
+- The elastic run of the period gives the elastic strength demand FE = K * max|u|; FY = FE is always an upper
+  bound, because there MU <= 1 < MU_T.
+- The first guess is the strength reduction factor R = FE / FY of the neighbouring (previous) period, so the
+  smooth R(T) curve is followed from period to period; the first period of a chunk starts from the equal-energy
+  (T < 0.5 s) or equal-displacement rule. The bracket is grown geometrically from the guess until MU crosses MU_T.
+- The bracket is refined with the Illinois variant of regula falsi on log(MU) - log(MU_T), until MU is within
+  TOLERANCE of the target.
+
+The time stepping of NEWMARK_SDOF_BATCH costs about the same for 10 or 1000 oscillators, so every run carries as
+many oscillators as possible: PERIOD_SWEEP splits a chunk of periods into LANES contiguous lanes and advances the
+k-th period of every lane together, for all records and all target ductilities, while the warm start runs along
+each lane. Every root-finder step only reruns the oscillators that are not converged yet.
+CONSTANT_DUCTILITY_SPECTRUM splits the periods into contiguous chunks and the records into groups, and spreads the
+chunk x group work units over worker processes with MONTE_CARLO_PARALLEL.PARALLEL_MONTE_CARLO.
+"""
+import os
+import numpy as np
+import NEWMARK_SDOF_BATCH as S05
+import MONTE_CARLO_PARALLEL as S04
+
+DBL_TINY = np.finfo(float).tiny
+_PROBLEM = {}  # Records and settings of the running spectrum (copied into the workers)
+
+# -----------------------------------------------
+
+def _BATCH_RUN(FY, K, M, DR, gm_accels, dt, GMfact, HARDENING):
+    # Peak displacement of bilinear (Steel01) oscillators with yield strengths FY under the rows of gm_accels
+    duration = gm_accels.shape[1] * dt
+    MATERIAL = S05.Steel01Batch(FY, K, HARDENING)
+    RESULTS = S05.NEWMARK_SDOF_BATCH(MATERIAL, M, DR, gm_accels, dt, duration, GMfact=GMfact)
+    return RESULTS['DISP'], RESULTS['CONVERGED']
+
+# -----------------------------------------------
+
+def ELASTIC_STRENGTH(PERIOD, gm_accels, dt, M=1.0, DR=0.05, GMfact=9.81):
+    # Elastic strength demand FE = K * max|u| of every period and record, shape np.shape(PERIOD) + (NR,)
+    # (same Newmark integrator as the inelastic runs)
+    gm_accels = np.atleast_2d(gm_accels)
+    NR = gm_accels.shape[0]
+    K = np.repeat(M * (2 * np.pi / np.atleast_1d(PERIOD))**2, NR)
+    duration = gm_accels.shape[1] * dt
+    MATERIAL = S05.ElasticBatch(K)
+    RESULTS = S05.NEWMARK_SDOF_BATCH(MATERIAL, M, DR, np.tile(gm_accels, (K.size // NR, 1)), dt, duration, GMfact=GMfact)
+    return (K * RESULTS['DISP']).reshape(np.shape(PERIOD) + (NR,))
+
+# -----------------------------------------------
+
+def STRENGTH_FOR_DUCTILITY(PERIOD, gm_accels, dt, DUCTILITY, M=1.0, DR=0.05, GMfact=9.81, HARDENING=0.0,
+                           R_GUESS=None, GROWTH=1.5, TOLERANCE=0.01, MAX_ITERATIONS=30, FE=None):
+    """
+    Yield strength of a bilinear SDOF that reaches every target ductility under every record, at one or more periods.
+
+    Parameters:
+    - PERIOD (float or array): Elastic period(s) of the oscillator, shape () or (NP,).
+    - gm_accels (np.array): Records, shape (NR, NPTS).
+    - dt (float): Time step of the records and of the analysis.
+    - DUCTILITY (array): Target ductilities MU_T (all > 1).
+    - M (float): Mass of the oscillator.
+    - DR (float): Damping ratio.
+    - GMfact (float): Scale factor of the records.
+    - HARDENING (float): Post-yield stiffness ratio b of Steel01.
+    - R_GUESS (np.array): First guess of R = FE / FY, shape np.shape(PERIOD) + (NR, NMU), e.g. the solution of the
+      previous period.
+    - GROWTH (float): First step factor of the bracket search (doubled in log space at every expansion).
+    - TOLERANCE (float): Relative tolerance on the ductility.
+    - MAX_ITERATIONS (int): Maximum number of runs of the bracket search and of the refinement (each).
+    - FE (np.array): Elastic strength demand, shape np.shape(PERIOD) + (NR,) (computed when None).
+
+    Returns:
+    - RESULTS (dict of np.array): 'FY', 'R' (FE / FY), 'MU' (reached ductility), 'DISP' (inelastic peak
+      displacement), 'RUNS' (nonlinear analyses) and 'CONVERGED' of shape np.shape(PERIOD) + (NR, NMU),
+      and 'FE' of shape np.shape(PERIOD) + (NR,).
+    """
+    gm_accels = np.atleast_2d(gm_accels)
+    DUCTILITY = np.atleast_1d(np.asarray(DUCTILITY, dtype=float))
+    if np.any(DUCTILITY <= 1.0):
+        raise ValueError('Target ductilities must be larger than 1')
+    NP, NR, NMU = np.size(PERIOD), gm_accels.shape[0], DUCTILITY.size
+    SHAPE = np.shape(PERIOD) + (NR, NMU)
+    if FE is None:
+        FE = ELASTIC_STRENGTH(PERIOD, gm_accels, dt, M, DR, GMfact)
+    # Oscillators ordered (period, record, ductility)
+    T = np.repeat(np.atleast_1d(PERIOD), NR * NMU)
+    K = M * (2 * np.pi / T)**2
+    ROW = np.tile(np.repeat(np.arange(NR), NMU), NP)
+    MU_T = np.tile(DUCTILITY, NP * NR)
+    LOG_MU_T = np.log(MU_T)
+    LOG_FE = np.log(np.repeat(np.ravel(FE), NMU))
+    LOG_TOL = np.log1p(TOLERANCE)
+    if R_GUESS is None:
+        R_GUESS = np.where(T < 0.5, np.sqrt(2 * MU_T - 1), MU_T)
+    N = ROW.size
+
+    X = np.minimum(LOG_FE - np.log(np.maximum(np.ravel(R_GUESS), 1.0)), LOG_FE)
+    G = np.full(N, np.nan)
+    DISP = np.zeros(N)
+    RUNS = np.zeros(N, dtype=int)
+    CONVERGED = np.ones(N, dtype=bool)
+
+    def EVALUATE(IDX, X_NEW):
+        # Rerun only the oscillators IDX at log-strengths X_NEW
+        FY = np.exp(X_NEW)
+        U, OK = _BATCH_RUN(FY, K[IDX], M, DR, gm_accels[ROW[IDX]], dt, GMfact, HARDENING)
+        X[IDX] = X_NEW
+        DISP[IDX] = U
+        G[IDX] = np.log(np.maximum(U * K[IDX] / FY, DBL_TINY)) - LOG_MU_T[IDX]
+        RUNS[IDX] += 1
+        CONVERGED[IDX] &= OK
+
+    # Bracket: LO (MU > MU_T, too weak) and HI (MU < MU_T, too strong); FY = FE is a known upper bound
+    ALL = np.arange(N)
+    EVALUATE(ALL, X)
+    LO = np.where(G > 0, X, np.nan)
+    G_LO = np.where(G > 0, G, np.nan)
+    HI = np.where(G <= 0, X, LOG_FE)
+    G_HI = np.where(G <= 0, G, -LOG_MU_T)
+    STEP = np.full(N, np.log(GROWTH))
+    for _ in range(MAX_ITERATIONS):
+        IDX = np.flatnonzero(np.isnan(LO) & (np.abs(G) > LOG_TOL))
+        if IDX.size == 0:
+            break
+        EVALUATE(IDX, HI[IDX] - STEP[IDX])
+        STEP[IDX] *= 2.0
+        WEAK = G[IDX] > 0
+        LO[IDX[WEAK]], G_LO[IDX[WEAK]] = X[IDX[WEAK]], G[IDX[WEAK]]
+        STRONG = IDX[~WEAK]
+        HI[STRONG], G_HI[STRONG] = X[STRONG], G[STRONG]
+
+    # Illinois regula falsi on the bracket [LO, HI]
+    SIDE = np.zeros(N, dtype=int)
+    for _ in range(MAX_ITERATIONS):
+        IDX = np.flatnonzero(~np.isnan(LO) & (np.abs(G) > LOG_TOL) & (HI - LO > 1.0e-6))
+        if IDX.size == 0:
+            break
+        X_NEW = (LO[IDX]*G_HI[IDX] - HI[IDX]*G_LO[IDX]) / (G_HI[IDX] - G_LO[IDX])
+        EVALUATE(IDX, X_NEW)
+        WEAK = G[IDX] > 0
+        I_LO, I_HI = IDX[WEAK], IDX[~WEAK]
+        LO[I_LO], G_LO[I_LO] = X[I_LO], G[I_LO]
+        G_HI[I_LO[SIDE[I_LO] == 1]] *= 0.5
+        SIDE[I_LO] = 1
+        HI[I_HI], G_HI[I_HI] = X[I_HI], G[I_HI]
+        G_LO[I_HI[SIDE[I_HI] == -1]] *= 0.5
+        SIDE[I_HI] = -1
+
+    CONVERGED &= np.abs(G) <= LOG_TOL
+    FY = np.exp(X)
+    return {'FY': FY.reshape(SHAPE), 'R': np.exp(LOG_FE - X).reshape(SHAPE), 'MU': (DISP * K / FY).reshape(SHAPE),
+            'DISP': DISP.reshape(SHAPE), 'RUNS': RUNS.reshape(SHAPE), 'CONVERGED': CONVERGED.reshape(SHAPE), 'FE': FE}
+
+# -----------------------------------------------
+
+def PERIOD_SWEEP(PERIODS, gm_accels, dt, DUCTILITY, LANES=8, WARM_START=True, **OPTIONS):
+    """
+    Sweep the periods along LANES contiguous lanes; the R of every period is the first guess of the next period
+    of its lane, and the k-th periods of all lanes run as one batch.
+
+    Returns:
+    - SWEEP (dict of np.array): results of STRENGTH_FOR_DUCTILITY with the period as last axis,
+      (NR, NMU, NT) and (NR, NT) for 'FE'.
+    """
+    PERIODS = np.asarray(PERIODS, dtype=float)
+    LANE = [L for L in np.array_split(np.arange(PERIODS.size), min(LANES, PERIODS.size)) if L.size]
+    SWEEP = {}
+    R_GUESS = None
+    for STEP in range(LANE[0].size):
+        ACTIVE = [L for L in range(len(LANE)) if STEP < LANE[L].size]  # the last lanes may be one period shorter
+        INDEX = np.array([LANE[L][STEP] for L in ACTIVE])
+        GUESS = R_GUESS[:len(ACTIVE)] if R_GUESS is not None else None
+        RESULT = STRENGTH_FOR_DUCTILITY(PERIODS[INDEX], gm_accels, dt, DUCTILITY, R_GUESS=GUESS, **OPTIONS)
+        if WARM_START:
+            R_GUESS = RESULT['R']
+        for KEY, VALUE in RESULT.items():
+            if KEY not in SWEEP:
+                SWEEP[KEY] = np.zeros((PERIODS.size,) + VALUE.shape[1:], dtype=VALUE.dtype)
+            SWEEP[KEY][INDEX] = VALUE
+    return {KEY: np.moveaxis(VALUE, 0, -1) for KEY, VALUE in SWEEP.items()}
+
+# -----------------------------------------------
+
+def _SPECTRUM_UNIT(i):
+    # Work unit i of the running spectrum: one period chunk for one record group
+    P = _PROBLEM
+    CHUNK, GROUP = P['UNITS'][i]
+    return PERIOD_SWEEP(P['PERIODS'][CHUNK], P['gm_accels'][GROUP], P['dt'], P['DUCTILITY'], **P['OPTIONS'])
+
+# -----------------------------------------------
+
+def CONSTANT_DUCTILITY_SPECTRUM(PERIODS, gm_accels, dt, DUCTILITY, NUM_CHUNKS=None, RECORD_GROUPS=1,
+                                MAX_WORKERS=None, LANES=8, WARM_START=True, **OPTIONS):
+    """
+    Constant-ductility spectra of a record ensemble, in parallel over period chunks and record groups.
+
+    Parameters:
+    - PERIODS (array): Periods of the spectrum, in increasing order (neighbours warm-start each other).
+    - gm_accels (np.array): Records, shape (NR, NPTS) or (NPTS,) for one record.
+    - dt (float): Time step of the records and of the analysis.
+    - DUCTILITY (array): Target ductilities (all > 1).
+    - NUM_CHUNKS (int): Contiguous period chunks (default: one per worker).
+    - RECORD_GROUPS (int): Groups the records are split into.
+    - MAX_WORKERS (int): Worker processes (default: all cores; 1 runs serially).
+    - LANES (int): Contiguous lanes of every chunk that advance together (see PERIOD_SWEEP).
+    - WARM_START (bool): Start every period from the R of the previous period of its lane.
+    - OPTIONS: M, DR, GMfact, HARDENING, GROWTH, TOLERANCE, MAX_ITERATIONS of STRENGTH_FOR_DUCTILITY.
+
+    Returns:
+    - SPECTRUM (dict of np.array): 'FY', 'R', 'MU', 'DISP', 'RUNS', 'CONVERGED' of shape (NR, NMU, NT)
+      and 'FE' of shape (NR, NT).
+    """
+    global _PROBLEM
+    PERIODS = np.asarray(PERIODS, dtype=float)
+    gm_accels = np.atleast_2d(np.asarray(gm_accels, dtype=float))
+    DUCTILITY = np.atleast_1d(np.asarray(DUCTILITY, dtype=float))
+    NR = gm_accels.shape[0]
+    if MAX_WORKERS is None:
+        MAX_WORKERS = os.cpu_count() or 1
+    if NUM_CHUNKS is None:
+        NUM_CHUNKS = max(1, MAX_WORKERS // max(1, RECORD_GROUPS))
+    CHUNKS = [C for C in np.array_split(np.arange(PERIODS.size), min(NUM_CHUNKS, PERIODS.size)) if C.size]
+    GROUPS = [G for G in np.array_split(np.arange(NR), min(RECORD_GROUPS, NR)) if G.size]
+    UNITS = [(CHUNK, GROUP) for CHUNK in CHUNKS for GROUP in GROUPS]
+    OPTIONS.update(LANES=LANES, WARM_START=WARM_START)
+    _PROBLEM = {'PERIODS': PERIODS, 'gm_accels': gm_accels, 'dt': dt, 'DUCTILITY': DUCTILITY,
+                'UNITS': UNITS, 'OPTIONS': OPTIONS}
+
+    OUTPUT, _ = S04.PARALLEL_MONTE_CARLO(_SPECTRUM_UNIT, len(UNITS), SEED=0, MAX_WORKERS=MAX_WORKERS, CHUNKSIZE=1,
+                                         SHARED={'_PROBLEM': _PROBLEM}, WIPE=False, PRINT_EVERY=max(1, len(UNITS) // 10))
+    SPECTRUM = {}
+    for KEY in OUTPUT[0]:
+        SHAPE = (NR, PERIODS.size) if KEY == 'FE' else (NR, DUCTILITY.size, PERIODS.size)
+        SPECTRUM[KEY] = np.zeros(SHAPE, dtype=OUTPUT[0][KEY].dtype)
+    for (CHUNK, GROUP), RESULT in zip(UNITS, OUTPUT):
+        for KEY, VALUE in RESULT.items():
+            SPECTRUM[KEY][np.ix_(GROUP, *[np.arange(S) for S in VALUE.shape[1:-1]], CHUNK)] = VALUE
+    return SPECTRUM
+
+# -----------------------------------------------
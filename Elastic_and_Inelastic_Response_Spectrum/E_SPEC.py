@@ -0,0 +1,86 @@
+"""
+   #######################################################################
+   #                            IN THE NAME OF ALLAH                     #
+   #              ELASTIC RESPONSE SPECTRUM ANALYSIS OF SDOF             #
+   #---------------------------------------------------------------------#
+   #     THIS PROGRAM WRITTEN BY SALAR DELAVAR GHASHGHAEI (QASHQAI)      #
+   #                 EMAIL: salar.d.ghashghaei@gmail.com                 #
+   #######################################################################
+
+Python replacement of E_SPEC.tcl + MAX_ABS_COLLECT_DATA.m.
+
+E_SPEC.tcl builds and runs 1000 OpenSees cantilever models (one per mass Ma = 0.2*i), every model writes
+EnvelopeNode recorder files and MAX_ABS_COLLECT_DATA.m reads them back afterwards. The cantilever with a lumped
+mass and stiffness-proportional damping tuned to its first mode is a linear SDOF oscillator, so the whole
+spectrum is computed here in one pass over the record: every time step advances all periods and all damping
+ratios at once with the exact piecewise-linear (Nigam-Jennings) recurrence, and the peaks go straight into arrays.
+
+Outputs (units: N, mm, sec, record units as in E_SPEC.tcl with factor 1):
+- SD  -> peak relative displacement          (TOT_D.txt)
+- SV  -> peak relative velocity              (TOT_V.txt)
+- SA_REL -> peak relative acceleration       (TOT_A.txt: the EnvelopeNode accel of E_SPEC.tcl, relative under UniformExcitation)
+- SA  -> peak absolute acceleration          (TOT_SA.txt: spectral acceleration, not part of the E_SPEC.tcl outputs)
+- PSV, PSA -> pseudo-velocity and pseudo-acceleration spectra
+"""
+import numpy as np
+import matplotlib.pyplot as plt
+import time as ti
+import GROUND_MOTION_STORE as S07
+import INTENSITY_MEASURES as S11
+#-------------------------------------------------------------------------------------------
+# Structure of E_SPEC.tcl
+NUM_PERIODS = 1000                    # Number of masses (periods) of the spectrum
+B = 200                               # Width of Column Section
+Ela = 23500                           # Modulus of Elasticity of Section
+Le = 3000                             # Length of Column
+I = (B*B*B*B)/12                      # Moment Intria of Section
+Ke = (3*Ela*I)/Le**3                  # Sitffness of Structure
+Ma = 0.2 * np.arange(1, NUM_PERIODS + 1)  # Mass increment of E_SPEC.tcl
+PERIOD = 2 * np.pi * np.sqrt(Ma / Ke)     # Periods of the spectrum
+DAMPING = [0.02, 0.05]                # Damping ratios of the spectrum (E_SPEC.tcl: 0.02)
+
+GM_FILE = 'Northridge_EQ.acc'         # Ground motion (BM68elc.acc can also be used)
+dt = 0.01                             # Time step of the record
+GMfact = 1.0                          # Factor of the record
+#-------------------------------------------------------------------------------------------
+# Analysis Durations:
+starttime = ti.time()
+
+gm_accels, dt = S07.LOAD_RECORD(GM_FILE, dt)
+SPECTRUM = S11.RESPONSE_SPECTRUM(GMfact * gm_accels, dt, PERIOD, DAMPING)
+SD, SV, SA, SA_REL, PSV, PSA = [SPECTRUM[KEY][0] for KEY in ('SD', 'SV', 'SA', 'SA_REL', 'PSV', 'PSA')]  # (len(DAMPING), NUM_PERIODS)
+
+totaltime = ti.time() - starttime
+print(f'\nTotal time (s): {totaltime:.4f} \n\n')
+#-------------------------------------------------------------------------------------------
+# Plot Data
+for DATA, YLABEL, TITLE in ((SD, 'PGD (mm)', 'MAX. PEACK GROUND DISPLACEMENT'),
+                            (SV, 'PGV (mm/s)', 'MAX. PEACK GROUND VELOCITY'),
+                            (SA_REL, 'PGA (mm/s^2)', 'MAX. PEACK GROUND ACCELARATION')):
+    plt.figure(figsize=(10, 6))
+    for K, ZETA in enumerate(DAMPING):
+        plt.plot(PERIOD, DATA[K], linewidth=3, label=f'Damping ratio: {ZETA:.2f}')
+    plt.xlabel('PERIOD (t)')
+    plt.ylabel(YLABEL)
+    plt.title(f'{TITLE} : {np.max(DATA[0]):.4f}', color='b')
+    plt.legend()
+    plt.grid(True)
+    plt.show()
+
+plt.figure(figsize=(10, 6))
+for K, ZETA in enumerate(DAMPING):
+    plt.plot(PERIOD, PSA[K], linewidth=3, label=f'PSA - Damping ratio: {ZETA:.2f}')
+    plt.plot(PERIOD, PSV[K], linewidth=1, linestyle='--', label=f'PSV - Damping ratio: {ZETA:.2f}')
+plt.xlabel('PERIOD (t)')
+plt.ylabel('Pseudo Spectral Values')
+plt.title('Pseudo-Velocity and Pseudo-Acceleration Spectra')
+plt.legend()
+plt.grid(True)
+plt.show()
+#-------------------------------------------------------------------------------------------
+# Write Output (first damping ratio, as MAX_ABS_COLLECT_DATA.m)
+np.savetxt('TOT_D.txt', SD[0], fmt='%f')
+np.savetxt('TOT_V.txt', SV[0], fmt='%f')
+np.savetxt('TOT_A.txt', SA_REL[0], fmt='%f')
+np.savetxt('TOT_SA.txt', SA[0], fmt='%f')
+#-------------------------------------------------------------------------------------------
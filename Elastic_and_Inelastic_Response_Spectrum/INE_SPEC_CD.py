@@ -0,0 +1,79 @@
+"""
+   #######################################################################
+   #                            IN THE NAME OF ALLAH                     #
+   #        CONSTANT-DUCTILITY INELASTIC RESPONSE SPECTRUM OF SDOF       #
+   #---------------------------------------------------------------------#
+   #     THIS PROGRAM WRITTEN BY SALAR DELAVAR GHASHGHAEI (QASHQAI)      #
+   #                 EMAIL: salar.d.ghashghaei@gmail.com                 #
+   #######################################################################
+
+INE_SPEC_CONFINED.tcl and INE_SPEC_UNCONFINED.tcl give the ductility demand of the column of E_SPEC.tcl with a
+fixed section strength, one mass (period) after the other. This script gives the other half of the picture: for
+every period of the same mass increments and every target ductility, the yield strength the SDOF needs to reach
+exactly that ductility under the record (constant-ductility spectrum), found by CONSTANT_DUCTILITY with a
+bracketing root-finder that starts every period from the solution of its neighbour.
+
+Outputs:
+- CY -> yield strength coefficient Fy / (m g) of every ductility and period     (CD_CY.txt)
+- R  -> strength reduction factor Fe / Fy                                      (CD_R.txt)
+- FY -> yield force of the column of E_SPEC.tcl (N) for its lumped masses Ma    (CD_FY.txt)
+"""
+import numpy as np
+import matplotlib.pyplot as plt
+import time as ti
+import GROUND_MOTION_STORE as S07
+import CONSTANT_DUCTILITY as S12
+#-------------------------------------------------------------------------------------------
+# Structure of E_SPEC.tcl (units: N, mm, sec)
+B = 200                               # Width of Column Section
+Ela = 23500                           # Modulus of Elasticity of Section
+Le = 3000                             # Length of Column
+I = (B*B*B*B)/12                      # Moment Intria of Section
+Ke = (3*Ela*I)/Le**3                  # Sitffness of Structure
+Ma = 0.2 * np.arange(10, 1001, 10)    # Every 10th mass increment of INE_SPEC_*.tcl
+PERIOD = 2 * np.pi * np.sqrt(Ma / Ke) # Periods of the spectrum
+Dpr = 0.02                            # Damping ratio (INE_SPEC_*.tcl)
+Bs = 0.01                             # Strain-hardening ratio of the bilinear spring (Steel02 Bs of INE_SPEC_*.tcl)
+DUCTILITY = [2.0, 4.0, 6.0]           # Target displacement ductilities
+
+GM_FILE = 'Northridge_EQ.acc'         # Ground motion in g
+dt = 0.01                             # Time step of the record
+GMfact = 9.81                         # Record in m/s^2 for the unit-mass oscillators
+
+MAX_WORKERS = None                    # Worker processes (None: all cores)
+LANES = 8                             # Periods of a worker that run as one batch
+#-------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    # Analysis Durations:
+    starttime = ti.time()
+
+    gm_accels, dt = S07.LOAD_RECORD(GM_FILE, dt)
+    SPECTRUM = S12.CONSTANT_DUCTILITY_SPECTRUM(PERIOD, gm_accels, dt, DUCTILITY, MAX_WORKERS=MAX_WORKERS, LANES=LANES,
+                                               M=1.0, DR=Dpr, GMfact=GMfact, HARDENING=Bs)
+    CY = SPECTRUM['FY'][0] / GMfact   # (len(DUCTILITY), len(PERIOD))
+    R = SPECTRUM['R'][0]
+    FY = CY * Ma * 9810.0             # Yield force of the column: Cy * weight (N)
+
+    totaltime = ti.time() - starttime
+    print(f'\nTotal time (s): {totaltime:.4f}')
+    print(f'Nonlinear analyses per period and ductility: {np.mean(SPECTRUM["RUNS"]):.2f}')
+    print(f'Converged: {np.sum(SPECTRUM["CONVERGED"])} / {SPECTRUM["CONVERGED"].size} \n\n')
+    #-------------------------------------------------------------------------------------------
+    # Plot Data
+    for DATA, YLABEL, TITLE in ((CY, 'Cy = Fy / (m g)', 'CONSTANT-DUCTILITY YIELD STRENGTH SPECTRUM'),
+                                (R, 'R = Fe / Fy', 'STRENGTH REDUCTION FACTOR')):
+        plt.figure(figsize=(10, 6))
+        for K, MU in enumerate(DUCTILITY):
+            plt.plot(PERIOD, DATA[K], linewidth=3, label=f'Ductility: {MU:.1f}')
+        plt.xlabel('PERIOD (t)')
+        plt.ylabel(YLABEL)
+        plt.title(TITLE, color='b')
+        plt.legend()
+        plt.grid(True)
+        plt.show()
+    #-------------------------------------------------------------------------------------------
+    # Write Output (one column per target ductility)
+    np.savetxt('CD_CY.txt', np.column_stack([PERIOD, CY.T]), fmt='%f')
+    np.savetxt('CD_R.txt', np.column_stack([PERIOD, R.T]), fmt='%f')
+    np.savetxt('CD_FY.txt', np.column_stack([PERIOD, FY.T]), fmt='%f')
+#-------------------------------------------------------------------------------------------
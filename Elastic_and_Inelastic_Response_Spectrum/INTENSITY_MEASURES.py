@@ -0,0 +1,204 @@
+"""
+Vectorized ground-motion intensity measures for record ensembles.
+
+All functions take a record matrix ACCEL (N, NPTS) - one record per row, e.g. GROUND_MOTION_STORE.RECORD_MATRIX -
+and work on whole arrays; the only Python loop is over the time steps of the oscillator kernel, where every
+step advances all records and all oscillators at once.
+
+- ELASTIC_RESPONSE          -> peak responses of linear SDOF oscillators (exact piecewise-linear recurrence of
+                               Nigam and Jennings) for every record, period and damping ratio
+- INTENSITY_MEASURES        -> PGA, PGV, Sa(T), Arias intensity, CAV, significant duration D5-95 and Housner
+                               spectrum intensity SI of every record
+- STORE_INTENSITY_MEASURES  -> the same for the records of a ground-motion store (or lazy source), in batches
+- RESPONSE_SPECTRUM         -> SD, SV, SA, PSV and PSA spectra for all periods and damping ratios at once
+
+Units: ACCEL * FACTOR must be in m/s^2 (e.g. FACTOR = 9.81 for records in g). Sa and PGA are returned in
+m/s^2, PGV in m/s, Arias intensity in m/s, CAV in m/s, D5-95 in s and SI in m.
+"""
+import numpy as np
+from scipy.linalg import expm
+from scipy.integrate import trapezoid
+import GROUND_MOTION_STORE as GMS
+
+# -----------------------------------------------
+
+def OSCILLATOR_RECURRENCE(OMEGA, ZETA, DT):
+    """
+    Exact one-step recurrence of u'' + 2 zeta omega u' + omega^2 u = -a_g(t) for a_g linear over the step:
+
+        [u, v](k+1) = A [u, v](k) + B0 a_g(k) + B1 a_g(k+1)
+
+    The coefficients (Nigam and Jennings, 1969) come from one batched matrix exponential of the system
+    augmented with the ground acceleration and its slope, so any damping ratio (also zeta >= 1) is handled.
+
+    Parameters:
+    - OMEGA (np.array): Circular frequencies of the oscillators [rad/s].
+    - ZETA (np.array): Damping ratios of the oscillators (broadcast with OMEGA).
+    - DT (float): Time step [s].
+
+    Returns:
+    - A (np.array): (NOSC, 2, 2), B0 (np.array): (NOSC, 2), B1 (np.array): (NOSC, 2).
+    """
+    OMEGA, ZETA = np.broadcast_arrays(np.atleast_1d(np.asarray(OMEGA, dtype=float)), np.asarray(ZETA, dtype=float))
+    AUG = np.zeros((OMEGA.size, 4, 4))
+    AUG[:, 0, 1] = 1.0
+    AUG[:, 1, 0] = -OMEGA.ravel() ** 2
+    AUG[:, 1, 1] = -2.0 * ZETA.ravel() * OMEGA.ravel()
+    AUG[:, 1, 2] = -1.0   # Ground acceleration a_g(k) + slope * tau
+    AUG[:, 2, 3] = 1.0
+    EXP = expm(AUG * DT)
+    SLOPE = EXP[:, :2, 3] / DT  # Response to the slope (a_g(k+1) - a_g(k)) / DT
+    return EXP[:, :2, :2], EXP[:, :2, 2] - SLOPE, SLOPE
+
+# -----------------------------------------------
+
+def ELASTIC_RESPONSE(ACCEL, DT, PERIODS, ZETA=0.05, NPTS=None):
+    """
+    Peak responses of linear SDOF oscillators for a record matrix.
+
+    Parameters:
+    - ACCEL (np.array): Ground accelerations (N, NPTS) or one record (NPTS,).
+    - DT (float): Time step [s].
+    - PERIODS (np.array): Periods of the oscillators [s].
+    - ZETA (float or np.array): Damping ratio of every oscillator (broadcast with PERIODS).
+    - NPTS (np.array): Length of every record when ACCEL is zero-padded (peaks are only taken within the record).
+
+    Returns:
+    - RESPONSE (dict): 'SD' peak relative displacement, 'SV' peak relative velocity, 'SA' peak absolute
+      acceleration, 'SA_REL' peak relative acceleration (OpenSees nodal accel under UniformExcitation),
+      'PSV' = omega * SD and 'PSA' = omega^2 * SD, each (N, NOSC) in the units of ACCEL.
+    """
+    ACCEL = np.atleast_2d(np.asarray(ACCEL, dtype=float))
+    N, NT = ACCEL.shape
+    PERIODS, ZETA = np.broadcast_arrays(np.atleast_1d(np.asarray(PERIODS, dtype=float)), np.asarray(ZETA, dtype=float))
+    OMEGA = 2.0 * np.pi / PERIODS.ravel()
+    ZETA = ZETA.ravel()
+    A, B0, B1 = OSCILLATOR_RECURRENCE(OMEGA, ZETA, DT)
+    A11, A12, A21, A22 = A[:, 0, 0], A[:, 0, 1], A[:, 1, 0], A[:, 1, 1]
+    C = 2.0 * ZETA * OMEGA
+    K = OMEGA ** 2
+    u = np.zeros((N, OMEGA.size))
+    v = np.zeros((N, OMEGA.size))
+    SD, SV, SA, SA_REL = np.zeros_like(u), np.zeros_like(u), np.zeros_like(u), np.zeros_like(u)
+    ACTIVE = None
+    for STEP in range(NT - 1):
+        A_K, A_K1 = ACCEL[:, STEP, None], ACCEL[:, STEP + 1, None]
+        u, v = (A11 * u + A12 * v + B0[:, 0] * A_K + B1[:, 0] * A_K1,
+                A21 * u + A22 * v + B0[:, 1] * A_K + B1[:, 1] * A_K1)
+        # Absolute acceleration from the equation of motion
+        ABS_ACCEL = -(C * v + K * u)
+        REL_ACCEL = ABS_ACCEL - A_K1
+        if NPTS is not None:
+            ACTIVE = (STEP + 1 < np.asarray(NPTS))[:, None]
+            np.maximum(SD, np.where(ACTIVE, np.abs(u), 0.0), out=SD)
+            np.maximum(SV, np.where(ACTIVE, np.abs(v), 0.0), out=SV)
+            np.maximum(SA, np.where(ACTIVE, np.abs(ABS_ACCEL), 0.0), out=SA)
+            np.maximum(SA_REL, np.where(ACTIVE, np.abs(REL_ACCEL), 0.0), out=SA_REL)
+        else:
+            np.maximum(SD, np.abs(u), out=SD)
+            np.maximum(SV, np.abs(v), out=SV)
+            np.maximum(SA, np.abs(ABS_ACCEL), out=SA)
+            np.maximum(SA_REL, np.abs(REL_ACCEL), out=SA_REL)
+    return {'SD': SD, 'SV': SV, 'SA': SA, 'SA_REL': SA_REL, 'PSV': OMEGA * SD, 'PSA': K * SD}
+
+# -----------------------------------------------
+
+def SIGNIFICANT_DURATION(ACCEL, DT, LOWER=0.05, UPPER=0.95):
+    # Time between LOWER and UPPER of the normalized cumulative squared acceleration (Husid plot) of every record
+    ACCEL = np.atleast_2d(ACCEL)
+    HUSID = np.cumsum(ACCEL ** 2, axis=1)
+    TOTAL = HUSID[:, -1:]
+    TOTAL = np.where(TOTAL > 0.0, TOTAL, 1.0)
+    HUSID = HUSID / TOTAL
+    return DT * (np.argmax(HUSID >= UPPER, axis=1) - np.argmax(HUSID >= LOWER, axis=1))
+
+# -----------------------------------------------
+
+def INTENSITY_MEASURES(ACCEL, DT, PERIODS=(1.0,), ZETA=0.05, FACTOR=1.0, GRAVITY=9.81,
+                       SI_PERIODS=np.linspace(0.1, 2.5, 25), NPTS=None):
+    """
+    Intensity measures of every record of a record matrix.
+
+    Parameters:
+    - ACCEL (np.array): Ground accelerations (N, NPTS) or one record (NPTS,).
+    - DT (float): Time step [s].
+    - PERIODS (list): Periods of the spectral accelerations Sa(T) [s] (e.g. the first-mode period T1).
+    - ZETA (float): Damping ratio of Sa(T) and SI.
+    - FACTOR (float): Scale factor of the records to m/s^2 (e.g. 9.81 for records in g).
+    - GRAVITY (float): Acceleration of gravity in the Arias intensity [m/s^2].
+    - SI_PERIODS (np.array): Periods of the integral of the pseudo-velocity spectrum SI (Housner: 0.1 - 2.5 s).
+    - NPTS (np.array): Length of every record when ACCEL is zero-padded.
+
+    Returns:
+    - IM (dict): {'PGA', 'PGV', 'SA(T=...)', 'ARIAS', 'CAV', 'D5_95', 'SI'}, one value per record.
+    """
+    ACCEL = FACTOR * np.atleast_2d(np.asarray(ACCEL, dtype=float))
+    IM = {'PGA': np.max(np.abs(ACCEL), axis=1)}
+    # Velocity by trapezoidal integration (zero initial velocity, no baseline correction)
+    VELOCITY = np.cumsum(0.5 * DT * (ACCEL[:, 1:] + ACCEL[:, :-1]), axis=1)
+    IM['PGV'] = np.max(np.abs(VELOCITY), axis=1) if VELOCITY.shape[1] > 0 else np.zeros(ACCEL.shape[0])
+    PERIODS = list(np.atleast_1d(PERIODS))
+    SPECTRUM = ELASTIC_RESPONSE(ACCEL, DT, PERIODS + list(SI_PERIODS), ZETA, NPTS)
+    for K, T in enumerate(PERIODS):
+        IM[f'SA(T={T:g})'] = SPECTRUM['PSA'][:, K]
+    IM['ARIAS'] = np.pi / (2.0 * GRAVITY) * trapezoid(ACCEL ** 2, dx=DT, axis=1)
+    IM['CAV'] = trapezoid(np.abs(ACCEL), dx=DT, axis=1)
+    IM['D5_95'] = SIGNIFICANT_DURATION(ACCEL, DT)
+    IM['SI'] = trapezoid(SPECTRUM['PSV'][:, len(PERIODS):], x=np.asarray(SI_PERIODS), axis=1)
+    return IM
+
+# -----------------------------------------------
+
+def STORE_INTENSITY_MEASURES(STORE, INDICES=None, BATCH_SIZE=1000, **OPTIONS):
+    """
+    Intensity measures of the records of a ground-motion store (GROUND_MOTION_STORE.OPEN_STORE or a lazy source).
+
+    Records are read in batches of BATCH_SIZE and grouped by time step, so the memory use does not grow with the store.
+
+    Parameters:
+    - STORE (dict or source): Ground-motion store.
+    - INDICES (list): Records to evaluate (default: all).
+    - BATCH_SIZE (int): Number of records per record matrix.
+    - OPTIONS: Arguments of INTENSITY_MEASURES (PERIODS, ZETA, FACTOR, ...).
+
+    Returns:
+    - IM (dict): {NAME: np.array}, one value per record of INDICES.
+    """
+    INDICES = list(range(GMS.NUM_RECORDS(STORE)) if INDICES is None else INDICES)
+    IM = {}
+    for START in range(0, len(INDICES), BATCH_SIZE):
+        BATCH = INDICES[START:START + BATCH_SIZE]
+        DTS = np.array([GMS.READ_RECORD(STORE, I)[1] for I in BATCH])
+        for DT in np.unique(DTS):
+            POSITIONS = np.flatnonzero(DTS == DT)
+            GROUP = [BATCH[P] for P in POSITIONS]
+            LENGTHS = np.array([GMS.READ_RECORD(STORE, I)[0].size for I in GROUP])
+            VALUES = INTENSITY_MEASURES(GMS.RECORD_MATRIX(STORE, GROUP), DT,
+                                        NPTS=LENGTHS if np.any(LENGTHS != LENGTHS.max()) else None, **OPTIONS)
+            for NAME, VALUE in VALUES.items():
+                IM.setdefault(NAME, np.zeros(len(INDICES)))[START + POSITIONS] = VALUE
+    return IM
+
+# -----------------------------------------------
+
+def RESPONSE_SPECTRUM(ACCEL, DT, PERIODS, DAMPING=(0.05,), NPTS=None):
+    """
+    Elastic response spectra of every record for all periods and damping ratios in one pass.
+
+    Parameters:
+    - ACCEL (np.array): Ground accelerations (N, NPTS) or one record (NPTS,).
+    - DT (float): Time step [s].
+    - PERIODS (np.array): Periods of the spectrum [s].
+    - DAMPING (list): Damping ratios of the spectrum.
+    - NPTS (np.array): Length of every record when ACCEL is zero-padded.
+
+    Returns:
+    - SPECTRUM (dict): 'SD', 'SV', 'SA', 'SA_REL', 'PSV' and 'PSA' (as ELASTIC_RESPONSE), each (N, len(DAMPING), len(PERIODS)).
+    """
+    PERIODS = np.atleast_1d(np.asarray(PERIODS, dtype=float))
+    DAMPING = np.atleast_1d(np.asarray(DAMPING, dtype=float))
+    ZETA_GRID, PERIOD_GRID = np.meshgrid(DAMPING, PERIODS, indexing='ij')
+    RESPONSE = ELASTIC_RESPONSE(ACCEL, DT, PERIOD_GRID.ravel(), ZETA_GRID.ravel(), NPTS)
+    return {NAME: VALUE.reshape(VALUE.shape[0], DAMPING.size, PERIODS.size) for NAME, VALUE in RESPONSE.items()}
+
+# -----------------------------------------------
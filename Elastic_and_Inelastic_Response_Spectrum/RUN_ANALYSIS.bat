@@ -14,12 +14,13 @@ Echo.
 Echo.
 Echo.
 Echo.           ## ELASTIC RESPONSE SPECTRUM ANALYSIS ##
-OpenSees.exe E_SPEC.tcl
-ren Data E_SPEC
+python E_SPEC.py
 Echo.           ## INELASTIC RESPONSE SPECTRUM ANALYSIS - UNCONFINED CONCRETE SECTION ##
 OpenSees.exe INE_SPEC_UNCONFINED.tcl
 ren Data INE_SPEC_UNCONFINED
 Echo.           ## INELASTIC RESPONSE SPECTRUM ANALYSIS - CONFINED CONCRETE SECTION ##
 OpenSees.exe INE_SPEC_CONFINED.tcl
 ren Data INE_SPEC_CONFINED
+Echo.           ## CONSTANT-DUCTILITY INELASTIC RESPONSE SPECTRUM ANALYSIS ##
+python INE_SPEC_CD.py
 PAUSE
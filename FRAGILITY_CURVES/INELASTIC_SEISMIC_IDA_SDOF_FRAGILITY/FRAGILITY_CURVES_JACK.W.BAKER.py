@@ -41,57 +41,49 @@ PGA = 0.8g: 19 failures. At this brutal intensity, 95% of the analyses flag the
 The Trend: As PGA climbs, failures skyrocket. This makes sense—stronger shaking pushes the structure past its capacity more often. It’s a classic dose-response curve
  for seismic vulnerability.
 """
+import os
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.stats import norm
-from scipy.optimize import minimize
+import FRAGILITY_FIT as S14
+import RISK_INTEGRATION as S15
 #------------------------------------------------------------------------
-# Simulated structural analysis data
-IM_levels = np.array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8])  # PGA in g
-n_analyses = np.array([20, 20, 20, 20, 20, 20, 20, 20])  # Number of analyses per level
-n_failures = np.array([0, 1, 3, 6, 10, 14, 17, 19])  # Number of failures per level
+# Structural analysis data: stripe counts of the multiple-stripe analysis of INELASTIC_SEISMIC_IDA_SDOF_FRAGILITY.py
+# (IDA_METHOD = 'MSA'), or the simulated example data below when that file does not exist yet
+MSA_FILE = 'INELASTIC_SEISMIC_IDA_SDOF_FRAGILITY_MSA.npz'
+if os.path.exists(MSA_FILE):
+    MSA = np.load(MSA_FILE)
+    IM_levels = MSA['IM_levels']          # PGA in g
+    n_analyses = MSA['n_analyses']        # Number of analyses per level
+    n_failures = MSA['n_failures']        # Number of failures per damage state and level
+    damage_states = MSA['damage_states']
+else:
+    IM_levels = np.array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8])  # PGA in g
+    n_analyses = np.array([20, 20, 20, 20, 20, 20, 20, 20])  # Number of analyses per level
+    n_failures = np.array([[0, 1, 3, 6, 10, 14, 17, 19]])  # Number of failures per level
+    damage_states = np.array(['Damage State'])
 #------------------------------------------------------------------------
-# Define the lognormal fragility function
-def fragility_function(IM, theta, beta):
-    """Compute the probability of exceeding a damage state using lognormal CDF."""
-    return norm.cdf((np.log(IM) - theta) / beta)
-#------------------------------------------------------------------------
-# Define the negative log-likelihood function for MLE
-def neg_log_likelihood(params, IM, n_fail, n_tot):
-    """Calculate the negative log-likelihood to be minimized."""
-    theta, beta = params
-    if beta <= 0:  # Ensure beta is positive
-        return np.inf
-    p = fragility_function(IM, theta, beta)
-    p = np.clip(p, 1e-10, 1 - 1e-10)  # Prevent log(0) issues
-    likelihood = n_fail * np.log(p) + (n_tot - n_fail) * np.log(1 - p)
-    return -np.sum(likelihood)
-#------------------------------------------------------------------------
-# Initial parameter guesses: theta = ln(median), beta = log standard deviation
-initial_params = [np.log(0.5), 0.4]
-#------------------------------------------------------------------------
-# Fit the fragility curve by minimizing the negative log-likelihood
-result = minimize(
-    neg_log_likelihood,
-    initial_params,
-    args=(IM_levels, n_failures, n_analyses),
-    method='Nelder-Mead',
-    bounds=[(-5, 5), (0.01, 2)]  # Bounds for theta and beta
-)
+# Fit the fragility curves of all damage states by minimizing the negative log-likelihood
+# (theta = ln(median), beta = log standard deviation; bounds of beta: 0.01 - 2)
+# and their 90% confidence bands from 1000 bootstrap resamples of the analyses
+IM_range = np.linspace(0.01, max(1.0, IM_levels.max()), 100)
+bootstrap = S14.BOOTSTRAP_FRAGILITY(IM_levels, n_failures, n_analyses, NUM_BOOTSTRAP=1000, Q=(0.05, 0.95),
+                                    IM_GRID=IM_range, BETA_BOUNDS=(0.01, 2))
+result = bootstrap['FIT']
 #------------------------------------------------------------------------
 # Extract fitted parameters
-theta_fit, beta_fit = result.x
-print(f"Fitted parameters: theta = {theta_fit:.3f}, beta = {beta_fit:.3f}")
-print(f"Median PGA = {np.exp(theta_fit):.3f} g")
-#------------------------------------------------------------------------
-# Generate data for the fragility curve plot
-IM_range = np.linspace(0.01, 1.0, 100)
-fragility_curve = fragility_function(IM_range, theta_fit, beta_fit)
+for K, damage_state in enumerate(damage_states):
+    theta_fit, beta_fit = result['THETA'][K], result['BETA'][K]
+    print(f"{damage_state} - Fitted parameters: theta = {theta_fit:.3f}, beta = {beta_fit:.3f}")
+    print(f"{damage_state} - Median PGA = {np.exp(theta_fit):.3f} g")
+    print(f"{damage_state} - 90% confidence intervals: theta = {bootstrap['THETA_CI'][:, K].round(3)}, beta = {bootstrap['BETA_CI'][:, K].round(3)}")
 #------------------------------------------------------------------------
 # Plot the results
 plt.figure(figsize=(8, 6))
-plt.plot(IM_range, fragility_curve, label='Fitted Fragility Curve', color='blue')
-plt.scatter(IM_levels, n_failures / n_analyses, color='red', label='Observed Data', zorder=5)
+for K, damage_state in enumerate(damage_states):
+    fragility_curve = S14.FRAGILITY_FUNCTION(IM_range, result['THETA'][K], result['BETA'][K])
+    line, = plt.plot(IM_range, fragility_curve, label=f'Fitted Fragility Curve - {damage_state}')
+    plt.fill_between(IM_range, bootstrap['BANDS'][0, K], bootstrap['BANDS'][1, K], color=line.get_color(), alpha=0.2)
+    plt.scatter(IM_levels, n_failures[K] / n_analyses, color=line.get_color(), label=f'Observed Data - {damage_state}', zorder=5)
 plt.xlabel('Peak Ground Acceleration (PGA, g)')
 plt.ylabel('Probability of Exceeding Damage State')
 plt.title('Fragility Curve Fitting Based on Baker (2015)')
@@ -99,3 +91,26 @@ plt.legend()
 plt.grid(True)
 plt.show()
 #------------------------------------------------------------------------
+# Risk integration: mean annual frequency of every damage state from the fitted curve and from all bootstrap
+# curves at once (example site hazard curve: replace with the PGA hazard curve of the site)
+hazard_PGA = np.array([0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.7, 1.0, 1.5])  # PGA in g
+hazard_MAF = np.array([2.0e-2, 8.0e-3, 2.1e-3, 8.0e-4, 3.7e-4, 1.9e-4, 6.5e-5, 1.8e-5, 3.5e-6])  # Annual frequency of exceedance
+years = 50  # Exposure time
+risk = S15.RISK_INTEGRATION(result['THETA'], result['BETA'], hazard_PGA, hazard_MAF, YEARS=years)
+bootstrap_risk = S15.RISK_INTEGRATION(bootstrap['THETA'], bootstrap['BETA'], hazard_PGA, hazard_MAF, YEARS=years)
+lambda_CI = np.nanquantile(bootstrap_risk['LAMBDA'], (0.05, 0.95), axis=0)
+for K, damage_state in enumerate(damage_states):
+    print(f"{damage_state} - Mean annual frequency = {risk['LAMBDA'][K]:.3e} (90% interval: {lambda_CI[0, K]:.3e} - {lambda_CI[1, K]:.3e})")
+    print(f"{damage_state} - Return period = {risk['RETURN_PERIOD'][K]:.0f} years, probability in {years} years = {risk['PROBABILITY'][K]:.4f}")
+
+plt.figure(figsize=(8, 6))
+plt.loglog(hazard_PGA, hazard_MAF, 'o-', color='black', label='Site Hazard Curve')
+for K, damage_state in enumerate(damage_states):
+    plt.axhline(risk['LAMBDA'][K], linestyle='--', color=f'C{K}', label=f'Mean Annual Frequency - {damage_state}')
+plt.xlabel('Peak Ground Acceleration (PGA, g)')
+plt.ylabel('Mean Annual Frequency of Exceedance')
+plt.title('Seismic Hazard and Damage State Frequencies')
+plt.legend()
+plt.grid(True, which='both')
+plt.show()
+#------------------------------------------------------------------------
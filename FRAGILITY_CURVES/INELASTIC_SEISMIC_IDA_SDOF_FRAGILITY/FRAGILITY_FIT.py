@@ -0,0 +1,534 @@
+"""
+Lognormal fragility functions fitted by maximum likelihood (Baker, 2015).
+
+FRAGILITY_CURVES_JACK.W.BAKER.py fitted one curve to hand-typed stripe counts with a scalar likelihood. Here the
+counts of a multiple-stripe analysis (IDA_PARALLEL.MSA_COUNTS) are fitted for all damage states together:
+- FRAGILITY_FUNCTION -> P(DS | IM) = Phi((ln IM - theta) / beta), broadcast over any parameter arrays
+- NEG_LOG_LIKELIHOOD -> binomial negative log-likelihood of every damage state, broadcast over any batch of
+                        candidate (theta, beta) pairs
+- SCORE_AND_INFORMATION -> analytic gradient and Fisher information of the likelihood in (theta, beta)
+- FIT_FRAGILITY_MLE  -> theta (ln median), beta and their standard errors for every damage state and every
+                        data set of a batch: a (theta, beta) grid start (or a warm start) refined by Fisher scoring
+- BOOTSTRAP_FRAGILITY -> confidence bands of the curves from bootstrap resamples of the stripe counts
+- FIT_CAPACITY_MLE   -> lognormal distribution of IDA capacities with the records that do not reach a damage state
+                        right-censored at their largest IM run (not dropped)
+
+Online estimation while a campaign runs (the results arrive from the parallel runners batch by batch):
+- FragilityStream -> stripe counts (the sufficient statistics of the binomial likelihood) of (IM, failed)
+                     observations and a fit warm-started from the previous estimate, with live theta, beta and
+                     standard errors
+- CapacityStream  -> lognormal fit of IDA capacities (IM at which a record reaches a damage state), refitted by
+                     FIT_CAPACITY_MLE with the records that do not reach it right-censored
+- FragilityTarget -> target of MONTE_CARLO_PARALLEL.SEQUENTIAL_MONTE_CARLO on a stream: converged when the
+                     confidence half-width of beta is below TOLERANCE times beta for every damage state that is
+                     not saturated (failed in every observation or in none: no curve to converge)
+
+The likelihood is the probit model P = Phi(A + B ln IM) with A = -theta / beta and B = 1 / beta. It is log-concave
+in (A, B), so Fisher scoring in (A, B) converges in a few iterations from any reasonable start; every iteration is
+one array operation over all damage states and resamples (a step that raises the likelihood is halved).
+"""
+from statistics import NormalDist
+import numpy as np
+from scipy.stats import norm
+
+P_CLIP = 1.0e-10  # Probabilities are clipped to [P_CLIP, 1 - P_CLIP] to prevent log(0)
+
+# -----------------------------------------------
+
+def FRAGILITY_FUNCTION(IM, THETA, BETA):
+    # Probability of exceeding a damage state: lognormal CDF with median exp(THETA) and dispersion BETA
+    return norm.cdf((np.log(IM) - THETA) / BETA)
+
+# -----------------------------------------------
+
+def NEG_LOG_LIKELIHOOD(THETA, BETA, IM, N_FAILURES, N_TOTAL):
+    """
+    Binomial negative log-likelihood of lognormal fragility parameters.
+
+    Parameters:
+    - THETA, BETA (np.array): ln median and dispersion, shape (..., damage states).
+    - IM (np.array): Stripe intensity measures (stripes,).
+    - N_FAILURES (np.array): Exceedances (..., damage states, stripes).
+    - N_TOTAL (np.array): Analyses per stripe (stripes,) or (..., damage states, stripes).
+
+    Returns:
+    - NLL (np.array): Negative log-likelihood, shape (..., damage states); inf where BETA <= 0.
+    """
+    THETA = np.asarray(THETA, dtype=float)[..., None]
+    BETA = np.asarray(BETA, dtype=float)[..., None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        P = np.clip(FRAGILITY_FUNCTION(IM, THETA, np.where(BETA > 0, BETA, np.nan)), P_CLIP, 1 - P_CLIP)
+    LIKELIHOOD = N_FAILURES * np.log(P) + (N_TOTAL - N_FAILURES) * np.log(1 - P)
+    NLL = -np.sum(LIKELIHOOD, axis=-1)
+    return np.where(BETA[..., 0] > 0, NLL, np.inf)
+
+# -----------------------------------------------
+
+def _PROBIT_TERMS(LN_IM, A, B, N_FAILURES, N_TOTAL):
+    # Negative log-likelihood, its derivative R and expected information W per stripe w.r.t. ETA = A + B ln IM
+    ETA = A[..., None] + B[..., None] * LN_IM
+    P = np.clip(norm.cdf(ETA), P_CLIP, 1 - P_CLIP)
+    PHI = norm.pdf(ETA)
+    V = P * (1 - P)
+    R = -(N_FAILURES - N_TOTAL * P) * PHI / V
+    W = N_TOTAL * PHI**2 / V
+    NLL = -np.sum(N_FAILURES * np.log(P) + (N_TOTAL - N_FAILURES) * np.log(1 - P), axis=-1)
+    return NLL, R, W, ETA
+
+# -----------------------------------------------
+
+def SCORE_AND_INFORMATION(THETA, BETA, IM, N_FAILURES, N_TOTAL):
+    """
+    Analytic gradient and Fisher information of NEG_LOG_LIKELIHOOD with respect to (theta, beta).
+
+    Parameters:
+    - THETA, BETA, IM, N_FAILURES, N_TOTAL: As for NEG_LOG_LIKELIHOOD.
+
+    Returns:
+    - NLL (np.array): Negative log-likelihood (..., damage states).
+    - GRADIENT (np.array): d NLL / d (theta, beta), shape (..., damage states, 2).
+    - INFORMATION (np.array): Expected information matrix, shape (..., damage states, 2, 2); its inverse at the
+      MLE is the covariance of (theta, beta).
+    """
+    THETA = np.asarray(THETA, dtype=float)
+    BETA = np.asarray(BETA, dtype=float)
+    NLL, R, W, ETA = _PROBIT_TERMS(np.log(IM), -THETA / BETA, 1.0 / BETA, N_FAILURES, N_TOTAL)
+    D_THETA = -1.0 / BETA[..., None]  # d ETA / d theta
+    D_BETA = -ETA / BETA[..., None]   # d ETA / d beta
+    GRADIENT = np.stack([np.sum(R * D_THETA, axis=-1), np.sum(R * D_BETA, axis=-1)], axis=-1)
+    I_TT = np.sum(W * D_THETA**2, axis=-1)
+    I_TB = np.sum(W * D_THETA * D_BETA, axis=-1)
+    I_BB = np.sum(W * D_BETA**2, axis=-1)
+    INFORMATION = np.stack([np.stack([I_TT, I_TB], axis=-1), np.stack([I_TB, I_BB], axis=-1)], axis=-2)
+    return NLL, GRADIENT, INFORMATION
+
+# -----------------------------------------------
+
+def _GRID_START(IM, N_FAILURES, N_TOTAL, THETA_BOUNDS, BETA_BOUNDS, GRID_SIZE):
+    # Best point of a (theta, beta) grid for every damage state (and data set): one likelihood evaluation of the grid
+    TG, BG = np.meshgrid(np.linspace(*THETA_BOUNDS, GRID_SIZE[0]), np.linspace(*BETA_BOUNDS, GRID_SIZE[1]), indexing='ij')
+    SHAPE = (-1,) + (1,) * (N_FAILURES.ndim - 1)
+    NLL = NEG_LOG_LIKELIHOOD(TG.reshape(SHAPE), BG.reshape(SHAPE), IM, N_FAILURES, N_TOTAL)
+    BEST = np.argmin(NLL, axis=0)
+    return TG.ravel()[BEST], BG.ravel()[BEST]
+
+# -----------------------------------------------
+
+def FIT_FRAGILITY_MLE(IM, N_FAILURES, N_TOTAL, BETA_BOUNDS=(0.01, 2.0), GRID_SIZE=(81, 40), THETA0=None, BETA0=None,
+                      TOLERANCE=1.0e-8, MAX_ITERATIONS=50):
+    """
+    Maximum-likelihood lognormal fragility curves of all damage states (and of a batch of data sets) at once.
+
+    Parameters:
+    - IM (np.array): Stripe intensity measures (stripes,), all > 0.
+    - N_FAILURES (np.array): Exceedances (..., damage states, stripes), or (stripes,) for one damage state.
+    - N_TOTAL (np.array): Analyses per stripe (stripes,) or (..., damage states, stripes).
+    - BETA_BOUNDS (tuple): Bounds of beta.
+    - GRID_SIZE (tuple): Points of the (theta, beta) starting grid.
+    - THETA0, BETA0 (np.array): Optional warm start (..., damage states), e.g. the fit of the full data for
+      bootstrap resamples; the grid is skipped.
+    - TOLERANCE (float): Convergence tolerance of the theta and beta updates (and of the Newton decrement).
+    - MAX_ITERATIONS (int): Fisher-scoring iterations.
+
+    Returns:
+    - FIT (dict of np.array, shape (..., damage states)): 'THETA', 'BETA', 'MEDIAN' (exp(THETA)), 'SE_THETA' and
+      'SE_BETA' (from the Fisher information), 'NLL', 'ITERATIONS' (of the batch) and 'CONVERGED'.
+    """
+    IM = np.asarray(IM, dtype=float)
+    N_FAILURES = np.asarray(N_FAILURES, dtype=float)
+    if N_FAILURES.ndim == 1:
+        N_FAILURES = N_FAILURES[None, :]
+    N_TOTAL = np.asarray(N_TOTAL, dtype=float)
+    LN_IM = np.log(IM)
+    SPAN = max(LN_IM.max() - LN_IM.min(), 1.0)
+    THETA_BOUNDS = (LN_IM.min() - SPAN, LN_IM.max() + SPAN)
+
+    if THETA0 is None or BETA0 is None:
+        THETA, BETA = _GRID_START(IM, N_FAILURES, N_TOTAL, THETA_BOUNDS, BETA_BOUNDS, GRID_SIZE)
+    else:
+        THETA = np.array(np.broadcast_to(THETA0, N_FAILURES.shape[:-1]), dtype=float)
+        BETA = np.array(np.broadcast_to(BETA0, N_FAILURES.shape[:-1]), dtype=float)
+
+    # Fisher scoring on the probit parameters A = -theta/beta, B = 1/beta (bounds of theta and beta kept)
+    def BOUNDED(A, B):
+        B = np.clip(B, 1.0 / BETA_BOUNDS[1], 1.0 / BETA_BOUNDS[0])
+        return -np.clip(-A / B, *THETA_BOUNDS) * B, B
+
+    A, B = BOUNDED(-THETA / BETA, 1.0 / BETA)
+    CONVERGED = np.zeros(THETA.shape, dtype=bool)
+    for ITERATION in range(1, MAX_ITERATIONS + 1):
+        NLL, R, W, _ = _PROBIT_TERMS(LN_IM, A, B, N_FAILURES, N_TOTAL)
+        G_A, G_B = np.sum(R, axis=-1), np.sum(R * LN_IM, axis=-1)
+        I_AA, I_AB, I_BB = np.sum(W, axis=-1), np.sum(W * LN_IM, axis=-1), np.sum(W * LN_IM**2, axis=-1)
+        DET = I_AA * I_BB - I_AB**2
+        SAFE = DET > 1e-10 * I_AA * I_BB  # Singular information (e.g. one informative stripe): no scoring step
+        DET = np.where(SAFE, DET, 1.0)
+        D_A = np.where(SAFE, -(I_BB * G_A - I_AB * G_B) / DET, 0.0)
+        D_B = np.where(SAFE, -(I_AA * G_B - I_AB * G_A) / DET, 0.0)
+        STEP = np.ones_like(A)
+        for _ in range(30):  # Step halving where the likelihood would drop
+            A_NEW, B_NEW = BOUNDED(A + STEP * D_A, B + STEP * D_B)
+            WORSE = _PROBIT_TERMS(LN_IM, A_NEW, B_NEW, N_FAILURES, N_TOTAL)[0] > NLL + 1e-12 * np.abs(NLL)
+            if not WORSE.any():
+                break
+            STEP = np.where(WORSE, 0.5 * STEP, STEP)
+        A_NEW = np.where(WORSE, A, A_NEW)
+        B_NEW = np.where(WORSE, B, B_NEW)
+        DECREMENT = -(G_A * D_A + G_B * D_B)  # Newton decrement: small only near the optimum, not on a stalled step
+        CONVERGED = ((np.abs(A_NEW / B_NEW - A / B) < TOLERANCE) & (np.abs(1.0 / B_NEW - 1.0 / B) < TOLERANCE) &
+                     (DECREMENT < TOLERANCE * np.maximum(1.0, np.abs(NLL))) & SAFE)
+        A, B = A_NEW, B_NEW
+        if CONVERGED.all():
+            break
+
+    THETA, BETA = -A / B, 1.0 / B
+    NLL, _, INFORMATION = SCORE_AND_INFORMATION(THETA, BETA, IM, N_FAILURES, N_TOTAL)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        DET = INFORMATION[..., 0, 0] * INFORMATION[..., 1, 1] - INFORMATION[..., 0, 1]**2
+        SE_THETA = np.sqrt(INFORMATION[..., 1, 1] / DET)
+        SE_BETA = np.sqrt(INFORMATION[..., 0, 0] / DET)
+    return {'THETA': THETA, 'BETA': BETA, 'MEDIAN': np.exp(THETA), 'SE_THETA': SE_THETA, 'SE_BETA': SE_BETA,
+            'NLL': NLL, 'ITERATIONS': ITERATION, 'CONVERGED': CONVERGED}
+
+# -----------------------------------------------
+
+def BOOTSTRAP_COUNTS(N_FAILURES, N_TOTAL, NUM_BOOTSTRAP, SEED=0):
+    """
+    Bootstrap resamples of stripe counts, all drawn in one call.
+
+    The analyses of every stripe are resampled with replacement. When the damage states are nested (every run that
+    exceeds a state also exceeds the lower ones), the runs are resampled by their highest exceeded state, which
+    keeps the resampled counts nested; otherwise every damage state is resampled on its own (binomial).
+
+    Parameters:
+    - N_FAILURES (np.array): Exceedances (damage states, stripes).
+    - N_TOTAL (np.array): Analyses per stripe (stripes,) or (damage states, stripes).
+    - NUM_BOOTSTRAP (int): Number of resamples.
+    - SEED (int): Seed of the random generator.
+
+    Returns:
+    - N_FAILURES (np.array): Resampled exceedances (NUM_BOOTSTRAP, damage states, stripes).
+    """
+    RNG = np.random.default_rng(SEED)
+    N_FAILURES = np.atleast_2d(np.asarray(N_FAILURES, dtype=int))
+    N_TOTAL = np.asarray(N_TOTAL, dtype=int)
+    if N_TOTAL.ndim == 1 and np.all(np.diff(N_FAILURES, axis=0) <= 0):
+        # Runs per stripe by highest exceeded damage state (0: none)
+        LEVELS = np.vstack([N_TOTAL, N_FAILURES, np.zeros_like(N_TOTAL)])
+        CATEGORY = (LEVELS[:-1] - LEVELS[1:]).T.astype(float)  # (stripes, damage states + 1)
+        PVALS = np.where(N_TOTAL[:, None] > 0, CATEGORY / np.maximum(N_TOTAL, 1)[:, None], 0.0)
+        PVALS[N_TOTAL == 0, 0] = 1.0
+        DRAW = RNG.multinomial(np.broadcast_to(N_TOTAL, (NUM_BOOTSTRAP, N_TOTAL.size)), PVALS)
+        EXCEED = np.cumsum(DRAW[..., ::-1], axis=-1)[..., ::-1][..., 1:]  # (resamples, stripes, damage states)
+        return np.swapaxes(EXCEED, -1, -2)
+    N_TOTAL = np.broadcast_to(N_TOTAL, N_FAILURES.shape)
+    P_HAT = N_FAILURES / np.maximum(N_TOTAL, 1)
+    return RNG.binomial(np.broadcast_to(N_TOTAL, (NUM_BOOTSTRAP,) + N_FAILURES.shape), P_HAT)
+
+# -----------------------------------------------
+
+def BOOTSTRAP_FRAGILITY(IM, N_FAILURES, N_TOTAL, NUM_BOOTSTRAP=1000, SEED=0, Q=(0.05, 0.95), IM_GRID=None,
+                        **OPTIONS):
+    """
+    Maximum-likelihood fragility curves of all damage states with bootstrap confidence bands.
+
+    Parameters:
+    - IM, N_FAILURES, N_TOTAL: As for FIT_FRAGILITY_MLE (one data set).
+    - NUM_BOOTSTRAP (int): Number of bootstrap resamples (all fitted as one batch).
+    - SEED (int): Seed of the resampling.
+    - Q (tuple): Quantiles of the bands.
+    - IM_GRID (np.array): IM values of the bands (default: 100 points up to 1.5 times the largest stripe).
+    - OPTIONS: Further arguments of FIT_FRAGILITY_MLE (BETA_BOUNDS, TOLERANCE, ...).
+
+    Returns:
+    - BOOTSTRAP (dict): 'FIT' (fit of the data), 'THETA' and 'BETA' of the resamples (NUM_BOOTSTRAP, damage states),
+      'THETA_CI' and 'BETA_CI' (len(Q), damage states), 'IM_GRID' and 'BANDS' (len(Q), damage states, IM_GRID).
+    """
+    IM = np.asarray(IM, dtype=float)
+    FIT = FIT_FRAGILITY_MLE(IM, N_FAILURES, N_TOTAL, **OPTIONS)
+    SAMPLES = BOOTSTRAP_COUNTS(N_FAILURES, N_TOTAL, NUM_BOOTSTRAP, SEED)
+    BOOT = FIT_FRAGILITY_MLE(IM, SAMPLES, N_TOTAL, THETA0=FIT['THETA'], BETA0=FIT['BETA'], **OPTIONS)
+    if IM_GRID is None:
+        IM_GRID = np.linspace(IM.min() / 100, 1.5 * IM.max(), 100)
+    CURVES = FRAGILITY_FUNCTION(IM_GRID, BOOT['THETA'][..., None], BOOT['BETA'][..., None])
+    return {'FIT': FIT, 'THETA': BOOT['THETA'], 'BETA': BOOT['BETA'],
+            'THETA_CI': np.quantile(BOOT['THETA'], Q, axis=0), 'BETA_CI': np.quantile(BOOT['BETA'], Q, axis=0),
+            'IM_GRID': IM_GRID, 'BANDS': np.quantile(CURVES, Q, axis=0)}
+
+# -----------------------------------------------
+
+def _CENSORED_TERMS(X, EXACT, RIGHT, LEFT, A, B):
+    # Log-likelihood of every capacity and its first two derivatives in z = A + B ln(capacity)
+    Z = A[..., None] + B[..., None] * X
+    LOGPDF, LOGSF, LOGCDF = norm.logpdf(Z), norm.logsf(Z), norm.logcdf(Z)
+    HAZARD = np.exp(LOGPDF - LOGSF)  # phi / (1 - Phi): survivors (no exceedance up to the largest IM run)
+    MILLS = np.exp(LOGPDF - LOGCDF)  # phi / Phi: exceedance already at the first IM run
+    LL = np.where(EXACT, LOGPDF + np.log(B)[..., None], np.where(RIGHT, LOGSF, np.where(LEFT, LOGCDF, 0.0)))
+    G1 = np.where(EXACT, -Z, np.where(RIGHT, -HAZARD, np.where(LEFT, MILLS, 0.0)))
+    G2 = np.where(EXACT, -1.0, np.where(RIGHT, -HAZARD * (HAZARD - Z), np.where(LEFT, -MILLS * (Z + MILLS), 0.0)))
+    return LL, G1, G2
+
+# -----------------------------------------------
+
+def FIT_CAPACITY_MLE(CAPACITY, CENSOR_IM=None, BETA_BOUNDS=(0.01, 2.0), TOLERANCE=1.0e-10, MAX_ITERATIONS=100):
+    """
+    Censored maximum-likelihood lognormal distribution of IDA capacities (of all damage states at once).
+
+    A record that never reaches the damage state up to its largest IM run is right-censored there: it adds
+    log(1 - Phi((ln CENSOR_IM - theta) / beta)) instead of being dropped, which would bias the median low. A record
+    that is past the damage state already at its first run (capacity 0) is left-censored at that run:
+    log Phi((ln CENSOR_IM - theta) / beta). Every other capacity adds log phi((ln C - theta) / beta) / beta.
+    The likelihood is concave in A = -theta / beta, B = 1 / beta, and Newton steps in (A, B) converge in a few
+    iterations.
+
+    Parameters:
+    - CAPACITY (np.array): Capacities (..., records): inf without exceedance, 0 when the first run exceeds,
+      NaN for records without data.
+    - CENSOR_IM (np.array): IM of the censoring (broadcast to CAPACITY): largest IM run of a record without
+      exceedance, IM of the first run of a record with capacity 0 (e.g. IDA_PARALLEL.CUBE_CENSOR_IM). None drops
+      the censored records (biased).
+    - BETA_BOUNDS (tuple): Bounds of beta.
+    - TOLERANCE (float): Convergence tolerance of the Newton decrement.
+    - MAX_ITERATIONS (int): Newton iterations.
+
+    Returns:
+    - FIT (dict of np.array, shape (...)): 'THETA', 'BETA', 'MEDIAN', 'SE_THETA' and 'SE_BETA' (observed
+      information), 'NLL', 'NUM_OBSERVED', 'NUM_CENSORED' and 'CONVERGED'; theta and beta are NaN where the data do
+      not identify them (no observed capacity, or a single one without censored records).
+    """
+    CAPACITY = np.asarray(CAPACITY, dtype=float)
+    CENSOR = np.full(CAPACITY.shape, np.nan) if CENSOR_IM is None else np.broadcast_to(np.asarray(CENSOR_IM, dtype=float), CAPACITY.shape)
+    with np.errstate(invalid='ignore'):
+        EXACT = np.isfinite(CAPACITY) & (CAPACITY > 0)
+        KNOWN = np.isfinite(CENSOR) & (CENSOR > 0)
+        RIGHT = np.isposinf(CAPACITY) & KNOWN
+        LEFT = (CAPACITY == 0) & KNOWN
+    X = np.log(np.where(EXACT, CAPACITY, np.where(RIGHT | LEFT, CENSOR, 1.0)))
+    USED = EXACT | RIGHT | LEFT
+    N_EXACT, N_CENSORED = EXACT.sum(axis=-1), (RIGHT | LEFT).sum(axis=-1)
+    VALID = (N_EXACT >= 2) | ((N_EXACT >= 1) & (N_CENSORED >= 1))
+
+    # Start from the moments of the observed and censoring values
+    N_USED = np.maximum(USED.sum(axis=-1), 1)
+    MEAN = np.sum(np.where(USED, X, 0.0), axis=-1) / N_USED
+    STD = np.sqrt(np.sum(np.where(USED, X - MEAN[..., None], 0.0)**2, axis=-1) / N_USED)
+    BETA = np.clip(np.where(STD > 0, STD, 0.5), *BETA_BOUNDS)
+    A, B = -MEAN / BETA, 1.0 / BETA
+    B_BOUNDS = (1.0 / BETA_BOUNDS[1], 1.0 / BETA_BOUNDS[0])
+    CONVERGED = np.zeros(A.shape, dtype=bool)
+    for _ in range(MAX_ITERATIONS):
+        LL, G1, G2 = _CENSORED_TERMS(X, EXACT, RIGHT, LEFT, A, B)
+        LL = LL.sum(axis=-1)
+        G_A, G_B = G1.sum(axis=-1), np.sum(G1 * X, axis=-1) + N_EXACT / B
+        I_AA, I_AB = -G2.sum(axis=-1), -np.sum(G2 * X, axis=-1)
+        I_BB = -np.sum(G2 * X**2, axis=-1) + N_EXACT / B**2
+        DET = I_AA * I_BB - I_AB**2
+        SAFE = VALID & (DET > 1e-12 * I_AA * I_BB)
+        DET = np.where(SAFE, DET, 1.0)
+        D_A = np.where(SAFE, (I_BB * G_A - I_AB * G_B) / DET, 0.0)
+        D_B = np.where(SAFE, (I_AA * G_B - I_AB * G_A) / DET, 0.0)
+        DECREMENT = G_A * D_A + G_B * D_B
+        STEP = np.ones_like(A)
+        for _ in range(30):  # Step halving where the likelihood would drop
+            A_NEW, B_NEW = A + STEP * D_A, np.clip(B + STEP * D_B, *B_BOUNDS)
+            WORSE = _CENSORED_TERMS(X, EXACT, RIGHT, LEFT, A_NEW, B_NEW)[0].sum(axis=-1) < LL - 1e-12 * np.abs(LL)
+            if not WORSE.any():
+                break
+            STEP = np.where(WORSE, 0.5 * STEP, STEP)
+        A, B = np.where(WORSE, A, A_NEW), np.where(WORSE, B, B_NEW)
+        CONVERGED = SAFE & (DECREMENT < TOLERANCE * np.maximum(1.0, np.abs(LL)))
+        if np.all(CONVERGED | ~VALID):
+            break
+
+    LL, G1, G2 = _CENSORED_TERMS(X, EXACT, RIGHT, LEFT, A, B)
+    I_AA, I_AB = -G2.sum(axis=-1), -np.sum(G2 * X, axis=-1)
+    I_BB = -np.sum(G2 * X**2, axis=-1) + N_EXACT / B**2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        DET = I_AA * I_BB - I_AB**2
+        V_AA, V_AB, V_BB = I_BB / DET, -I_AB / DET, I_AA / DET  # Covariance of (A, B)
+        # Delta method: theta = -A / B, beta = 1 / B
+        VAR_THETA = (V_AA - 2 * (A / B) * V_AB + (A / B)**2 * V_BB) / B**2
+        VAR_BETA = V_BB / B**4
+    THETA = np.where(VALID, -A / B, np.nan)
+    BETA = np.where(VALID, 1.0 / B, np.nan)
+    return {'THETA': THETA, 'BETA': BETA, 'MEDIAN': np.exp(THETA),
+            'SE_THETA': np.where(VALID, np.sqrt(VAR_THETA), np.inf), 'SE_BETA': np.where(VALID, np.sqrt(VAR_BETA), np.inf),
+            'NLL': -LL.sum(axis=-1), 'NUM_OBSERVED': N_EXACT, 'NUM_CENSORED': N_CENSORED, 'CONVERGED': CONVERGED & VALID}
+
+# -----------------------------------------------
+
+class FragilityStream:
+    """
+    Online maximum-likelihood fragility curves of (IM, failed) observations, e.g. the runs of an MSA.
+
+    Parameters:
+    - NUM_DS (int): Number of damage states.
+    - DECIMALS (int): IM values equal to DECIMALS decimals share one stripe.
+    - OPTIONS: Arguments of FIT_FRAGILITY_MLE (BETA_BOUNDS, TOLERANCE, ...).
+    """
+    def __init__(self, NUM_DS=1, DECIMALS=10, **OPTIONS):
+        self.NUM_DS = NUM_DS
+        self.DECIMALS = DECIMALS
+        self.OPTIONS = OPTIONS
+        self.stripes = {}  # {IM: column of the counts}
+        self.im = []
+        self.n_total = []
+        self.n_failures = []
+        self.count = 0
+        self.fit = None
+
+    def update(self, IM, FAILED):
+        # IM (n,) and FAILED (n, NUM_DS): one observation per row
+        IM = np.atleast_1d(np.asarray(IM, dtype=float))
+        FAILED = np.asarray(FAILED, dtype=bool).reshape(IM.size, self.NUM_DS)
+        for X, F in zip(IM, FAILED):
+            KEY = round(float(X), self.DECIMALS)
+            if KEY not in self.stripes:
+                self.stripes[KEY] = len(self.im)
+                self.im.append(float(X))
+                self.n_total.append(0)
+                self.n_failures.append(np.zeros(self.NUM_DS, dtype=int))
+            J = self.stripes[KEY]
+            self.n_total[J] += 1
+            self.n_failures[J] += F
+        self.count += IM.size
+        if IM.size:
+            self.fit = None if self.fit is None else dict(self.fit, STALE=True)
+
+    def counts(self):
+        # Stripe counts: IM (stripes,), N_FAILURES (NUM_DS, stripes), N_TOTAL (stripes,)
+        ORDER = np.argsort(self.im)
+        return (np.array(self.im)[ORDER], np.array(self.n_failures).reshape(-1, self.NUM_DS).T[:, ORDER],
+                np.array(self.n_total)[ORDER])
+
+    def estimate(self):
+        """
+        Live estimates, refitted from the previous ones after new observations.
+
+        Returns:
+        - FIT (dict of np.array (NUM_DS,)): As FIT_FRAGILITY_MLE, plus 'N' (observations) and 'SATURATED'; theta and
+          beta are NaN and the standard errors inf while a damage state has no failure or no survival yet (SATURATED).
+        """
+        if self.fit is not None and not self.fit['STALE']:
+            return self.fit
+        IM, N_FAILURES, N_TOTAL = self.counts()
+        INFORMED = (N_FAILURES.sum(axis=1) > 0) & (N_FAILURES.sum(axis=1) < self.count)
+        FIT = {KEY: np.full(self.NUM_DS, np.nan) for KEY in ('THETA', 'BETA', 'MEDIAN', 'NLL')}
+        FIT.update({'SE_THETA': np.full(self.NUM_DS, np.inf), 'SE_BETA': np.full(self.NUM_DS, np.inf),
+                    'CONVERGED': np.zeros(self.NUM_DS, dtype=bool)})
+        if INFORMED.any():
+            DATA = (IM[IM > 0], N_FAILURES[INFORMED][:, IM > 0], N_TOTAL[IM > 0])
+            NEW = None
+            if self.fit is not None and np.all(np.isfinite(self.fit['THETA'][INFORMED])):
+                NEW = FIT_FRAGILITY_MLE(*DATA, THETA0=self.fit['THETA'][INFORMED], BETA0=self.fit['BETA'][INFORMED],
+                                        **self.OPTIONS)
+            if NEW is None or not NEW['CONVERGED'].all():
+                # No or a stalled warm start (e.g. from separated early data): restart those damage states from the grid
+                GRID = FIT_FRAGILITY_MLE(*DATA, **self.OPTIONS)
+                if NEW is not None:
+                    BETTER = ~NEW['CONVERGED'] & (GRID['NLL'] < NEW['NLL'])
+                    GRID = {KEY: np.where(BETTER, GRID[KEY], VALUE) if np.ndim(VALUE) else VALUE
+                            for KEY, VALUE in NEW.items()}
+                NEW = GRID
+            for KEY in FIT:
+                FIT[KEY][INFORMED] = NEW[KEY]
+        FIT['N'] = self.count
+        FIT['SATURATED'] = ~INFORMED & (self.count > 0)
+        FIT['STALE'] = False
+        self.fit = FIT
+        return FIT
+
+# -----------------------------------------------
+
+class CapacityStream:
+    """
+    Online lognormal fragility curves of IDA capacities (censored maximum likelihood, FIT_CAPACITY_MLE).
+
+    A record that never reaches a damage state (capacity inf) is right-censored at its largest IM run, not dropped:
+    the moments of the observed capacities alone would put the median and beta low, and stop a campaign early on
+    a biased beta. The capacities are kept, and every estimate after new records refits all of them.
+
+    Parameters:
+    - NUM_DS (int): Number of damage states.
+    - OPTIONS: Arguments of FIT_CAPACITY_MLE (BETA_BOUNDS, TOLERANCE, ...).
+    """
+    def __init__(self, NUM_DS=1, **OPTIONS):
+        self.NUM_DS = NUM_DS
+        self.OPTIONS = OPTIONS
+        self.capacity = []
+        self.censor_im = []
+        self.records = 0
+        self.fit = None
+
+    def update(self, CAPACITY, CENSOR_IM=np.nan):
+        # CAPACITY (NUM_DS,) of one record, or (n, NUM_DS) of n records, and the IM where it is censored (n,)
+        CAPACITY = np.asarray(CAPACITY, dtype=float).reshape(-1, self.NUM_DS)
+        CENSOR_IM = np.broadcast_to(np.asarray(CENSOR_IM, dtype=float).reshape(-1, 1), CAPACITY.shape)
+        self.capacity.extend(CAPACITY)
+        self.censor_im.extend(CENSOR_IM)
+        self.records += CAPACITY.shape[0]
+        if CAPACITY.size:
+            self.fit = None
+
+    def estimate(self):
+        # Live estimates: 'THETA', 'BETA', 'MEDIAN', 'SE_THETA', 'SE_BETA', 'N' (observed), 'NUM_CENSORED' (NUM_DS,) and 'RECORDS'
+        if self.fit is None:
+            SHAPE = (len(self.capacity), self.NUM_DS)
+            FIT = FIT_CAPACITY_MLE(np.reshape(self.capacity, SHAPE).T, np.reshape(self.censor_im, SHAPE).T, **self.OPTIONS)
+            self.fit = {'THETA': FIT['THETA'], 'BETA': FIT['BETA'], 'MEDIAN': FIT['MEDIAN'], 'SE_THETA': FIT['SE_THETA'],
+                        'SE_BETA': FIT['SE_BETA'], 'N': FIT['NUM_OBSERVED'], 'NUM_CENSORED': FIT['NUM_CENSORED'],
+                        'RECORDS': self.records}
+        return self.fit
+
+# -----------------------------------------------
+
+class FragilityTarget:
+    """
+    Convergence target of MONTE_CARLO_PARALLEL.SEQUENTIAL_MONTE_CARLO on the dispersion of fragility curves.
+
+    Parameters:
+    - NAME (str): Name in the progress report.
+    - STREAM (FragilityStream or CapacityStream): Online estimator fed with the results.
+    - OBSERVATION_FUN (callable): OBSERVATION_FUN(i, RESULT) -> arguments of STREAM.update for realization i.
+    - TOLERANCE (float): Target half-width of beta (times beta if RELATIVE).
+    - RELATIVE (bool): Relative or absolute tolerance.
+    - CONFIDENCE (float): Confidence level of the half-width (z times the standard error of beta).
+
+    A damage state the stream reports as SATURATED has no fragility curve to converge (e.g. it fails at every stripe
+    of an MSA): it is left out of the check, so it cannot hold the campaign to its last record.
+    """
+    def __init__(self, NAME, STREAM, OBSERVATION_FUN, TOLERANCE, RELATIVE=True, CONFIDENCE=0.95):
+        self.NAME = NAME
+        self.stream = STREAM
+        self.OBSERVATION_FUN = OBSERVATION_FUN
+        self.TOLERANCE = TOLERANCE
+        self.RELATIVE = RELATIVE
+        self.z = NormalDist().inv_cdf(0.5 + 0.5 * CONFIDENCE)
+
+    def update(self, OUTPUT):
+        for i, RESULT in OUTPUT:
+            self.stream.update(*self.OBSERVATION_FUN(i, RESULT))
+
+    def half_widths(self):
+        # beta, half-width, limit and the saturated damage states (CapacityStream: none)
+        FIT = self.stream.estimate()
+        HALF_WIDTH = np.where(np.isfinite(FIT['BETA']), self.z * FIT['SE_BETA'], np.inf)
+        LIMIT = self.TOLERANCE * np.abs(FIT['BETA']) if self.RELATIVE else np.full(HALF_WIDTH.shape, self.TOLERANCE)
+        SATURATED = FIT.get('SATURATED', np.zeros(HALF_WIDTH.shape, dtype=bool))
+        return FIT['BETA'], HALF_WIDTH, LIMIT, SATURATED
+
+    def result(self):
+        # beta and half-width of the least converged damage state that is not saturated
+        BETA, HALF_WIDTH, LIMIT, SATURATED = self.half_widths()
+        if SATURATED.all():
+            return np.nan, 0.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            RATIO = np.where(np.isfinite(HALF_WIDTH), HALF_WIDTH / LIMIT, np.inf)
+        K = int(np.argmax(np.where(SATURATED, -np.inf, RATIO)))
+        return BETA[K], HALF_WIDTH[K]
+
+    def converged(self):
+        BETA, HALF_WIDTH, LIMIT, SATURATED = self.half_widths()
+        return bool(np.all((HALF_WIDTH <= LIMIT) | SATURATED))
+
+# -----------------------------------------------
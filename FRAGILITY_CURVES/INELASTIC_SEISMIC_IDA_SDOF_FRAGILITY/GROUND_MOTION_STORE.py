@@ -0,0 +1,260 @@
+"""
+Binary ground-motion store: one memory-mapped array file plus a JSON index.
+
+The generators used to write one text file per record (Ground_Acceleration_{i}.txt, one float per
+line) and every realization parsed its file again with np.loadtxt. The store keeps all records
+back to back in NAME.bin (float64) and their offset, length, time step and metadata in NAME.json:
+
+    {"dtype": "float64", "records": [{"offset": 0, "npts": 999, "dt": 0.01, "meta": {...}}, ...]}
+
+- WRITE_STORE streams records (a list or a generator) into a new store, or appends to an existing one.
+- OPEN_STORE maps the array file read-only; READ_RECORD returns a zero-copy view of record I.
+- RECORD_MATRIX stacks records into a zero-padded (N, NPTS) array for batched engines.
+- EXPORT_TXT and IMPORT_TXT convert from/to the one-float-per-line text files.
+- LOAD_RECORD reads single or multi-column text records and PEER .AT2 files (dt from the header), and keeps
+  the parsed values in a binary sidecar (PATH.<sha1>.npy) keyed by the SHA-1 of the text file.
+
+NUM_RECORDS, READ_RECORD, RECORD_META, RECORD_MATRIX and EXPORT_TXT also accept a lazy source object
+(len(), read_record(I) and record_meta(I), e.g. KANAI_TAJIMI_GENERATOR.KanaiTajimiSource) in place of STORE.
+"""
+import os
+import re
+import glob
+import json
+import hashlib
+import numpy as np
+
+DTYPE = 'float64'
+
+# -----------------------------------------------
+
+def STORE_FILES(PATH):
+    # Array file and index file of the store PATH (given without extension)
+    return PATH + '.bin', PATH + '.json'
+
+# -----------------------------------------------
+
+def _META(META):
+    # JSON friendly metadata (NumPy scalars to Python numbers)
+    return {KEY: (VALUE.item() if isinstance(VALUE, np.generic) else VALUE) for KEY, VALUE in (META or {}).items()}
+
+# -----------------------------------------------
+
+def WRITE_STORE(PATH, RECORDS, DT, META=None, APPEND=False):
+    """
+    Write ground-motion records to the store PATH.
+
+    Parameters:
+    - PATH (str): Store path without extension.
+    - RECORDS (iterable): Acceleration records (1D arrays), may be a generator.
+    - DT (float or list): Time step of every record.
+    - META (list of dict): Optional metadata of every record (e.g. generator parameters).
+    - APPEND (bool): Append to an existing store instead of overwriting it.
+
+    Returns:
+    - NUM (int): Number of records in the store.
+    """
+    BIN_FILE, INDEX_FILE = STORE_FILES(PATH)
+    INDEX = {'dtype': DTYPE, 'records': []}
+    if APPEND and os.path.exists(INDEX_FILE):
+        with open(INDEX_FILE) as file:
+            INDEX = json.load(file)
+    OFFSET = sum(REC['npts'] for REC in INDEX['records'])
+    with open(BIN_FILE, 'ab' if APPEND else 'wb') as file:
+        for K, RECORD in enumerate(RECORDS):
+            RECORD = np.ascontiguousarray(RECORD, dtype=DTYPE)
+            file.write(RECORD.tobytes())
+            INDEX['records'].append({'offset': OFFSET, 'npts': int(RECORD.size),
+                                     'dt': float(DT if np.isscalar(DT) else DT[K]),
+                                     'meta': _META(META[K]) if META is not None else {}})
+            OFFSET += RECORD.size
+    with open(INDEX_FILE, 'w') as file:
+        json.dump(INDEX, file)
+    return len(INDEX['records'])
+
+# -----------------------------------------------
+
+def OPEN_STORE(PATH, TXT_FILES=None, DT=None):
+    """
+    Open the store PATH (memory map of the array file and its index).
+    If the store does not exist yet and TXT_FILES is given, the text records are imported once.
+
+    Returns:
+    - STORE (dict): 'DATA' (np.memmap), 'RECORDS' (list of index entries) and 'PATH'.
+    """
+    BIN_FILE, INDEX_FILE = STORE_FILES(PATH)
+    if not os.path.exists(INDEX_FILE) and TXT_FILES is not None:
+        IMPORT_TXT(PATH, TXT_FILES, DT)
+    with open(INDEX_FILE) as file:
+        INDEX = json.load(file)
+    NUM_VALUES = sum(REC['npts'] for REC in INDEX['records'])
+    DATA = np.memmap(BIN_FILE, dtype=INDEX['dtype'], mode='r', shape=(NUM_VALUES,)) if NUM_VALUES > 0 else np.zeros(0)
+    return {'DATA': DATA, 'RECORDS': INDEX['records'], 'PATH': PATH}
+
+# -----------------------------------------------
+
+def _IS_SOURCE(STORE):
+    # Lazy sources generate their records instead of reading them from a store
+    return hasattr(STORE, 'read_record')
+
+# -----------------------------------------------
+
+def NUM_RECORDS(STORE):
+    if _IS_SOURCE(STORE):
+        return len(STORE)
+    return len(STORE['RECORDS'])
+
+# -----------------------------------------------
+
+def READ_RECORD(STORE, I):
+    """
+    Zero-copy view of record I.
+
+    Returns:
+    - RECORD (np.array): Read-only acceleration values.
+    - DT (float): Time step of the record.
+    """
+    if _IS_SOURCE(STORE):
+        return STORE.read_record(I)
+    REC = STORE['RECORDS'][I]
+    return STORE['DATA'][REC['offset']:REC['offset'] + REC['npts']], REC['dt']
+
+# -----------------------------------------------
+
+def RECORD_META(STORE, I):
+    if _IS_SOURCE(STORE):
+        return STORE.record_meta(I)
+    return STORE['RECORDS'][I]['meta']
+
+# -----------------------------------------------
+
+def RECORD_MATRIX(STORE, INDICES=None):
+    # Records stacked row by row, zero-padded to the longest one
+    if INDICES is None:
+        INDICES = range(NUM_RECORDS(STORE))
+    INDICES = list(INDICES)
+    if _IS_SOURCE(STORE):
+        RECORDS = [READ_RECORD(STORE, I)[0] for I in INDICES]
+        NPTS = max(RECORD.size for RECORD in RECORDS)
+    else:
+        NPTS = max(STORE['RECORDS'][I]['npts'] for I in INDICES)
+    MATRIX = np.zeros((len(INDICES), NPTS))
+    for K, I in enumerate(INDICES):
+        RECORD = RECORDS[K] if _IS_SOURCE(STORE) else READ_RECORD(STORE, I)[0]
+        MATRIX[K, :RECORD.size] = RECORD
+    return MATRIX
+
+# -----------------------------------------------
+
+def EXPORT_TXT(STORE, NAME='Ground_Acceleration_{}.txt', INDICES=None, FMT='%.6f'):
+    # Write records as one-float-per-line text files (NAME is formatted with I+1)
+    if INDICES is None:
+        INDICES = range(NUM_RECORDS(STORE))
+    for I in INDICES:
+        RECORD, _ = READ_RECORD(STORE, I)
+        np.savetxt(NAME.format(I + 1), RECORD, fmt=FMT)
+
+# -----------------------------------------------
+
+def IMPORT_TXT(PATH, TXT_FILES, DT, APPEND=False):
+    # Build a store from text records (parsed once)
+    return WRITE_STORE(PATH, (LOAD_RECORD(FILE, CACHE=False)[0] for FILE in TXT_FILES), DT,
+                       META=[{'SOURCE': os.path.basename(FILE)} for FILE in TXT_FILES], APPEND=APPEND)
+
+# -----------------------------------------------
+
+_HEADER_NPTS_DT = re.compile(r'NPTS\s*=\s*(\d+)\s*,?\s*DT\s*=\s*([-+]?[\d.]+(?:[EeDd][-+]?\d+)?)', re.IGNORECASE)
+_LOADED = {}  # Parsed records of this process: {(path, mtime, size): (values, dt)}
+
+# -----------------------------------------------
+
+def FILE_HASH(PATH):
+    # SHA-1 of the file bytes (key of the binary sidecar)
+    with open(PATH, 'rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+# -----------------------------------------------
+
+def _IS_NUMERIC(LINE):
+    try:
+        [float(TOKEN) for TOKEN in LINE.replace('D', 'E').replace('d', 'e').replace(',', ' ').split()]
+        return True
+    except ValueError:
+        return False
+
+# -----------------------------------------------
+
+def PARSE_RECORD(TEXT):
+    """
+    Parse a ground-motion text file.
+
+    Handles one value per line (Ground_Acceleration_1.txt, Northridge_EQ.acc), several values per row
+    (BM68elc.acc, 5 per row) and PEER files with a text header (NGA .AT2: 'NPTS=  5590, DT=   .0050 SEC',
+    older PEER: '5590   0.0050   NPTS, DT'). Rows are flattened in reading order.
+
+    Returns:
+    - VALUES (np.array): Record values.
+    - DT (float): Time step from the header (None if the file has no header).
+    """
+    LINES = TEXT.splitlines()
+    # Header: every line up to the last non-numeric line among the first ones
+    START = 0
+    for K, LINE in enumerate(LINES[:10]):
+        if LINE.strip() and not _IS_NUMERIC(LINE):
+            START = K + 1
+    HEADER = '\n'.join(LINES[:START])
+    NPTS, DT = None, None
+    MATCH = _HEADER_NPTS_DT.search(HEADER)
+    if MATCH:
+        NPTS, DT = int(MATCH.group(1)), float(MATCH.group(2).replace('D', 'E').replace('d', 'e'))
+    elif START > 0:
+        # Old PEER format: the numbers before 'NPTS, DT' on the last header line
+        TOKENS = LINES[START - 1].replace(',', ' ').split()
+        NUMBERS = [TOKEN for TOKEN in TOKENS if _IS_NUMERIC(TOKEN)]
+        if 'NPTS' in LINES[START - 1].upper() and len(NUMBERS) >= 2:
+            NPTS, DT = int(float(NUMBERS[0])), float(NUMBERS[1])
+    BODY = ' '.join(LINES[START:]).replace('D', 'E').replace('d', 'e').replace(',', ' ')
+    VALUES = np.array(BODY.split(), dtype=float)
+    if NPTS is not None:
+        VALUES = VALUES[:NPTS]
+    return VALUES, DT
+
+# -----------------------------------------------
+
+def LOAD_RECORD(PATH, DT=None, CACHE=True):
+    """
+    Load a ground-motion text file, parsing the text only once.
+
+    The parsed values are kept in a binary sidecar PATH.<sha1>.npy ([dt, values...], dt = nan if unknown)
+    named after the SHA-1 of the text file, so a changed text file is parsed again. Within one process the record is also kept in memory,
+    so repeated loads (e.g. at every IDA level or spectrum period) cost a dictionary lookup.
+
+    Parameters:
+    - PATH (str): Text file (.txt, .acc, .AT2).
+    - DT (float): Time step to use when the file has no header.
+    - CACHE (bool): Read/write the binary sidecar.
+
+    Returns:
+    - VALUES (np.array): Read-only record values.
+    - DT (float): Time step (from the header if present, otherwise DT).
+    """
+    STAT = os.stat(PATH)
+    KEY = (os.path.abspath(PATH), STAT.st_mtime_ns, STAT.st_size)
+    if KEY not in _LOADED:
+        SIDECAR = f'{PATH}.{FILE_HASH(PATH)[:16]}.npy'
+        if CACHE and os.path.exists(SIDECAR):
+            DATA = np.load(SIDECAR)
+            VALUES, HEADER_DT = DATA[1:], (None if np.isnan(DATA[0]) else float(DATA[0]))
+        else:
+            with open(PATH, errors='replace') as file:
+                VALUES, HEADER_DT = PARSE_RECORD(file.read())
+            if CACHE:
+                for OLD in glob.glob(glob.escape(PATH) + '.*.npy'):  # Sidecars of earlier versions of the file
+                    os.remove(OLD)
+                np.save(SIDECAR, np.concatenate([[np.nan if HEADER_DT is None else HEADER_DT], VALUES]))
+        VALUES.setflags(write=False)
+        _LOADED[KEY] = (VALUES, HEADER_DT)
+    VALUES, HEADER_DT = _LOADED[KEY]
+    return VALUES, (HEADER_DT if HEADER_DT is not None else DT)
+
+# -----------------------------------------------
@@ -0,0 +1,644 @@
+"""
+Parallel incremental dynamic analysis (IDA) over (record, scale level) pairs.
+
+INELASTIC_SEISMIC_IDA_SDOF_FRAGILITY.py ran its J_MAX scale levels one after the other, and every level read the
+record again. PARALLEL_IDA lists every (record, scale level) pair of the IDA, record by record, and hands
+contiguous blocks of pairs to the workers of MONTE_CARLO_PARALLEL.PARALLEL_MONTE_CARLO, so a worker runs one
+record at many scale levels:
+- WORKER_RECORD reads record I of a store once per process and keeps a private copy in memory; all later scale
+  levels of that record in the same process reuse it.
+- ANALYSIS_FUN(RECORD, J) is a module-level function of the driver that runs one analysis in the worker and
+  returns a dict of reduced EDPs (e.g. ResponseStream.result()), so only a few numbers travel back.
+- IDA_TABLE turns the results into a tidy table: one row per (record, scale level) with the scale factor, the
+  intensity measures of the scaled record and the EDP columns.
+
+Evenly spaced levels spend most runs in the elastic range and keep running past collapse. HUNT_AND_FILL traces
+the IDA curve of one record adaptively (hunt-and-fill of Vamvatsikos & Cornell, 2004):
+- Hunt up: the scale factor grows with a geometrically growing step until the run collapses (ANALYSIS_FUN
+  returns 'COLLAPSE': True for non-convergence or a demand past the collapse threshold) or MAX_SCALE is reached.
+- Bracket: the gap between the last non-collapsing and the first collapsing scale is bisected until it is
+  narrower than RESOLUTION times the scale, which locates the flatline (collapse capacity).
+- Fill: the remaining runs go to the midpoints of the widest gaps between the non-collapsing scales.
+PARALLEL_HUNT_AND_FILL runs one record per task on the worker pool and returns the same tidy table, with the run
+order in 'STEP' and the 'COLLAPSE' flag of every run; COLLAPSE_CAPACITY gives the flatline scale of every record.
+
+For a record suite the table is summarised without Python loops over records:
+- IDA_CUBE         -> record x level x EDP cube of a table (levels sorted by IM, NaN-padded) and collapse flags
+- CUBE_CAPACITY    -> collapse capacity (last IM of the curve before the first collapse, inf without collapse)
+- INTERPOLATE_CURVES -> EDP of every record on a common IM grid, by batched linear interpolation along the
+                        curves (from the origin, inf past the collapse capacity, NaN past a non-collapsing curve)
+- FRACTILE_CURVES  -> 16/50/84% fractile IDA curves of the interpolated curves
+- CUBE_CENSOR_IM   -> IM where every capacity is censored (largest IM run without collapse)
+- CAPACITY_STATISTICS -> empirical fractiles and censored-MLE lognormal median and dispersion of the capacities
+
+Below the first yield the response of an SDOF is proportional to the scale factor, so the low levels of an IDA
+need no nonlinear analysis: LINEAR_RANGE_RESULT runs one elastic reference analysis of a record (once per process)
+and scales its traces to every level whose peak force stays below the first branch of the envelope.
+
+A multiple-stripe analysis (MSA) runs every record at a few chosen IM values instead of tracing whole curves:
+- STRIPE_SCALES -> scale factor that brings every record to every stripe (inverse of SCALED_IM)
+- PARALLEL_MSA  -> all (record, stripe) runs on the worker pool, as a tidy table with the target IM in 'STRIPE'
+- MSA_COUNTS    -> analyses and exceedances of every damage state at every stripe (collapsed runs exceed all of
+                   them), the input of FRAGILITY_FIT.FIT_FRAGILITY_MLE
+
+A campaign does not have to run every record: SEQUENTIAL_MSA and SEQUENTIAL_HUNT_AND_FILL run the records in
+batches through MONTE_CARLO_PARALLEL.SEQUENTIAL_MONTE_CARLO, feed every finished record to an online fragility
+estimator (FRAGILITY_FIT.FragilityStream for the stripe exceedances, FRAGILITY_FIT.CapacityStream for the IDA
+capacities of RECORD_CAPACITY) and stop once beta of every damage state is known to TOLERANCE.
+"""
+import os
+import numpy as np
+import pandas as pd
+import GROUND_MOTION_STORE as S07
+import MONTE_CARLO_PARALLEL as S04
+import FRAGILITY_FIT as S14
+
+_RECORDS = {}  # Records read by this process: {(STORE, I): (VALUES, DT)}
+_IDA = {}      # Analysis function and cases of the running IDA (copied into the workers)
+_LINEAR = {}   # Elastic reference runs of this process: {RECORD: (REFERENCE_SCALE, TRACE)}
+
+# -----------------------------------------------
+
+def WORKER_RECORD(STORE, I):
+    # Record I of STORE (or of a lazy source), read once per process and kept in memory
+    KEY = (STORE['PATH'] if isinstance(STORE, dict) else id(STORE), int(I))
+    if KEY not in _RECORDS:
+        VALUES, DT = S07.READ_RECORD(STORE, I)
+        _RECORDS[KEY] = (np.array(VALUES), DT)
+    return _RECORDS[KEY]
+
+# -----------------------------------------------
+
+def LINEAR_RANGE_RESULT(RECORD, SCALE, REFERENCE_FUN, SCALE_FUN, PEAK_KEY, LIMIT):
+    """
+    Result of an IDA run in the linear range, scaled from the elastic reference run of the record.
+
+    Parameters:
+    - RECORD (int): Record index.
+    - SCALE (float): Scale factor of the run.
+    - REFERENCE_FUN (callable): REFERENCE_FUN(RECORD) -> (REFERENCE_SCALE, TRACE), one run with full traces;
+      called once per record and process.
+    - SCALE_FUN (callable): SCALE_FUN(RECORD, TRACE, FACTOR) -> reduced EDPs of the traces scaled by FACTOR.
+    - PEAK_KEY (str): Trace channel that decides the linear range (e.g. 'BASE').
+    - LIMIT (float): First yield of that channel (e.g. the first branch of the Hysteretic envelope).
+
+    Returns:
+    - RESULT (dict): Reduced EDPs, or None when the run leaves the linear range (the full analysis is needed).
+    """
+    if RECORD not in _LINEAR:
+        _LINEAR[RECORD] = REFERENCE_FUN(RECORD)
+    REFERENCE_SCALE, TRACE = _LINEAR[RECORD]
+    FACTOR = SCALE / REFERENCE_SCALE
+    if np.max(np.abs(TRACE[PEAK_KEY])) * max(FACTOR, 1.0) >= LIMIT:
+        return None  # The reference run or the scaled run reaches the first yield
+    return SCALE_FUN(RECORD, TRACE, FACTOR)
+
+# -----------------------------------------------
+
+def IDA_CASES(RECORDS, NUM_LEVELS):
+    # (record, scale level) pairs of the IDA, record by record
+    return [(int(I), J) for I in RECORDS for J in range(NUM_LEVELS)]
+
+# -----------------------------------------------
+
+def _IDA_CASE(i):
+    RECORD, J = _IDA['CASES'][i]
+    return _IDA['ANALYSIS_FUN'](RECORD, J)
+
+# -----------------------------------------------
+
+def _IM_POWER(NAME):
+    # Power of the scale factor in an intensity measure (Arias intensity grows with the square, D5-95 does not change)
+    return 2 if NAME == 'ARIAS' else (0 if NAME == 'D5_95' else 1)
+
+# -----------------------------------------------
+
+def SCALED_IM(VALUE, NAME, SCALE):
+    # Intensity measure of a record scaled by SCALE
+    return VALUE * np.asarray(SCALE) ** _IM_POWER(NAME)
+
+# -----------------------------------------------
+
+def IDA_TABLE(CASES, RESULTS, SCALES, IM=None, RECORDS=None):
+    """
+    Tidy IM-EDP table of an IDA.
+
+    Parameters:
+    - CASES (list): (record, scale level) pairs of IDA_CASES, or (record, run, scale factor) triples.
+    - RESULTS (list of dict): Reduced EDPs of every case.
+    - SCALES (array): Scale factor of every level (None when CASES carry their scale factors).
+    - IM (dict): Optional intensity measures of the unscaled records, {NAME: array over RECORDS}
+      (e.g. INTENSITY_MEASURES.STORE_INTENSITY_MEASURES); written as scaled 'IM_<NAME>' columns.
+    - RECORDS (list): Records the IM arrays are ordered by (default: records of CASES in order of appearance).
+
+    Returns:
+    - TABLE (pd.DataFrame): 'RECORD', 'STEP', 'SCALE', 'IM_*' and one column per EDP.
+    """
+    TABLE = pd.DataFrame({'RECORD': [CASE[0] for CASE in CASES], 'STEP': [CASE[1] for CASE in CASES]})
+    if SCALES is None:
+        TABLE['SCALE'] = np.array([CASE[2] for CASE in CASES], dtype=float)
+    else:
+        TABLE['SCALE'] = np.asarray(SCALES, dtype=float)[TABLE['STEP'].to_numpy()]
+    if IM is not None:
+        if RECORDS is None:
+            RECORDS = list(dict.fromkeys(TABLE['RECORD']))
+        POSITION = TABLE['RECORD'].map({int(I): K for K, I in enumerate(RECORDS)}).to_numpy()
+        for NAME, VALUE in IM.items():
+            TABLE[f'IM_{NAME}'] = SCALED_IM(np.asarray(VALUE)[POSITION], NAME, TABLE['SCALE'].to_numpy())
+    return pd.concat([TABLE, pd.DataFrame(list(RESULTS))], axis=1)
+
+# -----------------------------------------------
+
+def PARALLEL_IDA(ANALYSIS_FUN, SCALES, RECORDS=(0,), IM=None, MAX_WORKERS=None, CHUNKSIZE=None, PRINT_EVERY=None,
+                 JOURNAL=None):
+    """
+    Run the IDA of RECORDS at every scale level on a pool of worker processes.
+
+    Parameters:
+    - ANALYSIS_FUN (callable): Module-level function ANALYSIS_FUN(RECORD, J) returning a dict of reduced EDPs.
+    - SCALES (array): Scale factor of every level J (only written to the table).
+    - RECORDS (list): Record indices of the store.
+    - IM (dict): Optional intensity measures of the unscaled records (see IDA_TABLE).
+    - MAX_WORKERS (int): Worker processes (default: all cores; 1 runs serially).
+    - CHUNKSIZE (int): Pairs per task (default: about 4 tasks per worker, blocks of neighbouring levels).
+    - PRINT_EVERY (int): Progress report interval in analyses (default: about 10 reports).
+    - JOURNAL (str): Optional journal directory, completed pairs found there are not run again.
+
+    Returns:
+    - TABLE (pd.DataFrame): Tidy IM-EDP table (IDA_TABLE), one row per (record, scale level).
+    - THROUGHPUT (float): Analyses per second.
+    """
+    global _IDA
+    CASES = IDA_CASES(RECORDS, len(SCALES))
+    _IDA = {'ANALYSIS_FUN': ANALYSIS_FUN, 'CASES': CASES}
+    if MAX_WORKERS is None:
+        MAX_WORKERS = os.cpu_count() or 1
+    if PRINT_EVERY is None:
+        PRINT_EVERY = max(1, len(CASES) // 10)
+    RESULTS, THROUGHPUT = S04.PARALLEL_MONTE_CARLO(_IDA_CASE, len(CASES), SEED=0, MAX_WORKERS=MAX_WORKERS,
+                                                   CHUNKSIZE=CHUNKSIZE, SHARED={'_IDA': _IDA}, WIPE=False,
+                                                   PRINT_EVERY=PRINT_EVERY, JOURNAL=JOURNAL)
+    return IDA_TABLE(CASES, RESULTS, SCALES, IM, list(RECORDS)), THROUGHPUT
+
+# -----------------------------------------------
+
+def HUNT_AND_FILL(ANALYSIS_FUN, RECORD, FIRST_SCALE, FIRST_STEP=None, GROWTH=1.5, MAX_RUNS=16, MAX_SCALE=None,
+                  RESOLUTION=0.05):
+    """
+    Adaptive IDA of one record with the hunt-and-fill algorithm.
+
+    Parameters:
+    - ANALYSIS_FUN (callable): ANALYSIS_FUN(RECORD, SCALE) returning a dict of reduced EDPs with a 'COLLAPSE' flag.
+    - RECORD (int): Record index.
+    - FIRST_SCALE (float): Scale factor of the first run.
+    - FIRST_STEP (float): First increment of the hunt-up phase (default: FIRST_SCALE).
+    - GROWTH (float): Growth factor of the increment after every non-collapsing run.
+    - MAX_RUNS (int): Run budget of the record.
+    - MAX_SCALE (float): Largest scale factor of the hunt-up phase (None: no limit).
+    - RESOLUTION (float): Relative width of the collapse bracket that ends the bisection.
+
+    Returns:
+    - RUNS (list): (SCALE, RESULT) of every run, in run order.
+    """
+    RUNS = []
+
+    def RUN(SCALE):
+        RESULT = ANALYSIS_FUN(RECORD, SCALE)
+        RUNS.append((SCALE, RESULT))
+        return bool(RESULT['COLLAPSE'])
+
+    # Hunt up
+    STEP = FIRST_SCALE if FIRST_STEP is None else FIRST_STEP
+    SCALE = FIRST_SCALE
+    LOWER, UPPER = 0.0, None  # Largest non-collapsing and smallest collapsing scale
+    while len(RUNS) < MAX_RUNS:
+        if RUN(SCALE):
+            UPPER = SCALE
+            break
+        LOWER = SCALE
+        if MAX_SCALE is not None and SCALE >= MAX_SCALE:
+            break
+        SCALE = SCALE + STEP
+        if MAX_SCALE is not None:
+            SCALE = min(SCALE, MAX_SCALE)
+        STEP *= GROWTH
+
+    # Bracket the flatline
+    while UPPER is not None and len(RUNS) < MAX_RUNS and UPPER - LOWER > RESOLUTION * UPPER:
+        SCALE = 0.5 * (LOWER + UPPER)
+        if RUN(SCALE):
+            UPPER = SCALE
+        else:
+            LOWER = SCALE
+
+    # Fill the widest gaps below the flatline
+    while len(RUNS) < MAX_RUNS:
+        SAFE = np.sort([0.0] + [S for S, R in RUNS if not R['COLLAPSE'] and S <= LOWER])
+        if SAFE.size < 2:
+            break
+        K = int(np.argmax(np.diff(SAFE)))
+        RUN(float(0.5 * (SAFE[K] + SAFE[K + 1])))
+    return RUNS
+
+# -----------------------------------------------
+
+def _HUNT_AND_FILL_RECORD(i):
+    return HUNT_AND_FILL(_IDA['ANALYSIS_FUN'], _IDA['RECORDS'][i], **_IDA['OPTIONS'])
+
+# -----------------------------------------------
+
+def PARALLEL_HUNT_AND_FILL(ANALYSIS_FUN, RECORDS=(0,), IM=None, MAX_WORKERS=None, PRINT_EVERY=None, **OPTIONS):
+    """
+    Hunt-and-fill IDA of every record on a pool of worker processes (one record per task).
+
+    Parameters:
+    - ANALYSIS_FUN (callable): Module-level function ANALYSIS_FUN(RECORD, SCALE) returning reduced EDPs and 'COLLAPSE'.
+    - RECORDS (list): Record indices of the store.
+    - IM (dict): Optional intensity measures of the unscaled records (see IDA_TABLE).
+    - MAX_WORKERS (int): Worker processes (default: all cores; 1 runs serially).
+    - PRINT_EVERY (int): Progress report interval in records.
+    - OPTIONS: FIRST_SCALE, FIRST_STEP, GROWTH, MAX_RUNS, MAX_SCALE and RESOLUTION of HUNT_AND_FILL.
+
+    Returns:
+    - TABLE (pd.DataFrame): Tidy IM-EDP table, one row per run, sorted by record and scale factor.
+    - THROUGHPUT (float): Records per second.
+    """
+    global _IDA
+    RECORDS = [int(I) for I in RECORDS]
+    _IDA = {'ANALYSIS_FUN': ANALYSIS_FUN, 'RECORDS': RECORDS, 'OPTIONS': OPTIONS}
+    if MAX_WORKERS is None:
+        MAX_WORKERS = os.cpu_count() or 1
+    if PRINT_EVERY is None:
+        PRINT_EVERY = max(1, len(RECORDS) // 10)
+    OUTPUT, THROUGHPUT = S04.PARALLEL_MONTE_CARLO(_HUNT_AND_FILL_RECORD, len(RECORDS), SEED=0, MAX_WORKERS=MAX_WORKERS,
+                                                  CHUNKSIZE=1, SHARED={'_IDA': _IDA}, WIPE=False, PRINT_EVERY=PRINT_EVERY)
+    return _HUNT_AND_FILL_TABLE(RECORDS, OUTPUT, IM), THROUGHPUT
+
+# -----------------------------------------------
+
+def _HUNT_AND_FILL_TABLE(RECORDS, OUTPUT, IM=None):
+    # Tidy table of the runs of HUNT_AND_FILL of every record, sorted by record and scale factor
+    CASES, RESULTS = [], []
+    for I, RUNS in zip(RECORDS, OUTPUT):
+        for K, (SCALE, RESULT) in enumerate(RUNS):
+            CASES.append((I, K, SCALE))
+            RESULTS.append(RESULT)
+    TABLE = IDA_TABLE(CASES, RESULTS, None, IM, RECORDS)
+    return TABLE.sort_values(['RECORD', 'SCALE'], kind='stable').reset_index(drop=True)
+
+# -----------------------------------------------
+
+def COLLAPSE_CAPACITY(TABLE, IM='SCALE'):
+    # Flatline IM of every record: largest non-collapsing IM below its first collapse (inf without collapse)
+    CUBE = IDA_CUBE(TABLE, [], IM)
+    return pd.Series(CUBE_CAPACITY(CUBE), index=CUBE['RECORDS'], name=f'COLLAPSE_{IM}')
+
+# -----------------------------------------------
+
+def IDA_CUBE(TABLE, EDPS, IM='SCALE'):
+    """
+    Record x level x EDP cube of a tidy IDA table.
+
+    Parameters:
+    - TABLE (pd.DataFrame): IDA table of PARALLEL_IDA or PARALLEL_HUNT_AND_FILL.
+    - EDPS (list): EDP columns of the cube (e.g. ['MAX_ABS_DISP', 'MAX_ABS_DI']).
+    - IM (str): Intensity measure column the levels are sorted by ('SCALE', 'IM_PGA', ...).
+
+    Returns:
+    - CUBE (dict): 'RECORDS' (NR,), 'IM' (NR, NL), 'EDP' (NR, NL, NE), 'COLLAPSE' (NR, NL) and 'EDPS';
+      records with fewer levels are padded with NaN (IM, EDP) and False (COLLAPSE).
+    """
+    EDPS = list(EDPS)
+    T = TABLE.sort_values(['RECORD', IM], kind='stable')
+    RECORDS, ROW = np.unique(T['RECORD'].to_numpy(), return_inverse=True)
+    LEVEL = T.groupby('RECORD', sort=False).cumcount().to_numpy()
+    SHAPE = (RECORDS.size, int(LEVEL.max()) + 1 if LEVEL.size else 0)
+    IM_CUBE = np.full(SHAPE, np.nan)
+    IM_CUBE[ROW, LEVEL] = T[IM].to_numpy(dtype=float)
+    EDP = np.full(SHAPE + (len(EDPS),), np.nan)
+    EDP[ROW, LEVEL] = T[EDPS].to_numpy(dtype=float)
+    COLLAPSE = np.zeros(SHAPE, dtype=bool)
+    if 'COLLAPSE' in T:
+        COLLAPSE[ROW, LEVEL] = T['COLLAPSE'].to_numpy(dtype=bool)
+    return {'RECORDS': RECORDS, 'IM': IM_CUBE, 'EDP': EDP, 'COLLAPSE': COLLAPSE, 'EDPS': np.array(EDPS)}
+
+# -----------------------------------------------
+
+def _CURVE_POINTS(CUBE):
+    # Valid points of every curve: levels below the first collapse; they form a prefix of the sorted levels
+    FIRST = np.min(np.where(CUBE['COLLAPSE'], CUBE['IM'], np.inf), axis=1)
+    VALID = ~CUBE['COLLAPSE'] & (CUBE['IM'] < FIRST[:, None])
+    return VALID, FIRST
+
+# -----------------------------------------------
+
+def CUBE_CAPACITY(CUBE):
+    # Collapse capacity of every record: last IM before the first collapse (0 if the first run collapsed, inf without collapse)
+    VALID, FIRST = _CURVE_POINTS(CUBE)
+    LAST = np.max(np.where(VALID, CUBE['IM'], 0.0), axis=1)
+    return np.where(np.isfinite(FIRST), LAST, np.inf)
+
+# -----------------------------------------------
+
+def CUBE_CENSOR_IM(CUBE):
+    # IM where the capacity of every record is censored: largest IM run without collapse, first collapse IM otherwise
+    VALID, FIRST = _CURVE_POINTS(CUBE)
+    LARGEST = np.max(np.where(np.isfinite(CUBE['IM']), CUBE['IM'], 0.0), axis=1)
+    return np.where(np.isfinite(FIRST), FIRST, LARGEST)
+
+# -----------------------------------------------
+
+def INTERPOLATE_CURVES(CUBE, IM_GRID, EDP=0):
+    """
+    EDP of every IDA curve on a common IM grid (batched linear interpolation, no loop over records).
+
+    Parameters:
+    - CUBE (dict): IDA_CUBE.
+    - IM_GRID (array): Intensity levels (>= 0).
+    - EDP (int or str): EDP of the cube (index or name).
+
+    Returns:
+    - CURVES (np.array): (NR, NG) EDP values; inf past the collapse capacity of a collapsing record,
+      NaN past the last run of a record without collapse.
+    """
+    if isinstance(EDP, str):
+        EDP = int(np.flatnonzero(CUBE['EDPS'] == EDP)[0])
+    IM_GRID = np.asarray(IM_GRID, dtype=float)
+    VALID, FIRST = _CURVE_POINTS(CUBE)
+    NR = VALID.shape[0]
+    # Curves start at the origin; invalid levels are pushed to +inf, so every row stays sorted
+    X = np.column_stack([np.zeros(NR), np.where(VALID, CUBE['IM'], np.inf)])
+    Y = np.column_stack([np.zeros(NR), np.where(VALID, CUBE['EDP'][:, :, EDP], np.nan)])
+    COUNT = 1 + VALID.sum(axis=1)
+    RIGHT = np.sum(X[:, :, None] <= IM_GRID[None, None, :], axis=1)  # first point to the right of every level
+    INSIDE = RIGHT < COUNT[:, None]
+    R = np.minimum(RIGHT, COUNT[:, None] - 1)
+    L = np.maximum(R - 1, 0)
+    X0, X1 = np.take_along_axis(X, L, axis=1), np.take_along_axis(X, R, axis=1)
+    Y0, Y1 = np.take_along_axis(Y, L, axis=1), np.take_along_axis(Y, R, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        W = np.where(X1 > X0, (IM_GRID[None, :] - X0) / (X1 - X0), 1.0)
+    CURVES = np.where(INSIDE, Y0 + W * (Y1 - Y0), np.nan)
+    LAST_X = np.take_along_axis(X, (COUNT - 1)[:, None], axis=1)
+    LAST_Y = np.take_along_axis(Y, (COUNT - 1)[:, None], axis=1)
+    CURVES = np.where(~INSIDE & (IM_GRID[None, :] == LAST_X), LAST_Y, CURVES)
+    return np.where(~INSIDE & (IM_GRID[None, :] > LAST_X) & np.isfinite(FIRST)[:, None], np.inf, CURVES)
+
+# -----------------------------------------------
+
+def FRACTILE_CURVES(CURVES, Q=(0.16, 0.50, 0.84)):
+    # Fractiles of the interpolated curves at every IM level (collapsed records count as inf, NaN records are left out)
+    with np.errstate(invalid='ignore'):
+        return np.nanquantile(CURVES, Q, axis=0, method='inverted_cdf')
+
+# -----------------------------------------------
+
+def CAPACITY_STATISTICS(CAPACITY, Q=(0.16, 0.50, 0.84), CENSOR_IM=None):
+    """
+    Distribution of the collapse capacities of a record suite.
+
+    The records without collapse are right-censored at their largest IM run, not dropped: the lognormal median and
+    dispersion are the censored maximum-likelihood fit (FRAGILITY_FIT.FIT_CAPACITY_MLE). Without CENSOR_IM they are
+    only fitted when every record collapsed; otherwise use the empirical fractiles (or
+    RISK_INTEGRATION.CAPACITY_FRAGILITY) instead.
+
+    Parameters:
+    - CAPACITY (np.array): Collapse capacities of the records (CUBE_CAPACITY).
+    - Q (tuple): Probabilities of the empirical fractiles.
+    - CENSOR_IM (np.array): Censoring IM of every record (CUBE_CENSOR_IM).
+
+    Returns:
+    - STATS (dict): 'FRACTILES' (empirical, non-collapsing records count as inf), lognormal 'MEDIAN' and 'BETA'
+      with their standard errors 'SE_THETA' (of ln MEDIAN) and 'SE_BETA' (NaN when not identified, MEDIAN inf
+      without collapse), 'NUM_COLLAPSED', 'NUM_CENSORED' and 'NUM_RECORDS'.
+    """
+    CAPACITY = np.asarray(CAPACITY, dtype=float)
+    NUM_COLLAPSED = int(np.isfinite(CAPACITY).sum())
+    NUM_CENSORED = CAPACITY.size - int(np.sum(np.isfinite(CAPACITY) & (CAPACITY > 0)))
+    FIT = {'MEDIAN': np.inf if NUM_COLLAPSED == 0 else np.nan, 'BETA': np.nan, 'SE_THETA': np.nan, 'SE_BETA': np.nan}
+    if NUM_COLLAPSED and (CENSOR_IM is not None or NUM_CENSORED == 0):
+        MLE = S14.FIT_CAPACITY_MLE(CAPACITY, CENSOR_IM)
+        FIT = {KEY: float(MLE[KEY]) for KEY in FIT}
+    return {'FRACTILES': np.quantile(CAPACITY, Q, method='inverted_cdf'), **FIT,
+            'NUM_COLLAPSED': NUM_COLLAPSED, 'NUM_CENSORED': NUM_CENSORED, 'NUM_RECORDS': CAPACITY.size}
+
+# -----------------------------------------------
+
+def STRIPE_SCALES(VALUE, NAME, STRIPES):
+    # Scale factors (records, stripes) that bring the unscaled IM VALUE of every record to every stripe
+    POWER = _IM_POWER(NAME)
+    if POWER == 0:
+        raise ValueError(f'{NAME} does not change with the scale factor and cannot define MSA stripes')
+    return (np.asarray(STRIPES, dtype=float)[None, :] / np.asarray(VALUE, dtype=float)[:, None]) ** (1.0 / POWER)
+
+# -----------------------------------------------
+
+def _MSA_CASE(i):
+    RECORD, _, SCALE = _IDA['CASES'][i]
+    return _IDA['ANALYSIS_FUN'](RECORD, SCALE)
+
+# -----------------------------------------------
+
+def PARALLEL_MSA(ANALYSIS_FUN, STRIPES, IM, IM_NAME='PGA', RECORDS=(0,), MAX_WORKERS=None, CHUNKSIZE=None,
+                 PRINT_EVERY=None, JOURNAL=None):
+    """
+    Multiple-stripe analysis: every record scaled to every IM stripe, on a pool of worker processes.
+
+    Parameters:
+    - ANALYSIS_FUN (callable): Module-level function ANALYSIS_FUN(RECORD, SCALE) returning a dict of reduced EDPs
+      (and 'COLLAPSE', as for PARALLEL_HUNT_AND_FILL).
+    - STRIPES (array): Target values of the intensity measure IM_NAME (in the units of the scaled records).
+    - IM (dict): Intensity measures of the unscaled records, {NAME: array over RECORDS}; must contain IM_NAME.
+    - IM_NAME (str): Intensity measure of the stripes ('PGA', 'PGV', 'SA_...', 'ARIAS', ...).
+    - RECORDS (list): Record indices of the store.
+    - MAX_WORKERS, CHUNKSIZE, PRINT_EVERY, JOURNAL: As for PARALLEL_IDA.
+
+    Returns:
+    - TABLE (pd.DataFrame): Tidy IM-EDP table, one row per (record, stripe): 'STEP' is the stripe index and
+      'STRIPE' its target IM.
+    - THROUGHPUT (float): Analyses per second.
+    """
+    global _IDA
+    RECORDS = [int(I) for I in RECORDS]
+    STRIPES = np.asarray(STRIPES, dtype=float)
+    SCALES = STRIPE_SCALES(IM[IM_NAME], IM_NAME, STRIPES)
+    CASES = [(I, K, float(SCALES[N, K])) for N, I in enumerate(RECORDS) for K in range(STRIPES.size)]
+    _IDA = {'ANALYSIS_FUN': ANALYSIS_FUN, 'CASES': CASES}
+    if MAX_WORKERS is None:
+        MAX_WORKERS = os.cpu_count() or 1
+    if PRINT_EVERY is None:
+        PRINT_EVERY = max(1, len(CASES) // 10)
+    RESULTS, THROUGHPUT = S04.PARALLEL_MONTE_CARLO(_MSA_CASE, len(CASES), SEED=0, MAX_WORKERS=MAX_WORKERS,
+                                                   CHUNKSIZE=CHUNKSIZE, SHARED={'_IDA': _IDA}, WIPE=False,
+                                                   PRINT_EVERY=PRINT_EVERY, JOURNAL=JOURNAL)
+    TABLE = IDA_TABLE(CASES, RESULTS, None, IM, RECORDS)
+    TABLE.insert(3, 'STRIPE', STRIPES[TABLE['STEP'].to_numpy()])
+    return TABLE, THROUGHPUT
+
+# -----------------------------------------------
+
+def SEQUENTIAL_MSA(ANALYSIS_FUN, STRIPES, IM, IM_NAME, RECORDS, EDP, THRESHOLDS, TOLERANCE=0.1, CONFIDENCE=0.95,
+                   MIN_RECORDS=5, RECORDS_PER_BATCH=None, MAX_WORKERS=None, JOURNAL=None):
+    """
+    Multiple-stripe analysis that stops once the fragility curves of all damage states have converged.
+
+    Records run in batches (all stripes of a record in the same batch); after every batch the exceedances update a
+    FRAGILITY_FIT.FragilityStream, and the campaign stops when the CONFIDENCE half-width of beta is below
+    TOLERANCE times beta for every damage state; a saturated damage state (exceeded in every run or in none) is
+    flagged in SUMMARY['FRAGILITY']['SATURATED'] and left out of the check.
+
+    Parameters:
+    - ANALYSIS_FUN, STRIPES, IM, IM_NAME, RECORDS, MAX_WORKERS, JOURNAL: As for PARALLEL_MSA.
+    - EDP, THRESHOLDS: Damage states, as for MSA_COUNTS.
+    - TOLERANCE (float): Relative half-width of beta that stops the campaign.
+    - CONFIDENCE (float): Confidence level of the half-width.
+    - MIN_RECORDS (int): Records run before the first convergence check.
+    - RECORDS_PER_BATCH (int): Records between two convergence checks (default: max(2, MAX_WORKERS)).
+
+    Returns:
+    - TABLE (pd.DataFrame): Tidy IM-EDP table of the records that were run (as PARALLEL_MSA).
+    - THROUGHPUT (float): Analyses per second.
+    - SUMMARY (dict): Summary of SEQUENTIAL_MONTE_CARLO, with the live fit of the stream in 'FRAGILITY'.
+    """
+    global _IDA
+    RECORDS = [int(I) for I in RECORDS]
+    STRIPES = np.asarray(STRIPES, dtype=float)
+    THRESHOLDS = np.asarray(THRESHOLDS, dtype=float)
+    SCALES = STRIPE_SCALES(IM[IM_NAME], IM_NAME, STRIPES)
+    CASES = [(I, K, float(SCALES[N, K])) for N, I in enumerate(RECORDS) for K in range(STRIPES.size)]
+    _IDA = {'ANALYSIS_FUN': ANALYSIS_FUN, 'CASES': CASES}
+    if MAX_WORKERS is None:
+        MAX_WORKERS = os.cpu_count() or 1
+    if RECORDS_PER_BATCH is None:
+        RECORDS_PER_BATCH = max(2, MAX_WORKERS)
+
+    def OBSERVATION(i, RESULT):
+        FAILED = (RESULT[EDP] >= THRESHOLDS) | bool(RESULT.get('COLLAPSE', False))
+        return STRIPES[CASES[i][1]], FAILED[None, :]
+
+    STREAM = S14.FragilityStream(THRESHOLDS.size)
+    TARGET = S14.FragilityTarget('BETA', STREAM, OBSERVATION, TOLERANCE, CONFIDENCE=CONFIDENCE)
+    RESULTS, THROUGHPUT, SUMMARY = S04.SEQUENTIAL_MONTE_CARLO(_MSA_CASE, len(CASES), [TARGET],
+                                                              BATCH_SIZE=RECORDS_PER_BATCH * STRIPES.size,
+                                                              MIN_SIM=MIN_RECORDS * STRIPES.size, SEED=0,
+                                                              MAX_WORKERS=MAX_WORKERS, SHARED={'_IDA': _IDA},
+                                                              WIPE=False, JOURNAL=JOURNAL)
+    RUN = RECORDS[:len(RESULTS) // STRIPES.size]
+    TABLE = IDA_TABLE(CASES[:len(RESULTS)], RESULTS, None, {NAME: VALUE[:len(RUN)] for NAME, VALUE in IM.items()}, RUN)
+    TABLE.insert(3, 'STRIPE', STRIPES[TABLE['STEP'].to_numpy()])
+    SUMMARY['FRAGILITY'] = STREAM.estimate()
+    return TABLE, THROUGHPUT, SUMMARY
+
+# -----------------------------------------------
+
+def MSA_COUNTS(TABLE, EDP, THRESHOLDS, STRIPE='STRIPE'):
+    """
+    Number of analyses and of damage-state exceedances at every stripe of an MSA table.
+
+    Parameters:
+    - TABLE (pd.DataFrame): Table of PARALLEL_MSA (or any table with a stripe column).
+    - EDP (str): EDP column compared with the thresholds (e.g. 'MAX_ABS_DI').
+    - THRESHOLDS (list): EDP threshold of every damage state; a run exceeds a damage state when EDP >= threshold,
+      and a collapsed run ('COLLAPSE') exceeds all of them.
+    - STRIPE (str): Column of the stripe IM.
+
+    Returns:
+    - COUNTS (dict): 'IM' (stripes,), 'N_TOTAL' (stripes,), 'N_FAILURES' (damage states, stripes) and 'THRESHOLDS'.
+    """
+    THRESHOLDS = np.asarray(THRESHOLDS, dtype=float)
+    STRIPES, LEVEL = np.unique(TABLE[STRIPE].to_numpy(dtype=float), return_inverse=True)
+    EXCEED = TABLE[EDP].to_numpy(dtype=float)[None, :] >= THRESHOLDS[:, None]
+    if 'COLLAPSE' in TABLE:
+        EXCEED |= TABLE['COLLAPSE'].to_numpy(dtype=bool)[None, :]
+    ONE_HOT = np.eye(STRIPES.size, dtype=int)[LEVEL]  # (runs, stripes)
+    return {'IM': STRIPES, 'N_TOTAL': ONE_HOT.sum(axis=0), 'N_FAILURES': EXCEED.astype(int) @ ONE_HOT,
+            'THRESHOLDS': THRESHOLDS}
+
+# -----------------------------------------------
+
+def RECORD_CAPACITY(IM, EDP, COLLAPSE, THRESHOLDS):
+    """
+    Capacity of one record for every damage state: IM at which its IDA curve reaches the EDP threshold.
+
+    Parameters:
+    - IM, EDP (np.array): IM and EDP of the runs of the record.
+    - COLLAPSE (np.array): Collapse flag of every run.
+    - THRESHOLDS (list): EDP threshold of every damage state.
+
+    Returns:
+    - CAPACITY (np.array): Linear interpolation of the curve (from the origin) at every threshold; a damage state
+      the curve does not reach before collapse gets the collapse capacity, without collapse inf.
+    """
+    ORDER = np.argsort(IM, kind='stable')
+    IM, EDP, COLLAPSE = (np.asarray(X)[ORDER] for X in (IM, EDP, COLLAPSE))
+    FIRST = np.argmax(COLLAPSE) if np.any(COLLAPSE) else IM.size
+    X = np.concatenate([[0.0], np.asarray(IM[:FIRST], dtype=float)])
+    Y = np.maximum.accumulate(np.concatenate([[0.0], np.asarray(EDP[:FIRST], dtype=float)]))
+    THRESHOLDS = np.asarray(THRESHOLDS, dtype=float)
+    J = np.searchsorted(Y, THRESHOLDS, side='left')  # First point at or past every threshold
+    REACHED = J < X.size
+    J = np.clip(J, 1, X.size - 1) if X.size > 1 else np.zeros_like(J)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        W = np.clip((THRESHOLDS - Y[J - 1]) / (Y[J] - Y[J - 1]), 0.0, 1.0)
+    CURVE = np.where(np.isfinite(W), X[J - 1] + W * (X[J] - X[J - 1]), X[J])
+    COLLAPSE_IM = X[-1] if FIRST < IM.size else np.inf
+    return np.where(REACHED & (X.size > 1), CURVE, COLLAPSE_IM)
+
+# -----------------------------------------------
+
+def RECORD_CENSOR_IM(IM, COLLAPSE):
+    # IM where the capacities of one record are censored: first collapse IM, largest IM run without collapse
+    IM, COLLAPSE = np.asarray(IM, dtype=float), np.asarray(COLLAPSE, dtype=bool)
+    return float(IM[COLLAPSE].min()) if COLLAPSE.any() else float(IM.max(initial=0.0))
+
+# -----------------------------------------------
+
+def SEQUENTIAL_HUNT_AND_FILL(ANALYSIS_FUN, RECORDS, IM, IM_NAME, EDP, THRESHOLDS, TOLERANCE=0.1, CONFIDENCE=0.95,
+                             MIN_RECORDS=5, RECORDS_PER_BATCH=None, MAX_WORKERS=None, **OPTIONS):
+    """
+    Hunt-and-fill IDA that stops once the capacity distributions of all damage states have converged.
+
+    Records run in batches; the capacity of every finished record (RECORD_CAPACITY) updates a
+    FRAGILITY_FIT.CapacityStream, censored at RECORD_CENSOR_IM where the record does not reach a damage state, and
+    the campaign stops when the CONFIDENCE half-width of the censored-MLE beta is below TOLERANCE times beta for
+    every damage state.
+
+    Parameters:
+    - ANALYSIS_FUN, RECORDS, MAX_WORKERS, OPTIONS: As for PARALLEL_HUNT_AND_FILL.
+    - IM (dict): Intensity measures of the unscaled records; IM_NAME is the IM of the capacities.
+    - EDP, THRESHOLDS: EDP column and threshold of every damage state.
+    - TOLERANCE, CONFIDENCE, MIN_RECORDS, RECORDS_PER_BATCH: As for SEQUENTIAL_MSA.
+
+    Returns:
+    - TABLE (pd.DataFrame): Tidy IM-EDP table of the records that were run (as PARALLEL_HUNT_AND_FILL).
+    - THROUGHPUT (float): Records per second.
+    - SUMMARY (dict): Summary of SEQUENTIAL_MONTE_CARLO, with the live estimate of the stream in 'FRAGILITY'.
+    """
+    global _IDA
+    RECORDS = [int(I) for I in RECORDS]
+    THRESHOLDS = np.asarray(THRESHOLDS, dtype=float)
+    _IDA = {'ANALYSIS_FUN': ANALYSIS_FUN, 'RECORDS': RECORDS, 'OPTIONS': OPTIONS}
+    if MAX_WORKERS is None:
+        MAX_WORKERS = os.cpu_count() or 1
+    if RECORDS_PER_BATCH is None:
+        RECORDS_PER_BATCH = max(2, MAX_WORKERS)
+
+    def OBSERVATION(i, RUNS):
+        SCALE = np.array([RUN[0] for RUN in RUNS])
+        CURVE_IM = SCALED_IM(IM[IM_NAME][i], IM_NAME, SCALE)
+        COLLAPSE = np.array([bool(RUN[1].get('COLLAPSE', False)) for RUN in RUNS])
+        return (RECORD_CAPACITY(CURVE_IM, np.array([RUN[1][EDP] for RUN in RUNS]), COLLAPSE, THRESHOLDS),
+                RECORD_CENSOR_IM(CURVE_IM, COLLAPSE))
+
+    STREAM = S14.CapacityStream(THRESHOLDS.size)
+    TARGET = S14.FragilityTarget('BETA', STREAM, OBSERVATION, TOLERANCE, CONFIDENCE=CONFIDENCE)
+    OUTPUT, THROUGHPUT, SUMMARY = S04.SEQUENTIAL_MONTE_CARLO(_HUNT_AND_FILL_RECORD, len(RECORDS), [TARGET],
+                                                             BATCH_SIZE=RECORDS_PER_BATCH, MIN_SIM=MIN_RECORDS,
+                                                             SEED=0, MAX_WORKERS=MAX_WORKERS,
+                                                             SHARED={'_IDA': _IDA}, WIPE=False)
+    RUN = RECORDS[:len(OUTPUT)]
+    TABLE = _HUNT_AND_FILL_TABLE(RUN, OUTPUT, {NAME: VALUE[:len(RUN)] for NAME, VALUE in IM.items()})
+    SUMMARY['FRAGILITY'] = STREAM.estimate()
+    return TABLE, THROUGHPUT, SUMMARY
+
+# -----------------------------------------------
@@ -28,11 +28,29 @@ import matplotlib.pyplot as plt
 import time as TI
 import SALAR_MATH as S01
 import Analysis_Function as S02
+import GROUND_MOTION_STORE as S07
+import RESPONSE_REDUCERS as S08
+import INTENSITY_MEASURES as S11
+import IDA_PARALLEL as S13
+import FRAGILITY_FIT as S14
+import RISK_INTEGRATION as S15
 from scipy.stats import norm
 
 #------------------------------------------------------------------------------------------------
 # Define parameters (units: m, N)
 J_MAX = 200    # Incremental Dynamic Analysis steps for the simulation
+MAX_WORKERS = None # Worker processes of the IDA (None: all cores, 1: serial)
+IDA_METHOD = 'HUNT_FILL' # 'GRID': J_MAX evenly spaced scale factors - 'HUNT_FILL': adaptive hunt-and-fill IDA - 'MSA': multiple-stripe analysis
+HUNT_FILL = {'FIRST_SCALE': 0.1*9.81, 'GROWTH': 1.5, 'MAX_RUNS': 16, 'MAX_SCALE': 10*9.81, 'RESOLUTION': 0.05} # Hunt-and-fill settings
+COLLAPSE_DI = 1.0  # Collapse threshold of the ductility damage index (a run stops as soon as it is exceeded)
+LINEAR_SHORTCUT = True # Runs whose peak force stays below fy are scaled from one elastic run instead of analysed
+MSA_STRIPES = 9.81 * np.array([0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8]) # [m/s^2] PGA of the stripes of the MSA (every record is scaled to each)
+DS_EDP = 'MAX_ABS_DI'  # EDP of the damage states of the MSA and of the early stop
+DS_THRESHOLDS = {'Minor Damage Level': 0.2, 'Moderate Damage Level': 0.4, 'Severe Damage Level': 0.6, 'Failure Level': 1.0} # DS_EDP thresholds
+EARLY_STOP = None # e.g. 0.10: the MSA / hunt-and-fill campaign stops once the 95% half-width of β is below 10% of β for every damage state (None: all records)
+HAZARD_PGA = np.array([0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.7, 1.0, 1.5]) # [g] Example site hazard curve: PGA levels - replace with the hazard of the site
+HAZARD_MAF = np.array([2.0e-2, 8.0e-3, 2.1e-3, 8.0e-4, 3.7e-4, 1.9e-4, 6.5e-5, 1.8e-5, 3.5e-6]) # Mean annual frequency of exceeding HAZARD_PGA
+RISK_YEARS = 50   # [year] Exposure time of the probabilities of exceedance
 #------------------------------------------------------------------------------------------------
 # Define  Steel Material Properties (Steel01)
 fy = 0.41        # [N] Yield force of structure
@@ -47,6 +65,8 @@ DR = 0.02         # Damping ratio
 
 duration = 15.0  # [s] Total simulation duration
 dt = 0.01        # [s] Time step
+SUITE_FILES = ['Ground_Acceleration_1.txt'] # Record suite of the IDA (e.g. 44 far-field records) - delete GROUND_MOTIONS.* after changing it
+STORE = S07.OPEN_STORE('GROUND_MOTIONS', TXT_FILES=SUITE_FILES, DT=dt)  # Text records imported once into the binary store
 #------------------------------------------------------------------------------------------------
 # Calculate Over Strength Coefficient (Ω0)
 Omega_0 = fu / fy
@@ -66,11 +86,12 @@ MAX_ITERATIONS = 1000000   # Convergence iteration for test
 MAX_TOLERANCE = 1.0e-10    # Convergence tolerance for test
 #------------------------------------------------------------------------------------------------
 ### OPENSEES FUNCTION
-def ANALYSIS_IDA_SDOF(j, J_MAX):
+def ANALYSIS_IDA_SDOF(j, J_MAX, TRACE=False, RECORD=0, GMfact=None, COLLAPSE_DI=None):
     # Initialize OpenSees model
     ops.wipe()
     ops.model('basic', '-ndm', 1, '-ndf', 1)
-    GMfact = 2*9.81* ((j+1) / J_MAX) # [m/s^2] standard acceleration of gravity or standard acceleration 
+    if GMfact is None:
+        GMfact = 2*9.81* ((j+1) / J_MAX) # [m/s^2] standard acceleration of gravity or standard acceleration 
         
     # Define nodes
     ops.node(1, 0.0)  # Fixed base
@@ -108,7 +129,7 @@ def ANALYSIS_IDA_SDOF(j, J_MAX):
     
     # Apply seismic accelerations    
     # Define time series for input motion (Acceleration time history)
-    gm_accels = np.loadtxt('Ground_Acceleration_1.txt')  # Assumes acceleration in m/s²
+    gm_accels, _ = S13.WORKER_RECORD(STORE, RECORD)  # Assumes acceleration in m/s² - read once per process
     ops.timeSeries('Path', 1, '-dt', dt, '-values', *gm_accels.tolist(), '-factor', GMfact) # SEISMIC-X
     #ops.timeSeries('Path', 1, '-dt', dt, '-filePath', f'Ground_Acceleration_1.txt', '-factor', GMfact) # SEISMIC-X
         
@@ -143,12 +164,8 @@ def ANALYSIS_IDA_SDOF(j, J_MAX):
     PERIOD = np.pi / Omega01   # Structure Period  
         
     # Re-run dynamic analysis with new loading
-    time = []
-    displacement = []
-    velocity = []
-    acceleration = []
-    base_reaction = []
-    DI = []
+    # Responses are reduced step by step - full time histories only if TRACE is True
+    STREAM = S08.ResponseStream(S08.SDOF_REDUCERS(), TRACE=TRACE)
         
     stable = 0
     current_time = 0.0
@@ -157,47 +174,119 @@ def ANALYSIS_IDA_SDOF(j, J_MAX):
         stable = ops.analyze(1, dt)
         S02.ANALYSIS(stable, 1, MAX_TOLERANCE, MAX_ITERATIONS) # CHECK THE ANALYSIS
         current_time = ops.getTime()
-        time.append(current_time)
-        displacement.append(ops.nodeDisp(2, 1))
-        velocity.append(ops.nodeVel(2, 1))
+        disp = ops.nodeDisp(2, 1)
         if step <= len(gm_accels)-1:
-            acceleration.append(ops.nodeAccel(2, 1) + gm_accels[step]) # Structure Acceleration and Seismic Acceleration
+            accel = ops.nodeAccel(2, 1) + gm_accels[step] # Structure Acceleration and Seismic Acceleration
         else:
-            acceleration.append(ops.nodeAccel(2, 1)) # Structure Acceleration
-        base_reaction.append(-ops.eleResponse(1, 'force')[0])  # Reaction force
-        DI.append((displacement[-1] - ey) / (esu - ey))        # Structural Ductility Damage Index 
+            accel = ops.nodeAccel(2, 1) # Structure Acceleration
+        STREAM.update({'TIME': current_time,
+                       'DISP': disp,
+                       'VELO': ops.nodeVel(2, 1),
+                       'ACCEL': accel,
+                       'BASE': -ops.eleResponse(1, 'force')[0],  # Reaction force
+                       'DI': (disp - ey) / (esu - ey)})          # Structural Ductility Damage Index 
         step += 1
+        if COLLAPSE_DI is not None and (abs(disp) - ey) / (esu - ey) >= COLLAPSE_DI:
+            break # Collapse: the rest of the record does not change the IDA point
     ops.wipe()
-    return time, displacement, velocity, acceleration, base_reaction, DI
+    return STREAM
+
+def ELASTIC_REFERENCE(RECORD):
+    # Reference run of the linear-range shortcut: smallest IDA level with full traces
+    GMfact = 2*9.81 / J_MAX
+    return GMfact, ANALYSIS_IDA_SDOF(0, J_MAX, TRACE=True, RECORD=RECORD, GMfact=GMfact).trace
+
+def SCALED_IDA_RESULT(RECORD, TRACE, FACTOR):
+    # Reduced responses of the elastic reference traces scaled by FACTOR (the record term of the acceleration is not scaled)
+    gm_accels, _ = S13.WORKER_RECORD(STORE, RECORD)
+    STREAM = S08.ResponseStream(S08.SDOF_REDUCERS())
+    for step, current_time in enumerate(TRACE['TIME']):
+        GM = gm_accels[step] if step <= len(gm_accels)-1 else 0.0
+        disp = FACTOR * TRACE['DISP'][step]
+        STREAM.update({'TIME': current_time,
+                       'DISP': disp,
+                       'VELO': FACTOR * TRACE['VELO'][step],
+                       'ACCEL': FACTOR * (TRACE['ACCEL'][step] - GM) + GM,
+                       'BASE': FACTOR * TRACE['BASE'][step],
+                       'DI': (disp - ey) / (esu - ey)})
+    return STREAM.result()
+
+def LINEAR_IDA_RESULT(RECORD, GMfact):
+    # Linear-range shortcut: reduced responses without analysis while the peak force stays below fy (None above it)
+    if not LINEAR_SHORTCUT:
+        return None
+    R = S13.LINEAR_RANGE_RESULT(RECORD, GMfact, ELASTIC_REFERENCE, SCALED_IDA_RESULT, 'BASE', fy)
+    if R is not None:
+        R['LINEAR'] = True
+    return R
+
+def ANALYSIS_IDA_CASE(RECORD, j):
+    # One (record, scale level) pair of the parallel IDA: only the reduced responses go back
+    R = LINEAR_IDA_RESULT(RECORD, 2*9.81* ((j+1) / J_MAX))
+    if R is None:
+        R = ANALYSIS_IDA_SDOF(j, J_MAX, RECORD=RECORD).result()
+        R['LINEAR'] = False
+    return R
+
+def ANALYSIS_IDA_HUNT(RECORD, SCALE):
+    # One run of the hunt-and-fill IDA: collapse is non-convergence (run stopped early) or DI past COLLAPSE_DI
+    R = LINEAR_IDA_RESULT(RECORD, SCALE)
+    if R is None:
+        R = ANALYSIS_IDA_SDOF(0, J_MAX, RECORD=RECORD, GMfact=SCALE, COLLAPSE_DI=COLLAPSE_DI).result()
+        R['LINEAR'] = False
+    R['COLLAPSE'] = bool(R['MAX_ABS_TIME'] < duration - 0.5*dt)
+    return R
 
 #------------------------------------------------------------------------------------------------
-# Analysis Durations:
-starttime = TI.process_time()
-
-# Initialize lists to store max values
-max_time = []
-max_displacement = []
-max_velocity = []
-max_acceleration = []
-max_base_reaction = []
-max_DI = []
-
-# IDA ANALYSIS
-for j in range(J_MAX):
-    time, displacement, velocity, acceleration, base_reaction, DI = ANALYSIS_IDA_SDOF(j, J_MAX)
-    # Calculate and store the max absolute values
-    max_time.append(np.max(np.abs(time)))
-    max_displacement.append(np.max(np.abs(displacement)))
-    max_velocity.append(np.max(np.abs(velocity)))
-    max_acceleration.append(np.max(np.abs(acceleration)))
-    max_base_reaction.append(np.max(np.abs(base_reaction)))
-    #max_DI.append(np.max(np.abs(DI)))
-    max_DI.append(DI[-1])
-    print(f'STEP {j + 1} DONE') 
+# Analysis Durations (wall time, the IDA runs on MAX_WORKERS processes):
+starttime = TI.time()
+
+# IDA ANALYSIS - (record, scale level) pairs spread over the worker pool
+RECORDS = list(range(S07.NUM_RECORDS(STORE))) # Every record of the suite
+SCALE = np.array([2*9.81* ((j+1) / J_MAX) for j in range(J_MAX)]) # GMfact of ANALYSIS_IDA_SDOF
+T1 = 2 * np.pi * np.sqrt(M / Es)  # [s] Elastic period
+IM = S11.STORE_INTENSITY_MEASURES(STORE, RECORDS, PERIODS=[T1], ZETA=0.05) # Unscaled records, scaled in the table
+if IDA_METHOD == 'HUNT_FILL' and EARLY_STOP:
+    IDA, THROUGHPUT, SEQUENTIAL = S13.SEQUENTIAL_HUNT_AND_FILL(ANALYSIS_IDA_HUNT, RECORDS, IM, 'PGA', DS_EDP, list(DS_THRESHOLDS.values()),
+                                                            TOLERANCE=EARLY_STOP, MAX_WORKERS=MAX_WORKERS, **HUNT_FILL)
+elif IDA_METHOD == 'HUNT_FILL':
+    IDA, THROUGHPUT = S13.PARALLEL_HUNT_AND_FILL(ANALYSIS_IDA_HUNT, RECORDS, IM=IM, MAX_WORKERS=MAX_WORKERS, **HUNT_FILL)
+    print(f'Runs per record: {len(IDA) / len(RECORDS):.1f}')
+elif IDA_METHOD == 'MSA' and EARLY_STOP:
+    IDA, THROUGHPUT, SEQUENTIAL = S13.SEQUENTIAL_MSA(ANALYSIS_IDA_HUNT, MSA_STRIPES, IM, 'PGA', RECORDS, DS_EDP, list(DS_THRESHOLDS.values()),
+                                                  TOLERANCE=EARLY_STOP, MAX_WORKERS=MAX_WORKERS)
+elif IDA_METHOD == 'MSA':
+    IDA, THROUGHPUT = S13.PARALLEL_MSA(ANALYSIS_IDA_HUNT, MSA_STRIPES, IM, 'PGA', RECORDS, MAX_WORKERS=MAX_WORKERS)
 else:
-    print('Analysis completed successfully')             
+    IDA, THROUGHPUT = S13.PARALLEL_IDA(ANALYSIS_IDA_CASE, SCALE, RECORDS, IM=IM, MAX_WORKERS=MAX_WORKERS)
+print('Analysis completed successfully')
+if EARLY_STOP and IDA_METHOD in ('HUNT_FILL', 'MSA'):
+    print(f"Records needed: {IDA['RECORD'].nunique()} / {len(RECORDS)} ({SEQUENTIAL['STOP']})")
+    # MSA: a damage state exceeded in every run or in none has no curve and is left out of the stop rule
+    SATURATED = [DAMAGE_STATE for DAMAGE_STATE, FLAG in zip(DS_THRESHOLDS, SEQUENTIAL['FRAGILITY'].get('SATURATED', [])) if FLAG]
+    for DAMAGE_STATE, MEDIAN, BETA, SE_BETA in zip(DS_THRESHOLDS, *(SEQUENTIAL['FRAGILITY'][KEY] for KEY in ('MEDIAN', 'BETA', 'SE_BETA'))):
+        if DAMAGE_STATE not in SATURATED:
+            print(f'{DAMAGE_STATE}: median PGA = {MEDIAN / 9.81:.4f} g, β = {BETA:.4f} ± {1.96 * SE_BETA:.4f}')
+    if SATURATED:
+        print(f"Saturated damage states (exceeded in every run or in none - no fragility curve): {', '.join(SATURATED)}")
+    RECORDS = sorted(IDA['RECORD'].unique().tolist()) # Records that were run
+print(f"Linear-range runs scaled from the elastic reference: {int(IDA['LINEAR'].sum())} / {len(IDA)}")
 
-totaltime = TI.process_time() - starttime
+# Max values of every IDA step (first record) - collapsed runs only mark the flatline of the curve
+CURVE = IDA[~IDA['COLLAPSE']] if 'COLLAPSE' in IDA else IDA
+FIRST = CURVE[CURVE['RECORD'] == RECORDS[0]]
+max_time = FIRST['MAX_ABS_TIME'].tolist()
+max_displacement = FIRST['MAX_ABS_DISP'].tolist()
+max_velocity = FIRST['MAX_ABS_VELO'].tolist()
+max_acceleration = FIRST['MAX_ABS_ACCEL'].tolist()
+max_base_reaction = FIRST['MAX_ABS_BASE'].tolist()
+#max_DI = FIRST['MAX_ABS_DI'].tolist()
+max_DI = FIRST['RESIDUAL_DI'].tolist()
+
+STREAM = ANALYSIS_IDA_SDOF(J_MAX - 1, J_MAX, TRACE=True, RECORD=RECORDS[0], GMfact=FIRST['SCALE'].max()) # Full time histories only for the last (plotted) step
+time, displacement, velocity, acceleration, base_reaction, DI = [STREAM.trace[KEY] for KEY in ('TIME', 'DISP', 'VELO', 'ACCEL', 'BASE', 'DI')]
+
+totaltime = TI.time() - starttime
 print(f'\nTotal time (s): {totaltime:.4f} \n\n') 
 #------------------------------------------------------------------------------------------------
 # Print the last results
@@ -279,54 +368,131 @@ DATA_TOTAL = {
     'Max_Base_Reaction': max_base_reaction,
     'Ductility_Damage_Index': max_DI
 }
+# Intensity measures of the scaled record at every IDA step (computed once for the unscaled record, then scaled)
+for NAME in IM:
+    DATA_TOTAL[f'IM_{NAME}'] = FIRST[f'IM_{NAME}'].to_numpy()
 # Convert to DataFrame
 results_df = pd.DataFrame(DATA_TOTAL)
 # Export the DataFrame to an Excel file
 results_df.to_excel('INELASTIC_SEISMIC_IDA_SDOF_FRAGILITY_RESULTS.xlsx', index=False)
-#------------------------------------------------------------------------------------------------  
-XLABEL = 'Displacement'
-YLABEL = 'Base Reaction'
-TITLE = f'{YLABEL} and {XLABEL} scatter chart'
-COLOR = 'orange'
-X = max_displacement
-Y = max_base_reaction
-S01.PLOT_SCATTER(X, Y , XLABEL, YLABEL, TITLE, COLOR, LOG = 0, ORDER = 1)
-
-# CLUSTER DATA
-S01.CLUSTER_DATA(X, Y, XLABEL, YLABEL, MAX_CLUSTERS=3)
+# Tidy IM-EDP table of the IDA: one row per (record, scale level)
+IDA.to_excel('INELASTIC_SEISMIC_IDA_SDOF_FRAGILITY_IDA_TABLE.xlsx', index=False)
 #------------------------------------------------------------------------------------------------
-XLABEL = 'Velocity'
-YLABEL = 'Base Reaction'
-TITLE = f'{YLABEL} and {XLABEL} scatter chart'
-COLOR = 'cyan'
-X = max_velocity
-Y = max_base_reaction
-S01.PLOT_SCATTER(X, Y , XLABEL, YLABEL, TITLE, COLOR, LOG = 0, ORDER = 1)
-
-# CLUSTER DATA
-S01.CLUSTER_DATA(X, Y, XLABEL, YLABEL, MAX_CLUSTERS=3)
-#------------------------------------------------------------------------------------------------
-XLABEL = 'Acceleration'
-YLABEL = 'Base Reaction'
-TITLE = f'{YLABEL} and {XLABEL} scatter chart'
-COLOR = 'lime'
-X = max_acceleration
-Y = max_base_reaction
-S01.PLOT_SCATTER(X, Y , XLABEL, YLABEL, TITLE, COLOR, LOG = 0, ORDER = 1)
-
-# CLUSTER DATA
-S01.CLUSTER_DATA(X, Y, XLABEL, YLABEL, MAX_CLUSTERS=3)
+# MULTI-RECORD IDA: record x level x EDP cube, fractile IDA curves and collapse capacities
+IM_NAME = 'IM_PGA'                          # IM axis of the IDA curves
+EDP_NAMES = ['MAX_ABS_DISP', 'MAX_ABS_DI']  # EDPs of the cube
+CUBE = S13.IDA_CUBE(IDA, EDP_NAMES, IM=IM_NAME)
+np.savez('INELASTIC_SEISMIC_IDA_SDOF_FRAGILITY_IDA_CUBE.npz', **CUBE)
+IM_GRID = np.linspace(0.0, np.nanmax(CUBE['IM']), 200)
+CURVES = S13.INTERPOLATE_CURVES(CUBE, IM_GRID, 'MAX_ABS_DISP') # (records, IM levels)
+FRACTILES = S13.FRACTILE_CURVES(CURVES, (0.16, 0.50, 0.84))
+CAPACITY = S13.CAPACITY_STATISTICS(S13.CUBE_CAPACITY(CUBE), CENSOR_IM=S13.CUBE_CENSOR_IM(CUBE)) # Survivors right-censored
+print(f"Collapsed records: {CAPACITY['NUM_COLLAPSED']} / {CAPACITY['NUM_RECORDS']} (censored: {CAPACITY['NUM_CENSORED']})")
+print(f"Collapse capacity {IM_NAME} - 16/50/84% fractiles: {CAPACITY['FRACTILES']} - median: {CAPACITY['MEDIAN']:.4f}, β: {CAPACITY['BETA']:.4f}")
+# Collapse risk: empirical and lognormal collapse fragility (PGA in g) convolved with the site hazard curve. The empirical
+# capacities need a traced collapse: an MSA record that collapses at its first stripe has capacity 0, so MSA uses the censored fit only
+if IDA_METHOD != 'MSA':
+    RISK_GRID = np.geomspace(HAZARD_PGA.min() / 100, max(HAZARD_PGA.max(), 2 * np.nanmax(CUBE['IM']) / 9.81), 400)
+    LAMBDA_COLLAPSE = S15.MEAN_ANNUAL_FREQUENCY(S15.CAPACITY_FRAGILITY(S13.CUBE_CAPACITY(CUBE) / 9.81, RISK_GRID),
+                                               S15.HAZARD_CURVE(HAZARD_PGA, HAZARD_MAF, RISK_GRID))
+    print(f"Collapse (empirical capacities): λ = {LAMBDA_COLLAPSE:.3e} /year, P({RISK_YEARS} years) = {S15.PROBABILITY_IN_YEARS(LAMBDA_COLLAPSE, RISK_YEARS):.4f}")
+if np.isfinite(CAPACITY['BETA']):
+    COLLAPSE_RISK = S15.RISK_INTEGRATION(np.log(CAPACITY['MEDIAN'] / 9.81), CAPACITY['BETA'], HAZARD_PGA, HAZARD_MAF, YEARS=RISK_YEARS)
+    print(f"Collapse (censored lognormal capacity): λ = {COLLAPSE_RISK['LAMBDA']:.3e} /year, P({RISK_YEARS} years) = {COLLAPSE_RISK['PROBABILITY']:.4f}")
+
+plt.figure(figsize=(10, 6))
+plt.plot(CURVES.T, IM_GRID, color='grey', linewidth=0.5)
+for LABEL, FRACTILE, COLOR in zip(('16%', '50%', '84%'), FRACTILES, ('blue', 'black', 'red')):
+    plt.plot(FRACTILE, IM_GRID, color=COLOR, linewidth=3, label=f'{LABEL} fractile')
+plt.xlabel('Max. Displacement [m]  [EDP]')
+plt.ylabel('Peak Ground Acceleration [m/s^2]  [IM]')
+plt.title(f'IDA Curves of {len(RECORDS)} Records and Fractile Curves')
+plt.legend()
+plt.grid(True)
+plt.show()
 #------------------------------------------------------------------------------------------------
-XLABEL = 'Displacement'
-YLABEL = 'Structural Ductility Damage Index'
-TITLE = f'{YLABEL} and {XLABEL} scatter chart'
-COLOR = 'purple'
-X = max_displacement
-Y = max_DI
-S01.PLOT_SCATTER(X, Y , XLABEL, YLABEL, TITLE, COLOR, LOG = 0, ORDER = 1)
-
-# CLUSTER DATA
-S01.CLUSTER_DATA(X, Y, XLABEL, YLABEL, MAX_CLUSTERS=3)
+# MULTIPLE-STRIPE ANALYSIS: exceedances of every damage state at every stripe and their MLE fragility curves (Baker, 2015)
+if IDA_METHOD == 'MSA':
+    COUNTS = S13.MSA_COUNTS(IDA, DS_EDP, list(DS_THRESHOLDS.values()))
+    IM_RANGE = np.linspace(0.01, 1.2 * COUNTS['IM'].max() / 9.81, 200)
+    MSA_BOOTSTRAP = S14.BOOTSTRAP_FRAGILITY(COUNTS['IM'] / 9.81, COUNTS['N_FAILURES'], COUNTS['N_TOTAL'],
+                                            NUM_BOOTSTRAP=1000, Q=(0.05, 0.95), IM_GRID=IM_RANGE) # 90% confidence bands
+    MSA_FIT = MSA_BOOTSTRAP['FIT']
+    # Stripe counts for FRAGILITY_CURVES_JACK.W.BAKER.py (PGA in g)
+    np.savez('INELASTIC_SEISMIC_IDA_SDOF_FRAGILITY_MSA.npz', IM_levels=COUNTS['IM'] / 9.81, n_analyses=COUNTS['N_TOTAL'],
+             n_failures=COUNTS['N_FAILURES'], damage_states=np.array(list(DS_THRESHOLDS)))
+
+    plt.figure(figsize=(10, 6))
+    for K, DAMAGE_STATE in enumerate(DS_THRESHOLDS):
+        print(f"{DAMAGE_STATE}: median PGA = {MSA_FIT['MEDIAN'][K]:.4f} g, β = {MSA_FIT['BETA'][K]:.4f}")
+        LINE, = plt.plot(IM_RANGE, S14.FRAGILITY_FUNCTION(IM_RANGE, MSA_FIT['THETA'][K], MSA_FIT['BETA'][K]), lw=2,
+                         label=f"{DAMAGE_STATE} (η={MSA_FIT['MEDIAN'][K]:.3f}, β={MSA_FIT['BETA'][K]:.3f})")
+        plt.fill_between(IM_RANGE, MSA_BOOTSTRAP['BANDS'][0, K], MSA_BOOTSTRAP['BANDS'][1, K], color=LINE.get_color(), alpha=0.2)
+        plt.scatter(COUNTS['IM'] / 9.81, COUNTS['N_FAILURES'][K] / COUNTS['N_TOTAL'], color=LINE.get_color())
+    plt.xlabel('Peak Ground Acceleration (g)  [IM]')
+    plt.ylabel('Probability of Exceedance')
+    plt.title(f'MSA Fragility Curves ({len(RECORDS)} Records per Stripe)')
+    plt.legend()
+    plt.grid(True)
+    plt.show()
+    # Damage-state risk: fitted curve and all bootstrap curves convolved with the site hazard curve in one array operation
+    MSA_RISK = S15.RISK_INTEGRATION(MSA_FIT['THETA'], MSA_FIT['BETA'], HAZARD_PGA, HAZARD_MAF, YEARS=RISK_YEARS)
+    BOOT_RISK = S15.RISK_INTEGRATION(MSA_BOOTSTRAP['THETA'], MSA_BOOTSTRAP['BETA'], HAZARD_PGA, HAZARD_MAF, YEARS=RISK_YEARS)
+    LAMBDA_CI = np.nanquantile(BOOT_RISK['LAMBDA'], (0.05, 0.95), axis=0)
+    for K, DAMAGE_STATE in enumerate(DS_THRESHOLDS):
+        print(f"{DAMAGE_STATE}: λ = {MSA_RISK['LAMBDA'][K]:.3e} /year (90%: {LAMBDA_CI[0, K]:.3e} - {LAMBDA_CI[1, K]:.3e}), "
+              f"return period = {MSA_RISK['RETURN_PERIOD'][K]:.0f} years, P({RISK_YEARS} years) = {MSA_RISK['PROBABILITY'][K]:.4f}")
+#------------------------------------------------------------------------------------------------  
+# Scatter and cluster plots of the first record: in MSA mode it only has its stripes up to its collapse (too few points)
+MAX_CLUSTERS = 3
+if IDA_METHOD != 'MSA':
+    XLABEL = 'Displacement'
+    YLABEL = 'Base Reaction'
+    TITLE = f'{YLABEL} and {XLABEL} scatter chart'
+    COLOR = 'orange'
+    X = max_displacement
+    Y = max_base_reaction
+    S01.PLOT_SCATTER(X, Y , XLABEL, YLABEL, TITLE, COLOR, LOG = 0, ORDER = 1)
+
+    # CLUSTER DATA
+    if len(X) >= MAX_CLUSTERS:
+        S01.CLUSTER_DATA(X, Y, XLABEL, YLABEL, MAX_CLUSTERS=MAX_CLUSTERS)
+    #------------------------------------------------------------------------------------------------
+    XLABEL = 'Velocity'
+    YLABEL = 'Base Reaction'
+    TITLE = f'{YLABEL} and {XLABEL} scatter chart'
+    COLOR = 'cyan'
+    X = max_velocity
+    Y = max_base_reaction
+    S01.PLOT_SCATTER(X, Y , XLABEL, YLABEL, TITLE, COLOR, LOG = 0, ORDER = 1)
+
+    # CLUSTER DATA
+    if len(X) >= MAX_CLUSTERS:
+        S01.CLUSTER_DATA(X, Y, XLABEL, YLABEL, MAX_CLUSTERS=MAX_CLUSTERS)
+    #------------------------------------------------------------------------------------------------
+    XLABEL = 'Acceleration'
+    YLABEL = 'Base Reaction'
+    TITLE = f'{YLABEL} and {XLABEL} scatter chart'
+    COLOR = 'lime'
+    X = max_acceleration
+    Y = max_base_reaction
+    S01.PLOT_SCATTER(X, Y , XLABEL, YLABEL, TITLE, COLOR, LOG = 0, ORDER = 1)
+
+    # CLUSTER DATA
+    if len(X) >= MAX_CLUSTERS:
+        S01.CLUSTER_DATA(X, Y, XLABEL, YLABEL, MAX_CLUSTERS=MAX_CLUSTERS)
+    #------------------------------------------------------------------------------------------------
+    XLABEL = 'Displacement'
+    YLABEL = 'Structural Ductility Damage Index'
+    TITLE = f'{YLABEL} and {XLABEL} scatter chart'
+    COLOR = 'purple'
+    X = max_displacement
+    Y = max_DI
+    S01.PLOT_SCATTER(X, Y , XLABEL, YLABEL, TITLE, COLOR, LOG = 0, ORDER = 1)
+
+    # CLUSTER DATA
+    if len(X) >= MAX_CLUSTERS:
+        S01.CLUSTER_DATA(X, Y, XLABEL, YLABEL, MAX_CLUSTERS=MAX_CLUSTERS)
 #------------------------------------------------------------------------------------------------
 # PLOT THE TIME-HISTORY
 S01.PLOT_TIME_HISTORY(time, displacement, velocity, acceleration, base_reaction)
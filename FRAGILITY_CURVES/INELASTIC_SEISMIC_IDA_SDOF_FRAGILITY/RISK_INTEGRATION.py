@@ -0,0 +1,155 @@
+"""
+Risk integration: fragility curves convolved with a seismic hazard curve.
+
+The fragility curves of INELASTIC_SEISMIC_IDA_SDOF_FRAGILITY.py and FRAGILITY_CURVES_JACK.W.BAKER.py give
+P(DS | IM). With the hazard curve lambda(IM) (mean annual frequency of exceeding IM at the site) the mean annual
+frequency of a damage state is
+
+    lambda_DS = integral P(DS | im) |d lambda(im)|
+
+and, for Poisson occurrences, the probability of reaching it in T years is 1 - exp(-lambda_DS T).
+
+Every curve is sampled on one IM grid, so many structures, damage states and parameter samples (e.g. bootstrap
+resamples or Monte Carlo samples of theta and beta) are integrated as one array operation:
+- HAZARD_CURVE           -> user hazard points interpolated on the IM grid (log-log, end slopes extrapolated)
+- POWER_LAW_HAZARD       -> lambda = K0 IM^-K (closed-form check: LOGNORMAL_POWER_LAW_MAF)
+- LOGNORMAL_FRAGILITY    -> Phi((ln IM - theta) / beta) of any array of (theta, beta)
+- EMPIRICAL_FRAGILITY    -> empirical curves given at common IM points, interpolated by one matrix product
+- CAPACITY_FRAGILITY     -> empirical CDF of IDA capacities (IDA_PARALLEL.CUBE_CAPACITY)
+- MEAN_ANNUAL_FREQUENCY  -> lambda_DS of every curve
+- PROBABILITY_IN_YEARS   -> 1 - exp(-lambda_DS T)
+- RISK_INTEGRATION       -> all of it for lognormal curves
+"""
+import numpy as np
+from scipy.stats import norm
+
+# -----------------------------------------------
+
+def HAZARD_CURVE(HAZARD_IM, HAZARD_LAMBDA, IM_GRID):
+    """
+    Hazard curve on the IM grid by log-log interpolation of user points.
+
+    Parameters:
+    - HAZARD_IM (np.array): IM values of the hazard curve (increasing, > 0).
+    - HAZARD_LAMBDA (np.array): Mean annual frequency of exceedance at HAZARD_IM (> 0), or (..., points) for
+      several sites or hazard branches sharing HAZARD_IM.
+    - IM_GRID (np.array): IM grid of the integration (> 0).
+
+    Returns:
+    - LAMBDA (np.array): Annual exceedance frequency on IM_GRID (..., grid); below and above the points the
+      first and last log-log slopes are extended.
+    """
+    X = np.log(np.asarray(HAZARD_IM, dtype=float))
+    Y = np.log(np.asarray(HAZARD_LAMBDA, dtype=float))
+    XG = np.log(np.asarray(IM_GRID, dtype=float))
+    J = np.clip(np.searchsorted(X, XG) - 1, 0, X.size - 2)  # Segment of every grid point (end segments extended)
+    W = (XG - X[J]) / (X[J + 1] - X[J])
+    return np.exp(Y[..., J] + W * (Y[..., J + 1] - Y[..., J]))
+
+# -----------------------------------------------
+
+def POWER_LAW_HAZARD(IM, K0, K):
+    # Power-law approximation of a hazard curve: lambda(IM) = K0 * IM^-K
+    return K0 * np.asarray(IM, dtype=float) ** (-K)
+
+# -----------------------------------------------
+
+def LOGNORMAL_POWER_LAW_MAF(THETA, BETA, K0, K):
+    # Closed-form lambda_DS of a lognormal fragility with a power-law hazard: K0 exp(-K theta + K^2 beta^2 / 2)
+    return K0 * np.exp(-K * np.asarray(THETA) + 0.5 * K**2 * np.asarray(BETA)**2)
+
+# -----------------------------------------------
+
+def LOGNORMAL_FRAGILITY(IM_GRID, THETA, BETA):
+    # P(DS | IM) on IM_GRID for every (theta, beta): shape (..., grid) for THETA and BETA of shape (...)
+    return norm.cdf((np.log(IM_GRID) - np.asarray(THETA, dtype=float)[..., None]) / np.asarray(BETA, dtype=float)[..., None])
+
+# -----------------------------------------------
+
+def EMPIRICAL_FRAGILITY(IM, PROBABILITY, IM_GRID):
+    """
+    Empirical fragility curves on the IM grid.
+
+    Parameters:
+    - IM (np.array): IM points shared by all curves (increasing), e.g. MSA stripes.
+    - PROBABILITY (np.array): P(DS | IM) at the points, shape (..., points), e.g. N_FAILURES / N_TOTAL.
+    - IM_GRID (np.array): IM grid of the integration.
+
+    Returns:
+    - FRAGILITY (np.array): Linear interpolation on IM_GRID (..., grid), from P = 0 at IM = 0 and held at the last
+      point beyond it; every curve is interpolated by one product with the same interpolation matrix.
+    """
+    X = np.concatenate([[0.0], np.asarray(IM, dtype=float)])
+    P = np.concatenate([np.zeros(np.shape(PROBABILITY)[:-1] + (1,)), np.asarray(PROBABILITY, dtype=float)], axis=-1)
+    XG = np.clip(np.asarray(IM_GRID, dtype=float), X[0], X[-1])
+    J = np.clip(np.searchsorted(X, XG) - 1, 0, X.size - 2)
+    W = (XG - X[J]) / (X[J + 1] - X[J])
+    MATRIX = np.zeros((XG.size, X.size))
+    MATRIX[np.arange(XG.size), J] = 1.0 - W
+    MATRIX[np.arange(XG.size), J + 1] += W
+    return P @ MATRIX.T
+
+# -----------------------------------------------
+
+def CAPACITY_FRAGILITY(CAPACITY, IM_GRID):
+    # Empirical CDF of capacities (..., records) on IM_GRID: fraction of records with capacity <= IM (inf never fails)
+    CAPACITY = np.asarray(CAPACITY, dtype=float)
+    return np.mean(CAPACITY[..., None, :] <= np.asarray(IM_GRID, dtype=float)[:, None], axis=-1)
+
+# -----------------------------------------------
+
+def MEAN_ANNUAL_FREQUENCY(FRAGILITY, LAMBDA):
+    """
+    Mean annual frequency of a damage state: P(DS | IM) integrated over the hazard curve.
+
+    Parameters:
+    - FRAGILITY (np.array): P(DS | IM) on the IM grid, shape (..., grid).
+    - LAMBDA (np.array): Hazard curve on the same grid (grid,) or broadcastable to FRAGILITY.
+
+    Returns:
+    - LAMBDA_DS (np.array): sum over the grid intervals of the mean fragility times the drop of the hazard, plus the
+      last fragility value times the hazard at the end of the grid (the tail beyond the grid); shape (...).
+    """
+    FRAGILITY = np.asarray(FRAGILITY, dtype=float)
+    LAMBDA = np.asarray(LAMBDA, dtype=float)
+    DROP = LAMBDA[..., :-1] - LAMBDA[..., 1:]
+    return np.sum(0.5 * (FRAGILITY[..., :-1] + FRAGILITY[..., 1:]) * DROP, axis=-1) + FRAGILITY[..., -1] * LAMBDA[..., -1]
+
+# -----------------------------------------------
+
+def PROBABILITY_IN_YEARS(LAMBDA_DS, YEARS=50):
+    # Probability of at least one exceedance in YEARS (Poisson occurrences)
+    return 1.0 - np.exp(-np.asarray(LAMBDA_DS, dtype=float) * YEARS)
+
+# -----------------------------------------------
+
+def RISK_INTEGRATION(THETA, BETA, HAZARD_IM, HAZARD_LAMBDA, YEARS=50, IM_GRID=None, NUM_POINTS=400):
+    """
+    Mean annual frequency and probability in YEARS of lognormal fragility curves.
+
+    Parameters:
+    - THETA, BETA (np.array): ln median and dispersion of any shape (structures, samples, damage states, ...),
+      in the units of HAZARD_IM.
+    - HAZARD_IM, HAZARD_LAMBDA (np.array): Points of the hazard curve (see HAZARD_CURVE).
+    - YEARS (float): Exposure time.
+    - IM_GRID (np.array): IM grid of the integration (default: NUM_POINTS log-spaced points from 1/100 of the first
+      hazard point up to the last median plus four dispersions).
+    - NUM_POINTS (int): Points of the default grid.
+
+    Returns:
+    - RISK (dict): 'LAMBDA' (mean annual frequency, shape of THETA), 'PROBABILITY' (in YEARS), 'RETURN_PERIOD'
+      (1 / LAMBDA), 'IM_GRID' and 'HAZARD' (hazard on the grid).
+    """
+    THETA = np.asarray(THETA, dtype=float)
+    BETA = np.asarray(BETA, dtype=float)
+    if IM_GRID is None:
+        UPPER = max(np.log(np.max(HAZARD_IM)), float(np.nanmax(THETA + 4.0 * BETA)))
+        IM_GRID = np.geomspace(np.min(HAZARD_IM) / 100, np.exp(UPPER), NUM_POINTS)
+    HAZARD = HAZARD_CURVE(HAZARD_IM, HAZARD_LAMBDA, IM_GRID)
+    LAMBDA_DS = MEAN_ANNUAL_FREQUENCY(LOGNORMAL_FRAGILITY(IM_GRID, THETA, BETA), HAZARD)
+    with np.errstate(divide='ignore'):
+        RETURN_PERIOD = 1.0 / LAMBDA_DS
+    return {'LAMBDA': LAMBDA_DS, 'PROBABILITY': PROBABILITY_IN_YEARS(LAMBDA_DS, YEARS), 'RETURN_PERIOD': RETURN_PERIOD,
+            'IM_GRID': IM_GRID, 'HAZARD': HAZARD}
+
+# -----------------------------------------------
@@ -17,6 +17,7 @@ import openseespy.opensees as ops
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.stats import lognorm
+import GROUND_MOTION_STORE as S07
 
 # ================================
 # 1. Structural Response Analysis
@@ -97,9 +98,9 @@ if __name__ == "__main__":
     # ----------------------------
     # Ground Motion Selection
     # ----------------------------
-    gm_data = np.loadtxt('Ground_Acceleration_1.txt')  # Assumes acceleration in m/s²
-    gm_data /= 9.81  # Convert to g units
     dt = 0.02  # Time step from record
+    gm_data, dt = S07.LOAD_RECORD('Ground_Acceleration_1.txt', dt)  # Assumes acceleration in m/s²
+    gm_data = gm_data / 9.81  # Convert to g units
     
     # ----------------------------
     # Structural Analysis
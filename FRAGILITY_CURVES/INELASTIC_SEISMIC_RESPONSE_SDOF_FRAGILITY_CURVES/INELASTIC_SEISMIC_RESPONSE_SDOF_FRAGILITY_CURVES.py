@@ -27,12 +27,15 @@ import matplotlib.pyplot as plt
 import time as TI
 import SALAR_MATH as S01
 import Analysis_Function as S02
+import GROUND_MOTION_STORE as S07
 import MARKOV_CHAIN as S03
+import NEWMARK_SDOF_BATCH as S05
 from scipy.stats import norm
 
 #------------------------------------------------------------------------------------------------
 # Define parameters (units: m, N)
 J_MAX = 100      # Incremental Dynamic Analysis steps for the simulation
+LINEAR_SHORTCUT = True  # Periods whose peak force stays below fy are taken from one batched elastic run
 #------------------------------------------------------------------------------------------------
 # Define  Steel Material Properties (Steel01)
 fy = 0.41                     # [N] Yield force of structure
@@ -48,6 +51,7 @@ KP = fu/esu                   # [N/m] Spring plastic stiffness
 
 duration = 15.0  # [s] Total simulation duration
 dt = 0.01        # [s] Time step
+STORE = S07.OPEN_STORE('GROUND_MOTIONS', TXT_FILES=['Ground_Acceleration_1.txt'], DT=dt)  # Text record imported once into the binary store
 
 T_ELASTIC = 2 * np.pi * np.sqrt(M/KE)  # Period of Elastic Structure
 T_PLASTIC = 2 * np.pi * np.sqrt(M/KP)  # Period of Plastic Structure
@@ -116,7 +120,7 @@ def ANALYSIS_SPECTRUM_SDOF(j, J_MAX):
     
     # Apply seismic accelerations    
     # Define time series for input motion (Acceleration time history)
-    gm_accels = np.loadtxt('Ground_Acceleration_1.txt')  # Assumes acceleration in m/s²
+    gm_accels, _ = S07.READ_RECORD(STORE, 0)  # Assumes acceleration in m/s²
     ops.timeSeries('Path', 1, '-dt', dt, '-values', *gm_accels.tolist(), '-factor', GMfact) # SEISMIC-X
     #ops.timeSeries('Path', 1, '-dt', dt, '-filePath', f'Ground_Acceleration_1.txt', '-factor', GMfact) # SEISMIC-X
         
@@ -191,8 +195,31 @@ max_base_reaction = []
 max_DI = []
 max_T = []
 
+# LINEAR-RANGE SHORTCUT
+# While the spring force stays below fy the Hysteretic spring never leaves its first branch (stiffness KE),
+# so those periods are the elastic response: all masses run as one batched elastic analysis and only the
+# periods that reach fy (and the last one, whose time history is plotted) go to OpenSees.
+LINEAR = np.zeros(J_MAX, dtype=bool)
+if LINEAR_SHORTCUT:
+    MASS = (np.arange(J_MAX) + 1) / J_MAX * (T_PLASTIC/2*np.pi)**2 * KP  # Masses of ANALYSIS_SPECTRUM_SDOF
+    gm_accels, _ = S07.READ_RECORD(STORE, 0)
+    ELASTIC = S05.NEWMARK_SDOF_BATCH(S05.ElasticBatch(np.full(J_MAX, KE)), MASS, DR, gm_accels, dt, duration,
+                                     GMfact=9.81, TOLERANCE=MAX_TOLERANCE)
+    LINEAR = (ELASTIC['BASE'] < fy) & ELASTIC['CONVERGED']
+    LINEAR[-1] = False
+
 # IDA ANALYSIS
 for j in range(J_MAX):
+    if LINEAR[j]:
+        max_time.append(ELASTIC['TIME'])
+        max_displacement.append(ELASTIC['DISP'][j])
+        max_velocity.append(ELASTIC['VELO'][j])
+        max_acceleration.append(ELASTIC['ACCEL'][j])
+        max_base_reaction.append(ELASTIC['BASE'][j])
+        max_DI.append((ELASTIC['DISP_END'][j] - ey) / (esu - ey))
+        max_T.append(np.pi / ELASTIC['OMEGA'][j])
+        print(f'STEP {j + 1} DONE (LINEAR)')
+        continue
     time, displacement, velocity, acceleration, base_reaction, DI, T = ANALYSIS_SPECTRUM_SDOF(j, J_MAX)
     # Calculate and store the max absolute values
     max_time.append(np.max(np.abs(time)))
@@ -209,6 +236,7 @@ else:
 
 totaltime = TI.process_time() - starttime
 print(f'\nTotal time (s): {totaltime:.4f} \n\n') 
+print(f'Linear-range periods from the batched elastic run: {np.sum(LINEAR)} / {J_MAX}')
 #------------------------------------------------------------------------------------------------
 # Print the last results
 print("Maximum Absolute Values Across Simulations:")
@@ -76,35 +76,61 @@ import time as TI
 import SALAR_MATH as S01
 import ANALYSIS_FUNCTION as S02
 import MARKOV_CHAIN as S03
+import MONTE_CARLO_PARALLEL as S04
+import SAMPLING_DESIGN as S09
 from scipy.stats import norm
 
 #------------------------------------------------------------------------------------------------
 # Define parameters (units: mm, N)
 NUM_SIM = 50000                                # Total number for simulation
+SEED = 2025                                    # Master seed of the Monte Carlo realizations
+MAX_WORKERS = None                             # Worker processes for the Monte Carlo (None: all cores, 1: serial)
+JOURNAL = None                                 # Results journal to resume from, e.g. 'INELASTIC_UNCERTAINTY_WELD_CONNECTION_SDOF_JOURNAL' (None: no journal)
+SEQUENTIAL = False                             # Stop once the TARGETS of the run converge (NUM_SIM is then the maximum)
+BATCH_SIZE = 500                               # Realizations between two convergence checks of the sequential run
+TIME_BUDGET = None                             # [s] Wall-clock budget of the sequential run (None: no budget)
+SUBSET = False                                 # Subset simulation of small failure probabilities after the Monte Carlo
+SUBSET_N = 500                                 # Samples per subset level
+SAMPLING = 'MC'                                # 'MC': independent BETA_PDF draws - 'LHS': Latin hypercube - 'SOBOL': scrambled Sobol
+CORRELATION = None                             # Optional rank correlation between variables, e.g. {('fy', 'Es'): 0.5}
+#------------------------------------------------------------------------------------------------
+# Uncertain variables: (MIN, MAX, a, b) of the bounded beta distribution
+VARIABLES = {'Ae': (3800, 3810, 1, 2),         # [mm^2] cross-sectional area of two UNP 12 Brace
+             'fy': (230, 245, 1, 2),           # [N/mm^2] Yield Stress of Brace
+             'Es': (2.0e5, 2.1e5, 1, 2),       # [N/mm^2] Elastic Modulus of Brace
+             'esu': (0.00001, 0.000012, 1, 2), # [1/mm] Ultimate Displacement per Area of Brace
+             'LW': (420, 450, 1, 2),           # [mm] Weld Total Length
+             'AeW': (8, 10, 1, 2),             # [mm^2] Section Area of Weld
+             'fyW': (215, 225, 1, 2),          # [N/mm^2] Yield Stress of Weld
+             'EsW': (2.0e5, 2.1e5, 1, 2),      # [N/mm^2] Elastic Modulus of Weld
+             'esuW': (0.55, 0.65, 1, 2),       # [1/mm] Ultimate Displacement per Area of Weld
+             'M': (60000.0, 65000.0, 2, 1),    # [kg] Mass of the Structure
+             'DR': (0.02, 0.025, 1, 1)}        # Damping Ratio
+X = S09.SAMPLE_DESIGN(VARIABLES, NUM_SIM, METHOD=SAMPLING, CORRELATION=CORRELATION, SEED=SEED)
 #------------------------------------------------------------------------------------------------
 # Define  Steel Material Properties for Brace Element
-Ae = S01.BETA_PDF(3800, 3810, 1, 2, NUM_SIM)                  # [mm^2] cross-sectional area of two UNP 12 Brace
-fy = S01.BETA_PDF(230, 245, 1, 2, NUM_SIM) * Ae               # [N] Yield Force of Structure
+Ae = X['Ae']                                                  # [mm^2] cross-sectional area of two UNP 12 Brace
+fy = X['fy'] * Ae                                             # [N] Yield Force of Structure
 fu = 1.18 * fy                                                # [N] Ultimate Force of Structure
-Es = S01.BETA_PDF(2.0e5, 2.1e5, 1, 2, NUM_SIM) * Ae           # [N/mm] Spring Stiffness
+Es = X['Es'] * Ae                                             # [N/mm] Spring Stiffness
 ey = fy / Es                                                  # [mm] Yield Displacement
-esu = S01.BETA_PDF(0.00001, 0.000012, 1, 2, NUM_SIM) * Ae     # [mm] Ultimate Displacement
+esu = X['esu'] * Ae                                           # [mm] Ultimate Displacement
 Esh = (fu - fy) / (esu - ey)                                  # [N/mm] Displacement Hardening Modulus
 b = Esh / Es                                                  # Displacement Hardening Ratio
 
 # Define  Steel Material Properties for Weld Element
-LW = S01.BETA_PDF(420, 450, 1, 2, NUM_SIM)                    # [mm] Weld Total Length
-AeW = S01.BETA_PDF(8, 10, 1, 2, NUM_SIM)                      # [mm^2] Section Area of Weld
-fyW = S01.BETA_PDF(215, 225, 1, 2, NUM_SIM) * AeW * LW        # [N] Yield Force of Structure - Design Strength (Electrode E35 steel S27
+LW = X['LW']                                                  # [mm] Weld Total Length
+AeW = X['AeW']                                                # [mm^2] Section Area of Weld
+fyW = X['fyW'] * AeW * LW                                     # [N] Yield Force of Structure - Design Strength (Electrode E35 steel S27
 fuW = 1.32 * fyW                                              # [N] Ultimate Force of Structure
-EsW = S01.BETA_PDF(2.0e5, 2.1e5, 1, 2, NUM_SIM) * AeW * LW    # [N/mm] Spring Stiffness
+EsW = X['EsW'] * AeW * LW                                     # [N/mm] Spring Stiffness
 eyW = fyW / EsW                                               # [mm] Yield Displacement
-esuW = S01.BETA_PDF(0.55, 0.65, 1, 2, NUM_SIM) * AeW          # [mm] Ultimate Displacement
+esuW = X['esuW'] * AeW                                        # [mm] Ultimate Displacement
 EshW = (fuW - fyW) / (esuW - eyW)                             # [N/mm] Displacement Hardening Modulus
 bW = EshW / EsW                                               # Displacement Hardening Ratio
 
-M = S01.BETA_PDF(60000.0, 65000.0, 2, 1, NUM_SIM)             # [kg] Mass of the Structure
-DR = S01.BETA_PDF(0.02, 0.025, 1, 1, NUM_SIM)                 # Damping Ratio
+M = X['M']                                                    # [kg] Mass of the Structure
+DR = X['DR']                                                  # Damping Ratio
 u0 = 0.001                                                    # [mm] Initial displacement applied to the node 3
 
 duration = 10.0  # [s] Total simulation duration
@@ -292,31 +318,40 @@ def ANALYSIS_SDOF(i):
 current_time = TI.strftime("%H:%M:%S", TI.localtime())
 print(f"Current time (HH:MM:SS): {current_time}\n\n")
 
-# Initialize lists to store max values
-max_time = []
-max_displacement = []
-max_velocity = []
-max_acceleration = []
-max_base_reaction = []
-max_DI = []
-max_T = []
-max_STIFF = []
-# NUM_SIM is the number of simulations
-for i in range(NUM_SIM):
-    time, displacement, velocity, acceleration, base_reaction, DI, PERIOD, STIFF  = ANALYSIS_SDOF(i)
-    # Calculate and store the max absolute values
-    max_time.append(np.max(np.abs(time)))
-    max_displacement.append(np.max(np.abs(displacement)))
-    max_velocity.append(np.max(np.abs(velocity)))
-    max_acceleration.append(np.max(np.abs(acceleration)))
-    max_base_reaction.append(np.max(np.abs(base_reaction)))
-    #max_DI.append(np.max(np.abs(DI)))
-    max_DI.append(DI[-1])
-    max_T.append(PERIOD)
-    max_STIFF.append(np.max(np.abs(STIFF)))
-    print(f'STEP {i + 1} DONE')
+# Calculate the max absolute values of one realization (runs inside the worker process)
+def MAX_ABS_SDOF(i, OUTPUT):
+    time, displacement, velocity, acceleration, base_reaction, DI, PERIOD, STIFF = OUTPUT
+    return (np.max(np.abs(time)), np.max(np.abs(displacement)), np.max(np.abs(velocity)),
+            np.max(np.abs(acceleration)), np.max(np.abs(base_reaction)), DI[-1], PERIOD,  # DI[-1]: final ductility damage index
+            np.max(np.abs(STIFF)))
+
+SHARED = {'M': M, 'fy': fy, 'fu': fu, 'ey': ey, 'esu': esu, 'fyW': fyW, 'fuW': fuW, 'EsW': EsW, 'eyW': eyW, 'esuW': esuW, 'DR': DR}
+# Everything else the results depend on: a journal of another configuration is not reused (SHARED and ANALYSIS_SDOF are hashed too)
+JOURNAL_CONFIG = {'VARIABLES': VARIABLES, 'SAMPLING': SAMPLING, 'CORRELATION': CORRELATION, 'INPUTS': X, 'u0': u0, 'duration': duration, 'dt': dt}
+if SEQUENTIAL:
+    # Batches of BATCH_SIZE realizations until the running estimates are known within their tolerance
+    # Free vibration from u0 stays elastic: yielding and failure have no event in practice and converge once their
+    # rule-of-three bound is below 1%. Capacity model of RELIABILITY_ANALYSIS: R ~ N(mean fu, std fu), one seeded draw per realization
+    CAPACITY_R = np.random.default_rng(SEED).normal(np.mean(fu), np.std(fu), NUM_SIM)
+    TARGETS = [S04.ProbabilityTarget('P(max displacement >= ey)', lambda i, R: R[1] >= ey[i], TOLERANCE=0.10, P_NEGLIGIBLE=0.01),
+               S04.ProbabilityTarget('P_f (base reaction >= R)', lambda i, R: R[4] >= CAPACITY_R[i], TOLERANCE=0.10, P_NEGLIGIBLE=0.01),
+               S04.MeanTarget('Mean max base reaction', lambda i, R: R[4], TOLERANCE=0.01),
+               S04.MeanTarget('Mean period', lambda i, R: R[6], TOLERANCE=0.01)]
+    RESULTS, THROUGHPUT, SUMMARY = S04.SEQUENTIAL_MONTE_CARLO(ANALYSIS_SDOF, NUM_SIM, TARGETS, BATCH_SIZE=BATCH_SIZE, TIME_BUDGET=TIME_BUDGET,
+                                                              REDUCE_FUN=MAX_ABS_SDOF, SEED=SEED, MAX_WORKERS=MAX_WORKERS, JOURNAL=JOURNAL, SHARED=SHARED,
+                                                              CONFIG=JOURNAL_CONFIG)
+    # Keep the inputs of the realizations that were needed
+    NUM_SIM = SUMMARY['NUM_SIM']
+    fy, fu, Es, ey, esu, b, M, DR = [V[:NUM_SIM] for V in (fy, fu, Es, ey, esu, b, M, DR)]
 else:
-    print('Analysis completed successfully')
+    # NUM_SIM is the number of simulations - realizations are spread over MAX_WORKERS processes
+    RESULTS, THROUGHPUT = S04.PARALLEL_MONTE_CARLO(ANALYSIS_SDOF, NUM_SIM, REDUCE_FUN=MAX_ABS_SDOF, SEED=SEED, MAX_WORKERS=MAX_WORKERS, JOURNAL=JOURNAL,
+                                                   SHARED=SHARED, CONFIG=JOURNAL_CONFIG)
+max_time, max_displacement, max_velocity, max_acceleration, max_base_reaction, max_DI, max_T, max_STIFF = [list(X) for X in zip(*RESULTS)]
+print('Analysis completed successfully')
+
+# Re-run the last realization in this process for the time-history plots
+time, displacement, velocity, acceleration, base_reaction, DI, PERIOD, STIFF = ANALYSIS_SDOF(NUM_SIM - 1)
 
 current_time = TI.strftime("%H:%M:%S", TI.localtime())
 print(f"Current time (HH:MM:SS): {current_time}\n\n")
@@ -597,3 +632,27 @@ DATA = max_DI # If not using a file, replace None with a NumPy array of data
 
 S03.MARKOV_CHAIN(FILE_TF, file_path, DATA)
 #------------------------------------------------------------------------------------------------
+# SUBSET SIMULATION FOR SMALL FAILURE PROBABILITIES
+# Limit state g = R - D: normal capacity R against the base reaction D of the weld connection analysis of the sampled variables
+if SUBSET:
+    def SUBSET_LIMIT_STATE(Z):
+        global fy, fu, ey, esu, fyW, fuW, EsW, eyW, esuW, bW, M, DR
+        X = S09.BETA_FROM_NORMAL(VARIABLES, Z[:, :-1])
+        fy = X['fy'] * X['Ae']
+        fu = 1.18 * fy
+        ey = fy / (X['Es'] * X['Ae'])
+        esu = X['esu'] * X['Ae']
+        fyW = X['fyW'] * X['AeW'] * X['LW']
+        fuW = 1.32 * fyW
+        EsW = X['EsW'] * X['AeW'] * X['LW']
+        eyW = fyW / EsW
+        esuW = X['esuW'] * X['AeW']
+        bW = (fuW - fyW) / (esuW - eyW) / EsW
+        M, DR = X['M'], X['DR']
+        RESULTS, _ = S04.PARALLEL_MONTE_CARLO(ANALYSIS_SDOF, len(Z), REDUCE_FUN=MAX_ABS_SDOF, SEED=SEED, MAX_WORKERS=MAX_WORKERS, PRINT_EVERY=0,
+                                              SHARED={'M': M, 'fy': fy, 'fu': fu, 'ey': ey, 'esu': esu, 'fyW': fyW, 'fuW': fuW,
+                                                      'EsW': EsW, 'eyW': eyW, 'esuW': esuW, 'bW': bW, 'DR': DR})
+        CAPACITY = mean_capacity + std_dev_capacity * Z[:, -1]
+        return CAPACITY - np.array([R[4] for R in RESULTS])
+    P_f_SUBSET, COV_SUBSET, CALLS_SUBSET = S01.SUBSET_SIMULATION(SUBSET_LIMIT_STATE, len(VARIABLES) + 1, N=SUBSET_N, P0=0.1, SEED=SEED)
+#------------------------------------------------------------------------------------------------
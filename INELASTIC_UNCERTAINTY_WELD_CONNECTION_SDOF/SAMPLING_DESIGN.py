@@ -0,0 +1,124 @@
+"""
+Latin hypercube and scrambled Sobol designs for bounded beta input variables.
+
+SALAR_MATH.BETA_PDF draws every variable independently with np.random.beta, so tail quantiles
+of the responses need very large NUM_SIM. SAMPLE_DESIGN draws the same bounded beta marginals
+from a space-filling design on the unit hypercube and maps every column through the beta
+inverse CDF:
+
+    X = MIN + (MAX - MIN) * beta.ppf(U, a, b)
+
+- 'MC'    -> SALAR_MATH.BETA_PDF (plain Monte Carlo, one variable after the other)
+- 'LHS'   -> Latin hypercube: every variable is stratified into NUM_SIM equal-probability bins
+- 'SOBOL' -> Scrambled Sobol sequence (best balanced for NUM_SIM = 2^m)
+
+Variables are declared by name as (MIN, MAX, a, b), e.g. {'fy': (0.39, 0.41, 1, 2), ...}.
+An optional target rank (Spearman) correlation between variables is induced with the
+Iman-Conover method: the columns are reordered, so every marginal keeps its stratification.
+For Sobol designs the reordering keeps the one-dimensional balance but not the joint
+low-discrepancy structure.
+"""
+import numpy as np
+from scipy.stats import beta, norm, qmc
+from SALAR_MATH import BETA_PDF
+
+# -----------------------------------------------
+
+def UNIT_DESIGN(NUM_VAR, NUM_SIM, METHOD='LHS', SEED=None):
+    # Points in the unit hypercube, shape (NUM_SIM, NUM_VAR)
+    if METHOD == 'LHS':
+        return qmc.LatinHypercube(d=NUM_VAR, seed=SEED).random(NUM_SIM)
+    if METHOD == 'SOBOL':
+        SAMPLER = qmc.Sobol(d=NUM_VAR, scramble=True, seed=SEED)
+        M = int(np.log2(NUM_SIM))
+        if 2 ** M == NUM_SIM:
+            return SAMPLER.random_base2(M)
+        return SAMPLER.random(NUM_SIM)
+    if METHOD == 'MC':
+        return np.random.default_rng(SEED).random((NUM_SIM, NUM_VAR))
+    raise ValueError(f'Unknown sampling method: {METHOD}')
+
+# -----------------------------------------------
+
+def CORRELATION_MATRIX(NAMES, CORRELATION):
+    # CORRELATION: {('fy', 'Es'): 0.5, ...} or a full matrix ordered as NAMES
+    if isinstance(CORRELATION, dict):
+        C = np.eye(len(NAMES))
+        for (NAME_I, NAME_J), RHO in CORRELATION.items():
+            I, J = NAMES.index(NAME_I), NAMES.index(NAME_J)
+            C[I, J] = C[J, I] = RHO
+        return C
+    return np.asarray(CORRELATION, dtype=float)
+
+# -----------------------------------------------
+
+def IMAN_CONOVER(U, RANK_CORRELATION, SEED=None):
+    """
+    Reorder the columns of U to induce a target rank correlation (Iman & Conover, 1982).
+
+    Parameters:
+    - U (np.array): Sample matrix (NUM_SIM, NUM_VAR); the values of every column are kept.
+    - RANK_CORRELATION (np.array): Target Spearman correlation matrix (NUM_VAR, NUM_VAR).
+    - SEED (int): Seed of the random score permutations.
+
+    Returns:
+    - U_CORR (np.array): Column-wise permutation of U with the target rank correlation.
+    """
+    N, D = U.shape
+    RNG = np.random.default_rng(SEED)
+    # Normal scores, one independent permutation per column
+    SCORES = norm.ppf(np.arange(1, N + 1) / (N + 1))
+    Z = np.column_stack([RNG.permutation(SCORES) for _ in range(D)])
+    # Spearman to Pearson correlation of the normal scores
+    TARGET = 2.0 * np.sin(np.pi * np.asarray(RANK_CORRELATION) / 6.0)
+    P = np.linalg.cholesky(TARGET)
+    Q = np.linalg.cholesky(np.corrcoef(Z, rowvar=False))
+    T = Z @ np.linalg.inv(Q).T @ P.T
+    U_CORR = np.empty_like(U)
+    for K in range(D):
+        RANKS = np.argsort(np.argsort(T[:, K]))
+        U_CORR[:, K] = np.sort(U[:, K])[RANKS]
+    return U_CORR
+
+# -----------------------------------------------
+
+def SAMPLE_DESIGN(VARIABLES, NUM_SIM, METHOD='LHS', CORRELATION=None, SEED=None):
+    """
+    Sample named bounded beta variables.
+
+    Parameters:
+    - VARIABLES (dict): {NAME: (MIN_X, MAX_X, a, b)} as in SALAR_MATH.BETA_PDF.
+    - NUM_SIM (int): Number of samples.
+    - METHOD (str): 'MC', 'LHS' or 'SOBOL'.
+    - CORRELATION (dict or np.array): Optional target rank correlation between variables.
+    - SEED (int): Seed of the design.
+
+    Returns:
+    - SAMPLES (dict): {NAME: np.array of NUM_SIM values}.
+    """
+    NAMES = list(VARIABLES)
+    if METHOD == 'MC' and CORRELATION is None:
+        if SEED is not None:
+            np.random.seed(SEED)  # Same draws on a resumed run
+        return {NAME: BETA_PDF(*VARIABLES[NAME], NUM_SIM) for NAME in NAMES}
+    U = UNIT_DESIGN(len(NAMES), NUM_SIM, METHOD, SEED)
+    if CORRELATION is not None:
+        U = IMAN_CONOVER(U, CORRELATION_MATRIX(NAMES, CORRELATION), SEED)
+    SAMPLES = {}
+    for K, NAME in enumerate(NAMES):
+        MIN_X, MAX_X, a, b = VARIABLES[NAME]
+        SAMPLES[NAME] = MIN_X + (MAX_X - MIN_X) * beta.ppf(U[:, K], a, b)
+    return SAMPLES
+
+# -----------------------------------------------
+
+def BETA_FROM_NORMAL(VARIABLES, Z):
+    # Map independent standard normal columns Z (n, NUM_VAR) to the bounded beta variables (e.g. for subset simulation)
+    U = norm.cdf(np.asarray(Z))
+    SAMPLES = {}
+    for K, NAME in enumerate(VARIABLES):
+        MIN_X, MAX_X, a, b = VARIABLES[NAME]
+        SAMPLES[NAME] = MIN_X + (MAX_X - MIN_X) * beta.ppf(U[:, K], a, b)
+    return SAMPLES
+
+# -----------------------------------------------
@@ -1,4 +1,109 @@
 import numpy as np
+import os
+import atexit
+
+# Plot mode of every plotting helper (HISROGRAM_BOXPLOT, PLOT_HEATMAP, PLOT_TIME_HISTORY, PLOT_SCATTER, CLUSTER_DATA,
+# PREDICT_LSTM, RELIABILITY_ANALYSIS, RANDOM_FOREST, NEURAL_NETWORK_FAILURE_PROBABILIYY_ESTIMATION):
+# - 'SHOW'  : every figure is shown with plt.show() (interactive, blocks until it is closed)
+# - 'FILE'  : every figure is saved as PNG in PLOT_DIR by a background process with the non-interactive Agg backend
+# - 'DEFER' : figures are queued and saved as PNG in PLOT_DIR by RENDER_PLOTS() at the end of the run
+# The numeric summaries are computed and returned right away in every mode, so the analysis never waits on
+# matplotlib. The mode is set with PLOT_BATCH() or, without editing a script, with the environment variables
+# SALAR_PLOT_MODE and SALAR_PLOT_DIR (e.g. on headless cluster nodes).
+PLOT_MODE = os.environ.get('SALAR_PLOT_MODE', 'SHOW')
+PLOT_DIR = os.environ.get('SALAR_PLOT_DIR', 'FIGURES')
+_PLOT_COUNT = 0
+_PLOT_QUEUE = []
+_PLOT_FUTURES = []
+_PLOT_POOL = None
+_FIGURE_PREFIX = 'FIGURE'
+_FIGURE_COUNT = 0
+
+# -------------------------------------------------
+
+def PLOT_BATCH(MODE='FILE', DIRECTORY='FIGURES'):
+    # Switch the plotting helpers to 'SHOW', 'FILE' or 'DEFER'
+    global PLOT_MODE, PLOT_DIR
+    if MODE not in ('SHOW', 'FILE', 'DEFER'):
+        raise ValueError(f'Unknown plot mode: {MODE}')
+    PLOT_MODE, PLOT_DIR = MODE, DIRECTORY
+
+# -------------------------------------------------
+
+def _SHOW(plt):
+    # End of a figure: shown in 'SHOW' mode, otherwise saved and closed
+    global _FIGURE_COUNT
+    if PLOT_MODE == 'SHOW':
+        plt.show()
+        return
+    _FIGURE_COUNT += 1
+    os.makedirs(PLOT_DIR, exist_ok=True)
+    plt.savefig(os.path.join(PLOT_DIR, f'{_FIGURE_PREFIX}_{_FIGURE_COUNT}.png'))
+    plt.close('all')
+
+# -------------------------------------------------
+
+def _RENDER(DRAW_FUN, ARGS, PREFIX, DIRECTORY):
+    # Draw the figures of one helper call to files with the Agg backend
+    global PLOT_MODE, PLOT_DIR, _FIGURE_PREFIX, _FIGURE_COUNT
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    SAVED = PLOT_MODE, PLOT_DIR
+    PLOT_MODE, PLOT_DIR, _FIGURE_PREFIX, _FIGURE_COUNT = 'FILE', DIRECTORY, PREFIX, 0
+    try:
+        DRAW_FUN(*ARGS)
+    finally:
+        PLOT_MODE, PLOT_DIR = SAVED
+    return _FIGURE_COUNT
+
+# -------------------------------------------------
+
+def _PLOT(DRAW_FUN, NAME, *ARGS):
+    # Draw now ('SHOW'), in the background process ('FILE') or at the end of the run ('DEFER')
+    global _PLOT_COUNT, _PLOT_POOL
+    if PLOT_MODE == 'SHOW':
+        DRAW_FUN(*ARGS)
+        return
+    _PLOT_COUNT += 1
+    TASK = (DRAW_FUN, ARGS, f"{_PLOT_COUNT:03d}_{''.join(C if C.isalnum() else '_' for C in str(NAME))[:60]}", PLOT_DIR)
+    import multiprocessing
+    if PLOT_MODE == 'DEFER' or 'fork' not in multiprocessing.get_all_start_methods():
+        _PLOT_QUEUE.append(TASK)  # Without 'fork' a background process would re-run the script
+        return
+    if _PLOT_POOL is None:
+        import concurrent.futures
+        _PLOT_POOL = concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('fork'))
+    _PLOT_FUTURES.append(_PLOT_POOL.submit(_RENDER, *TASK))
+
+# -------------------------------------------------
+
+def RENDER_PLOTS():
+    """
+    Finish the figures of the batch modes: render the 'DEFER' queue and wait for the background process.
+    It is registered with atexit, so a script only calls it to have the files before it ends.
+
+    Returns:
+    - NUM_FIGURES (int): Number of figure files written.
+    """
+    global _PLOT_POOL
+    NUM_FIGURES = 0
+    while _PLOT_QUEUE:
+        NUM_FIGURES += _RENDER(*_PLOT_QUEUE.pop(0))
+    for FUTURE in _PLOT_FUTURES:
+        try:
+            NUM_FIGURES += FUTURE.result()
+        except Exception as error:
+            print(f'Figure not rendered: {error}')
+    _PLOT_FUTURES.clear()
+    if _PLOT_POOL is not None:
+        _PLOT_POOL.shutdown()
+        _PLOT_POOL = None
+    if NUM_FIGURES > 0:
+        print(f'{NUM_FIGURES} figures written to {PLOT_DIR}')
+    return NUM_FIGURES
+
+atexit.register(RENDER_PLOTS)
+
 # -------------------------------------------------     
     
 def BETA_PDF(MIN_X, MAX_X, a, b, n):
@@ -40,7 +145,14 @@ def HISROGRAM_BOXPLOT(X, HISTO_COLOR, LABEL):
     print(f'kurtosis: {kurtosis(X) :.6e}')
     print(f"90% Confidence Interval: ({lower_bound:.6e}, {upper_bound:.6e})")
     print("-------------------------")
+    STATS = {'MIN': MINIMUM, 'Q1': q1, 'MEDIAN': MEDIAN, 'MEAN': MEAN, 'STD': STD, 'Q3': q3, 'MAX': MAXIMUM,
+             'SKEW': SKEW, 'KURT': KURT, 'Q05': lower_bound, 'Q95': upper_bound}
+    _PLOT(_DRAW_HISROGRAM_BOXPLOT, LABEL, X, HISTO_COLOR, LABEL, STATS)
+    return STATS
 
+def _DRAW_HISROGRAM_BOXPLOT(X, HISTO_COLOR, LABEL, STATS):
+    import matplotlib.pyplot as plt
+    MEAN, STD, MEDIAN, q1, q3 = STATS['MEAN'], STATS['STD'], STATS['MEDIAN'], STATS['Q1'], STATS['Q3']
     plt.figure(figsize=(10,6))
     # Plot histogram of data
     count, bins, ignored = plt.hist(X, bins=100, color=HISTO_COLOR, density=True, align='mid')#, edgecolor="black"
@@ -64,7 +176,7 @@ def HISROGRAM_BOXPLOT(X, HISTO_COLOR, LABEL):
     plt.title(f"Histogram - Probability of Positive {LABEL} is {100*prob:.2f} %")
     plt.legend()
     #plt.grid()
-    plt.show()
+    _SHOW(plt)
 
     #Plot boxplot with outliers
     plt.figure(figsize=(10,6))
@@ -86,15 +198,18 @@ def HISROGRAM_BOXPLOT(X, HISTO_COLOR, LABEL):
     plt.title(f"Boxplot of {LABEL}")
     plt.legend()
     plt.grid()
-    plt.show()
+    _SHOW(plt)
     
 # ----------------------------------------------- 
 def PLOT_HEATMAP(df):
-    import matplotlib.pyplot as plt
-    import numpy as np
-
     # Calculate the correlation matrix
     corr_matrix = df.corr()
+    _PLOT(_DRAW_PLOT_HEATMAP, 'Correlation Heatmap', corr_matrix)
+    return corr_matrix
+
+def _DRAW_PLOT_HEATMAP(corr_matrix):
+    import matplotlib.pyplot as plt
+    import numpy as np
 
     # Create the figure and axis
     fig, ax = plt.subplots(figsize=(12, 12))
@@ -124,7 +239,7 @@ def PLOT_HEATMAP(df):
     
     # Display the plot
     plt.tight_layout()
-    plt.show()
+    _SHOW(plt)
 
 # -----------------------------------------------
      
@@ -160,6 +275,10 @@ def PREDICT_LSTM(x, y, Demand_X, look_back, ITERATION, XLABEL, YLABEL):
     #print(predicted_y)
     
     # Plot the results
+    _PLOT(_DRAW_PREDICT_LSTM, 'LSTM Prediction', x, y, next_x, predicted_y, XLABEL, YLABEL)
+    return predicted_y
+
+def _DRAW_PREDICT_LSTM(x, y, next_x, predicted_y, XLABEL, YLABEL):
     import matplotlib.pyplot as plt
     plt.figure(figsize=(10, 6))
     plt.scatter(x, y, color='blue', marker='+', label='DDI')
@@ -169,7 +288,7 @@ def PREDICT_LSTM(x, y, Demand_X, look_back, ITERATION, XLABEL, YLABEL):
     plt.ylabel(YLABEL)
     plt.legend()
     plt.grid()
-    plt.show()
+    _SHOW(plt)
 
 # -----------------------------------------------  
   
@@ -213,6 +332,15 @@ def RELIABILITY_ANALYSIS(base_reaction, num_sim, mean_capacity, std_dev_capacity
     reliability_index = mu_g / sigma_g
     
     # Visualization
+    _PLOT(_DRAW_RELIABILITY_ANALYSIS, 'Reliability Analysis', element_capacity, base_reaction)
+
+    # Print results
+    print(f"Probability of Failure (P_f): {probability_of_failure:.6f}")
+    print(f"Reliability Index (β): {reliability_index:.2f}")
+
+    return probability_of_failure, reliability_index
+
+def _DRAW_RELIABILITY_ANALYSIS(element_capacity, base_reaction):
     import matplotlib.pyplot as plt
     plt.figure(figsize=(10, 6))
     plt.hist(element_capacity, bins=50, color='blue', alpha=0.7, label="R: Element Capacity")
@@ -222,13 +350,7 @@ def RELIABILITY_ANALYSIS(base_reaction, num_sim, mean_capacity, std_dev_capacity
     plt.ylabel("Frequency")
     plt.legend()
     plt.grid(True)
-    plt.show()
-
-    # Print results
-    print(f"Probability of Failure (P_f): {probability_of_failure:.6f}")
-    print(f"Reliability Index (β): {reliability_index:.2f}")
-
-    return probability_of_failure, reliability_index
+    _SHOW(plt)
 
 # ----------------------------------------------- 
 
@@ -297,17 +419,24 @@ def RANDOM_FOREST(df):
     print(f"R2 Score: {r2_score(y_test, y_pred_reg):.6f}")
 
     # Step 5: Visualize feature importance
+    feature_importance = clf.feature_importances_
+    _PLOT(_DRAW_RANDOM_FOREST, 'Feature Importance', feature_importance, list(X.columns))
+    return clf, reg
+
+def _DRAW_RANDOM_FOREST(feature_importance, columns):
     import matplotlib.pyplot as plt
+    import seaborn as sns
 
-    feature_importance = clf.feature_importances_
-    sns.barplot(x=feature_importance, y=X.columns)
+    sns.barplot(x=feature_importance, y=columns)
     plt.title("Feature Importance")
-    plt.show()
-    
+    _SHOW(plt)
+
 # -----------------------------------------------   
 
 def PLOT_TIME_HISTORY(time, displacement, velocity, acceleration, base_reaction):
-    
+    _PLOT(_DRAW_PLOT_TIME_HISTORY, 'Time History', time, displacement, velocity, acceleration, base_reaction)
+
+def _DRAW_PLOT_TIME_HISTORY(time, displacement, velocity, acceleration, base_reaction):
     import matplotlib.pyplot as plt
     plt.figure(figsize=(18, 20))
 
@@ -344,12 +473,11 @@ def PLOT_TIME_HISTORY(time, displacement, velocity, acceleration, base_reaction)
     plt.grid(True)
 
     plt.tight_layout()
-    plt.show()
+    _SHOW(plt)
     
 # -----------------------------------------------          
 # Create a scatter plot
 def PLOT_SCATTER(X, Y , XLABEL, YLABEL, TITLE, COLOR, LOG, ORDER):
-    import matplotlib.pyplot as plt
     # Calculate linear regression parameters
     import numpy as np
     coefficients = np.polyfit(X, Y, ORDER)
@@ -394,6 +522,12 @@ def PLOT_SCATTER(X, Y , XLABEL, YLABEL, TITLE, COLOR, LOG, ORDER):
     # Calculate R-squared
     R_squared = 1 - (RSS / TSS)
     #print(f"R-squared value: {R_squared:.4f}")
+    _PLOT(_DRAW_PLOT_SCATTER, TITLE, X, Y, y, coefficients, R_squared, XLABEL, YLABEL, TITLE, COLOR, LOG, ORDER)
+    return coefficients, R_squared
+
+def _DRAW_PLOT_SCATTER(X, Y, y, coefficients, R_squared, XLABEL, YLABEL, TITLE, COLOR, LOG, ORDER):
+    import matplotlib.pyplot as plt
+    a, b, c, d, e, f, I, J = list(coefficients) + [0.0] * (8 - len(coefficients))
     plt.figure(figsize=(10,6))
     plt.scatter(X, Y, color=COLOR, marker='o', label='Data')
     # Add labels and title
@@ -420,7 +554,7 @@ def PLOT_SCATTER(X, Y , XLABEL, YLABEL, TITLE, COLOR, LOG, ORDER):
     plt.legend()
     if LOG == 1:
         plt.semilogx();plt.semilogy();
-    plt.show()
+    _SHOW(plt)
 # ----------------------------------------------- 
 # Cluster the Data
 def CLUSTER_DATA(X, Y, XLABEL, YLABEL, MAX_CLUSTERS):
@@ -428,7 +562,6 @@ def CLUSTER_DATA(X, Y, XLABEL, YLABEL, MAX_CLUSTERS):
     from sklearn.preprocessing import StandardScaler
     from sklearn.cluster import KMeans
     from sklearn.linear_model import LinearRegression
-    import matplotlib.pyplot as plt
     # Combine x and y into a single dataset and scale
     x = np.array(X);y = np.array(Y);
     data = np.column_stack((x, y))
@@ -469,7 +602,11 @@ def CLUSTER_DATA(X, Y, XLABEL, YLABEL, MAX_CLUSTERS):
             best_clusters = clusters
 
     print(f"Optimal clusters: {best_k}, R²: {best_r2:.4f}")
+    _PLOT(_DRAW_CLUSTER_DATA, f'{XLABEL} vs {YLABEL} Clusters', x, y, best_clusters, best_k, best_r2, XLABEL, YLABEL)
+    return best_k, best_r2, best_clusters
 
+def _DRAW_CLUSTER_DATA(x, y, best_clusters, best_k, best_r2, XLABEL, YLABEL):
+    import matplotlib.pyplot as plt
     # Plot clustered data
     plt.figure(figsize=(10, 6))
     for i in range(best_k):
@@ -480,7 +617,7 @@ def CLUSTER_DATA(X, Y, XLABEL, YLABEL, MAX_CLUSTERS):
     plt.ylabel(YLABEL)
     plt.legend()
     plt.grid(True)
-    plt.show()
+    _SHOW(plt)
 # -----------------------------------------------     
 
 ### NEURAL NETWORK FOR FAILURE PROBABILIYY ESTIMATION
@@ -538,10 +675,14 @@ def NEURAL_NETWORK_FAILURE_PROBABILIYY_ESTIMATION(CAPACITY, LOAD, num_samples):
     print(f"Predicted Failure Probability (Neural Network): {failure_probability_ann:.6f}")
 
     # Plot training accuracy
-    plt.plot(history.history['accuracy'], label='Train Accuracy')
-    plt.plot(history.history['val_accuracy'], label='Validation Accuracy')
+    _PLOT(_DRAW_NEURAL_NETWORK_FAILURE_PROBABILIYY_ESTIMATION, 'Training Accuracy', history.history)
+    return failure_probability_ann, failure_probability_true
+
+def _DRAW_NEURAL_NETWORK_FAILURE_PROBABILIYY_ESTIMATION(history):
+    import matplotlib.pyplot as plt
+    plt.plot(history['accuracy'], label='Train Accuracy')
+    plt.plot(history['val_accuracy'], label='Validation Accuracy')
     plt.xlabel('Epoch')
     plt.ylabel('Accuracy')
     plt.legend()
-    plt.show()
-        
\ No newline at end of file
+    _SHOW(plt)
@@ -53,6 +53,7 @@ import openseespy.opensees as ops
 from Analysis_Function import ANALYSIS
 import SALAR_MATH as S01
 import MARKOV_CHAIN as S03
+import MONTE_CARLO_PARALLEL as S04
 from CONCRETE_FIBERTHERMAL_SECTION import R_RECTANGULAR_CONCRETE_SECTION_REBAR_B, R_RECTANGULAR_CONCRETE_SECTION_REBAR_C
 
 #--------------------------------------------------------------------
@@ -61,6 +62,13 @@ num_stories = 3        # Number of Stories
 num_bays = 4           # Number of Bays
 
 NUM_SIM = 6000                                          # NUMBER OF SIMULATIONS
+SEED = 2025                                             # Master seed of the Monte Carlo realizations
+MAX_WORKERS = None                                      # Worker processes for the Monte Carlo (None: all cores, 1: serial)
+JOURNAL = None                                          # Results journal to resume from, e.g. '2D_Concrete_Frame_Thermal_Uncertainty_JOURNAL' (None: no journal)
+SEQUENTIAL = False                                      # Stop once the TARGETS of the run converge (NUM_SIM is then the maximum)
+BATCH_SIZE = 200                                        # Realizations between two convergence checks of the sequential run
+TIME_BUDGET = None                                      # [s] Wall-clock budget of the sequential run (None: no budget)
+np.random.seed(SEED)                                    # Same sampled parameters on a resumed run
 story_height = S01.BETA_PDF(2950, 3150, 2, 1, NUM_SIM)  # [mm] Height of each story
 bay_width = S01.BETA_PDF(6950, 7150, 2, 1, NUM_SIM)     # [mm] Width of each bay
 
@@ -291,24 +299,43 @@ def TEMP_ANAL(I):
     return temp, dispX, dispY, mid_node
 
 #--------------------------------------------------------------------
-# Analysis Durations:
-starttime = TI.process_time()
+# Calculate the max absolute values of one realization (runs inside the worker process)
+def MAX_ABS_TEMP(I, OUTPUT):
+    temp, dispX, dispY, mid_node = OUTPUT
+    return np.max(np.abs(dispX)), np.max(np.abs(dispY)), np.max(np.abs(temp))
 
-# Initialize lists to store max values
-max_displacement_X = []
-max_displacement_Y = []
-max_temp = []
+#--------------------------------------------------------------------
+# Analysis Durations:
+starttime = TI.time()
+
+# NUM_SIM is the number of simulations - realizations are spread over MAX_WORKERS processes
+# (every worker wipes its domain after a realization, which also closes that realization's recorder files)
+SHARED = {'story_height': story_height, 'bay_width': bay_width, 'fy': fy, 'Es': Es, 'b': b,
+          'fcp': fcp, 'epsc0': epsc0, 'fpcu': fpcu, 'epsU': epsU, 'lamda': lamda, 'ft': ft, 'Ets': Ets,
+          'Max_Thermal': Max_Thermal, 'distributed_load': distributed_load, 'B': B, 'H': H, 'COVER': COVER, 'RD': RD}
+# Everything else the results depend on: a journal of another configuration is not reused (SHARED and TEMP_ANAL are hashed too)
+JOURNAL_CONFIG = {'num_stories': num_stories, 'num_bays': num_bays, 'NUM_B': NUM_B, 'NUM_H': NUM_H, 'Nstep': Nstep, 'Incr_Temp': Incr_Temp,
+                  'MAX_ITERATIONS': MAX_ITERATIONS, 'MAX_TOLERANCE': MAX_TOLERANCE,
+                  'SECTIONS': [R_RECTANGULAR_CONCRETE_SECTION_REBAR_B, R_RECTANGULAR_CONCRETE_SECTION_REBAR_C]}
+if SEQUENTIAL:
+    # Batches of BATCH_SIZE realizations until the running estimates are known within their tolerance
+    TARGETS = [S04.MeanTarget('Mean max displacement Y', lambda I, R: R[1], TOLERANCE=0.01),
+               S04.QuantileTarget('95th percentile displacement Y', lambda I, R: R[1], 0.95, TOLERANCE=0.02)]
+    RESULTS, THROUGHPUT, SUMMARY = S04.SEQUENTIAL_MONTE_CARLO(TEMP_ANAL, NUM_SIM, TARGETS, BATCH_SIZE=BATCH_SIZE, TIME_BUDGET=TIME_BUDGET,
+                                                              REDUCE_FUN=MAX_ABS_TEMP, SEED=SEED, MAX_WORKERS=MAX_WORKERS, SHARED=SHARED,
+                                                              JOURNAL=JOURNAL, CONFIG=JOURNAL_CONFIG)
+    NUM_SIM = SUMMARY['NUM_SIM']  # Samples actually needed (recorder files exist for these only)
+    Max_Thermal = Max_Thermal[:NUM_SIM]
+else:
+    RESULTS, THROUGHPUT = S04.PARALLEL_MONTE_CARLO(TEMP_ANAL, NUM_SIM, REDUCE_FUN=MAX_ABS_TEMP, SEED=SEED, MAX_WORKERS=MAX_WORKERS, SHARED=SHARED,
+                                                   JOURNAL=JOURNAL, CONFIG=JOURNAL_CONFIG)
+max_displacement_X, max_displacement_Y, max_temp = [list(X) for X in zip(*RESULTS)]
 max_base_reaction = []
-# NUM_SIM is the number of simulations
-for i in range(NUM_SIM):
-    temp, dispX, dispY, mid_node = TEMP_ANAL(i)
-    # Calculate and store the max absolute values
-    max_displacement_X.append(np.max(np.abs(dispX)))
-    max_displacement_Y.append(np.max(np.abs(dispY)))
-    max_temp.append(np.max(np.abs(temp)))
-    print(f'STEP {i + 1} DONE')    
 
-totaltime = TI.process_time() - starttime
+# Re-run the last realization in this process, so PLOT_FRAME finds its deformed domain
+temp, dispX, dispY, mid_node = TEMP_ANAL(NUM_SIM - 1)
+
+totaltime = TI.time() - starttime
 print(f'\nTotal time (s): {totaltime:.4f} \n\n') 
 #--------------------------------------------------------------------
 
@@ -75,6 +75,8 @@ import matplotlib.pyplot as plt
 import SALAR_MATH as S01
 import Analysis_Function as S02
 import MARKOV_CHAIN as S03
+import GROUND_MOTION_STORE as S07
+import KANAI_TAJIMI_GENERATOR as S10
 
 # The selection of alpha and beta coefficients in the beta probability distribution is crucial.
 # In uncertainty analysis, careful consideration must also be given to the numerical interval (maximum and minimum) and the alpha and beta coefficients.
@@ -90,6 +92,12 @@ DR = S01.BETA_PDF(0.01, 0.03, 1, 1, NUM_SIM)     # Damping ratio
 
 duration = 15.0  # [s] Total simulation duration
 dt = 0.01        # [s] Time step
+GM_SOURCE = 'STORE'                       # 'STORE': records written by KANAI_TAJIMI.py - 'LAZY': record i generated on demand from (GM_SEED, i)
+GM_SEED = 2025                            # Master seed of the lazy ground-motion source
+if GM_SOURCE == 'LAZY':
+    STORE = S10.KanaiTajimiSource(NUM_SIM, dt, SEED=GM_SEED, CACHE_SIZE=8)  # Nothing to pre-generate
+else:
+    STORE = S07.OPEN_STORE('GROUND_MOTIONS')  # Ground-motion store written by KANAI_TAJIMI.py
 #------------------------------------------------------------------------------------------------
 # Define Analysis Properties
 MAX_ITERATIONS = 1000000   # Convergence iteration for test
@@ -136,7 +144,9 @@ def ANALYSIS_SDOF(i):
     
     # Apply seismic accelerations    
     # Define time series for input motion (Acceleration time history)
-    ops.timeSeries('Path', 1, '-dt', 0.01, '-filePath', f'Ground_Acceleration_{i+1}.txt', '-factor', GMfact) # SEISMIC-X
+    gm_accels, gm_dt = S07.READ_RECORD(STORE, i)  # Assumes acceleration in m/s²
+    ops.timeSeries('Path', 1, '-dt', gm_dt, '-values', *gm_accels.tolist(), '-factor', GMfact) # SEISMIC-X
+    #ops.timeSeries('Path', 1, '-dt', 0.01, '-filePath', f'Ground_Acceleration_{i+1}.txt', '-factor', GMfact) # SEISMIC-X
         
     # Define load patterns
     # pattern UniformExcitation $patternTag $dof -accel $tsTag <-vel0 $vel0> <-fact $cFact>
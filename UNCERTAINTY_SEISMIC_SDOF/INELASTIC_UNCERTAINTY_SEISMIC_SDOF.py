@@ -76,25 +76,64 @@ import time as ti
 import SALAR_MATH as S01
 import Analysis_Function as S02
 import MARKOV_CHAIN as S03
+import MONTE_CARLO_PARALLEL as S04
+import NEWMARK_SDOF_BATCH as S05
+import MODEL_TEMPLATE as S06
+import GROUND_MOTION_STORE as S07
+import RESPONSE_REDUCERS as S08
+import SAMPLING_DESIGN as S09
+import KANAI_TAJIMI_GENERATOR as S10
+import INTENSITY_MEASURES as S11
 from scipy.stats import norm
 
 #------------------------------------------------------------------------------------------------
 # Define parameters (units: m, N)
 NUM_SIM = 6000                                   # Total number for simulation
+SEED = 2025                                      # Master seed of the Monte Carlo realizations
+MAX_WORKERS = None                               # Worker processes for the Monte Carlo (None: all cores, 1: serial)
+JOURNAL = None                                   # Results journal to resume from, e.g. 'INELASTIC_UNCERTAINTY_SEISMIC_SDOF_JOURNAL' (None: no journal)
+SEQUENTIAL = False                               # Stop once the TARGETS of the run converge (NUM_SIM is then the maximum)
+BATCH_SIZE = 200                                 # Realizations between two convergence checks of the sequential run
+DUCTILITY_LIMIT = 15.0                           # Peak ductility demand (max displacement / ey) of the exceedance target of the sequential run
+TIME_BUDGET = None                               # [s] Wall-clock budget of the sequential run (None: no budget)
+SUBSET = False                                   # Subset simulation of small failure probabilities after the Monte Carlo
+SUBSET_N = 500                                   # Samples per subset level
+ENGINE = 'OPENSEES'                              # 'OPENSEES': one OpenSees model per realization - 'BATCH': all realizations at once in NumPy
+SAMPLING = 'MC'                                  # 'MC': independent BETA_PDF draws - 'LHS': Latin hypercube - 'SOBOL': scrambled Sobol
+INTENSITY = True                                 # Intensity measures of the ground motion of every realization in the results
+CORRELATION = None                               # Optional rank correlation between variables, e.g. {('fy', 'Es'): 0.5}
+#------------------------------------------------------------------------------------------------
+# Uncertain variables: (MIN, MAX, a, b) of the bounded beta distribution
+VARIABLES = {'fy': (0.39, 0.41, 1, 2),           # [N] Yield Force of Structure
+             'Es': (2.0e2, 2.1e2, 1, 2),         # [N/m] Spring Stiffness
+             'esu': (0.33, 0.36, 1, 2),          # [m] Ultimate Displacement
+             'M': (1500.0, 1700.0, 2, 1),        # [kg] Mass of the Structure
+             'DR': (0.01, 0.03, 1, 1)}           # Damping Ratio
+X = S09.SAMPLE_DESIGN(VARIABLES, NUM_SIM, METHOD=SAMPLING, CORRELATION=CORRELATION, SEED=SEED)
 #------------------------------------------------------------------------------------------------
 # Define  Steel Material Properties (Steel01)
-fy = S01.BETA_PDF(0.39, 0.41, 1, 2, NUM_SIM)     # [N] Yield Force of Structure
+fy = X['fy']                                     # [N] Yield Force of Structure
 fu = 1.5 * fy                                    # [N] Ultimate Force of Structure
-Es = S01.BETA_PDF(2.0e2, 2.1e2, 1, 2, NUM_SIM)   # [N/m] Spring Stiffness
+Es = X['Es']                                     # [N/m] Spring Stiffness
 ey = fy / Es                                     # [m] Yield Displacement
-esu = S01.BETA_PDF(0.33, 0.36, 1, 2, NUM_SIM)    # [m] Ultimate Displacement
+esu = X['esu']                                   # [m] Ultimate Displacement
 Esh = (fu - fy) / (esu - ey)                     # [N/m] Displacement Hardening Modulus
 b = Esh / Es                                     # Displacement Hardening Ratio
-M = S01.BETA_PDF(1500.0, 1700.0, 2, 1, NUM_SIM)  # [kg] Mass of the Structure
-DR = S01.BETA_PDF(0.01, 0.03, 1, 1, NUM_SIM)     # Damping Ratio
+M = X['M']                                       # [kg] Mass of the Structure
+DR = X['DR']                                     # Damping Ratio
 
 duration = 15.0  # [s] Total simulation duration
 dt = 0.01        # [s] Time step
+GM_SOURCE = 'STORE'                       # 'STORE': records written by KANAI_TAJIMI.py - 'LAZY': record i generated on demand from (SEED, i)
+if GM_SOURCE == 'LAZY':
+    STORE = S10.KanaiTajimiSource(NUM_SIM, dt, SEED=SEED, CACHE_SIZE=8)  # Nothing to pre-generate, every worker makes its own records
+else:
+    STORE = S07.OPEN_STORE('GROUND_MOTIONS')  # Ground-motion store written by KANAI_TAJIMI.py
+TRACE_INDICES = [NUM_SIM - 1]             # Realizations that keep their full time histories
+RECORD_INDEX = None                       # Ground-motion record of every realization (None: record i for realization i)
+# Everything the results depend on besides ANALYSIS_SDOF and SHARED: a journal of another configuration is not reused
+JOURNAL_CONFIG = {'VARIABLES': VARIABLES, 'SAMPLING': SAMPLING, 'CORRELATION': CORRELATION, 'INPUTS': X, 'duration': duration, 'dt': dt,
+                  'GROUND_MOTIONS': STORE if GM_SOURCE == 'STORE' else GM_SOURCE, 'RECORD_INDEX': RECORD_INDEX, 'TRACE_INDICES': TRACE_INDICES}
 #------------------------------------------------------------------------------------------------
 # Calculate Over Strength Coefficient (Ω0)
 Omega_0 = fu / fy
@@ -130,11 +169,13 @@ S01.HISROGRAM_BOXPLOT(R_mu, HISTO_COLOR='yellow', LABEL='Ductility Coefficient (
 S01.HISROGRAM_BOXPLOT(R, HISTO_COLOR='purple', LABEL='Structural Behavior Coefficient (R)')
 #------------------------------------------------------------------------------------------------
 ### OPENSEES FUNCTION
-def ANALYSIS_SDOF(i):
-    # Initialize OpenSees model
-    ops.wipe()
+# Hysteretic parameters updated for every realization (pinching, damage and beta are not sampled)
+PARAMETER_NAMES = ['mom1p', 'rot1p', 'mom2p', 'rot2p', 'mom3p', 'rot3p', 'mom1n', 'rot1n', 'mom2n', 'rot2n', 'mom3n', 'rot3n']
+
+def BUILD_SDOF():
+    # Model built once per worker process with the first realization - ANALYSIS_SDOF pushes the sampled values
+    i = 0
     ops.model('basic', '-ndm', 1, '-ndf', 1)
-    GMfact = 9.81 # [m/s^2] standard acceleration of gravity or standard acceleration 
         
     # Define nodes
     ops.node(1, 0.0)  # Fixed base
@@ -170,15 +211,39 @@ def ANALYSIS_SDOF(i):
     # Define element
     ops.element('zeroLength', 1, 1, 2, '-mat', MatTag, '-dir', 1)  # DOF[1] LATERAL SPRING
     
+    # Sampled material values are updated through parameters
+    for TAG, NAME in enumerate(PARAMETER_NAMES, start=1):
+        ops.parameter(TAG, 'element', 1, 'material', MatTag, NAME)
+    
+    # Set analysis parameters
+    ops.constraints('Plain')
+    ops.numberer('Plain')
+    ops.system('BandGeneral')
+    ops.test('NormDispIncr', MAX_TOLERANCE, MAX_ITERATIONS)
+    ops.algorithm('Newton')
+    ops.integrator('Newmark', 0.5, 0.25)
+    ops.analysis('Transient')
+
+#------------------------------------------------------------------------------------------------
+def ANALYSIS_SDOF(i, TRACE=None):
+    # Build the model once, afterwards only reset it to its initial state
+    S06.TEMPLATE_MODEL(BUILD_SDOF)
+    ops.test('NormDispIncr', MAX_TOLERANCE, MAX_ITERATIONS) # S02.ANALYSIS may have switched test and algorithm in the last realization
+    ops.algorithm('Newton')
+    GMfact = 9.81 # [m/s^2] standard acceleration of gravity or standard acceleration 
+    
+    # Update mass and material properties of realization i
+    ops.mass(2, M[i])
+    S06.UPDATE_PARAMETERS(dict(enumerate([fy[i], ey[i], fu[i], esu[i], 0.2*fu[i], 1.1*esu[i], -fy[i], -ey[i], -fu[i], -esu[i], -0.2*fu[i], -1.1*esu[i]], start=1)))
+    
     # Apply seismic accelerations    
     # Define time series for input motion (Acceleration time history)
-    gm_accels = np.loadtxt(f'Ground_Acceleration_{i+1}.txt')  # Assumes acceleration in m/s²
-    ops.timeSeries('Path', 1, '-dt', dt, '-values', *gm_accels.tolist(), '-factor', GMfact) # SEISMIC-X
+    gm_accels, _ = S07.READ_RECORD(STORE, i if RECORD_INDEX is None else RECORD_INDEX)  # Assumes acceleration in m/s² (zero-copy view of the store)
     #ops.timeSeries('Path', 1, '-dt', dt, '-filePath', f'Ground_Acceleration{i+1}.txt', '-factor', GMfact) # SEISMIC-X
         
     # Define load patterns
     # pattern UniformExcitation $patternTag $dof -accel $tsTag <-vel0 $vel0> <-fact $cFact>
-    ops.pattern('UniformExcitation', 200, 1, '-accel', 1) # SEISMIC-X
+    S06.REPLACE_EXCITATION(1, 200, ['Path', '-dt', dt, '-values', *gm_accels.tolist(), '-factor', GMfact], ['UniformExcitation', 1, '-accel', 1]) # SEISMIC-X
     
     # Output data
     #ops.recorder('Node', '-file', f"DTH_DYN_{i}.txt",'-time', '-node', 2, '-dof', 1, 'disp')     # Displacement Time History Node 2
@@ -186,19 +251,10 @@ def ANALYSIS_SDOF(i):
     #ops.recorder('Node', '-file', f"ATH_DYN_{i}.txt",'-time', '-node', 2, '-dof', 1, 'accel')    # Acceleration Time History Node 2
     #ops.recorder('Node', '-file', f"BTH_DYN_{i}.txt",'-time', '-node', 1, '-dof', 1, 'reaction') # Base Reaction Time History Node 1
         
-    # Set analysis parameters
-    ops.constraints('Plain')
-    ops.numberer('Plain')
-    ops.system('BandGeneral')
-    ops.test('NormDispIncr', MAX_TOLERANCE, MAX_ITERATIONS)
-    ops.algorithm('Newton')
-    ops.integrator('Newmark', 0.5, 0.25)
-    ops.analysis('Transient')
-    
     # Calculate Rayleigh damping factors
-    Lambda01 = ops.eigen('-fullGenLapack', 1) # eigenvalue mode 1
-    #Lambda01 = ops.eigen('-genBandArpack', 1) # eigenvalue mode 1
-    Omega01 = np.power(max(Lambda01), 0.5)
+    # Hysteretic keeps the initial tangent of the build after updateParameter, so the eigenvalue
+    # of the single DOF (initial stiffness / mass) is taken from the sampled values
+    Omega01 = (Es[i] / M[i]) ** 0.5
     a0 = (2 * Omega01 * DR[i]) / Omega01 # c = a0 * m : Mass-proportional damping
     a1 = (DR[i] * 2) / Omega01 # c = a1 * k : Stiffness-proportional damping
     # Apply Rayleigh damping
@@ -207,12 +263,8 @@ def ANALYSIS_SDOF(i):
     PERIOD = np.pi / Omega01   # Structure Period  
     
     # Re-run dynamic analysis with new loading
-    time = []
-    displacement = []
-    velocity = []
-    acceleration = []
-    base_reaction = []
-    DI = []
+    # Responses are reduced step by step - full time histories only for the TRACE_INDICES realizations
+    STREAM = S08.ResponseStream(S08.SDOF_REDUCERS(), TRACE=(i in TRACE_INDICES) if TRACE is None else TRACE)
         
     stable = 0
     current_time = 0.0
@@ -221,49 +273,80 @@ def ANALYSIS_SDOF(i):
         stable = ops.analyze(1, dt)
         S02.ANALYSIS(stable, 1, MAX_TOLERANCE, MAX_ITERATIONS) # CHECK THE ANALYSIS
         current_time = ops.getTime()
-        time.append(current_time)
-        displacement.append(ops.nodeDisp(2, 1))
-        velocity.append(ops.nodeVel(2, 1))
+        disp = ops.nodeDisp(2, 1)
         if step <= len(gm_accels)-1:
-            acceleration.append(ops.nodeAccel(2, 1) + gm_accels[step]) # Structure Acceleration and Seismic Acceleration
+            accel = ops.nodeAccel(2, 1) + gm_accels[step] # Structure Acceleration and Seismic Acceleration
         else:
-            acceleration.append(ops.nodeAccel(2, 1)) # Structure Acceleration
-        base_reaction.append(-ops.eleResponse(1, 'force')[0])  # Reaction force
-        DI.append((displacement[-1] - ey[i]) / (esu[i] - ey[i]))        # Structural Ductility Damage Index 
+            accel = ops.nodeAccel(2, 1) # Structure Acceleration
+        STREAM.update({'TIME': current_time,
+                       'DISP': disp,
+                       'VELO': ops.nodeVel(2, 1),
+                       'ACCEL': accel,
+                       'BASE': -ops.eleResponse(1, 'force')[0],        # Reaction force
+                       'DI': (disp - ey[i]) / (esu[i] - ey[i])})       # Structural Ductility Damage Index 
         step += 1
         
-    ops.wipe()
-    return time, displacement, velocity, acceleration, base_reaction, DI, PERIOD
+    return STREAM, PERIOD
+
+#------------------------------------------------------------------------------------------------
+# Calculate the max absolute values of one realization (runs inside the worker process)
+def MAX_ABS_SDOF(i, OUTPUT):
+    STREAM, PERIOD = OUTPUT
+    R = STREAM.result()
+    return (R['MAX_ABS_TIME'], R['MAX_ABS_DISP'], R['MAX_ABS_VELO'],
+            R['MAX_ABS_ACCEL'], R['MAX_ABS_BASE'], R['RESIDUAL_DI'], PERIOD,  # RESIDUAL_DI: final ductility damage index
+            STREAM.trace)                                                     # None unless i is in TRACE_INDICES
 
 #------------------------------------------------------------------------------------------------
 # Analysis Durations:
-starttime = ti.process_time()
-
-# Initialize lists to store max values
-max_time = []
-max_displacement = []
-max_velocity = []
-max_acceleration = []
-max_base_reaction = []
-max_DI = []
-max_T = []
-# NUM_SIM is the number of simulations
-for i in range(NUM_SIM):
-    time, displacement, velocity, acceleration, base_reaction, DI, PERIOD = ANALYSIS_SDOF(i)
-    # Calculate and store the max absolute values
-    max_time.append(np.max(np.abs(time)))
-    max_displacement.append(np.max(np.abs(displacement)))
-    max_velocity.append(np.max(np.abs(velocity)))
-    max_acceleration.append(np.max(np.abs(acceleration)))
-    max_base_reaction.append(np.max(np.abs(base_reaction)))
-    #max_DI.append(np.max(np.abs(DI)))
-    max_DI.append(DI[-1])
-    max_T.append(PERIOD)
-    print(f'STEP {i + 1} DONE') 
+starttime = ti.time()
+
+if ENGINE == 'BATCH':
+    # Same Hysteretic spring, Newmark and Newton scheme as ANALYSIS_SDOF, advanced for every realization at once
+    gm_accels = S07.RECORD_MATRIX(STORE, range(NUM_SIM))
+    MATERIAL = S05.HystereticBatch(fy, ey, fu, esu, 0.2*fu, 1.1*esu, -fy, -ey, -fu, -esu, -0.2*fu, -1.1*esu, 0.8, 0.5, 0.0, 0.0, 0.1)
+    BATCH = S05.NEWMARK_SDOF_BATCH(MATERIAL, M, DR, gm_accels, dt, duration, GMfact=9.81, TOLERANCE=MAX_TOLERANCE)
+    print(f'Batch engine: {np.sum(~BATCH["CONVERGED"])} realizations without convergence')
+    S05.VALIDATE_NEWMARK_SDOF_BATCH(MATERIAL, M, DR, gm_accels, dt, duration, BATCH, GMfact=9.81) # Check a few realizations against OpenSees
+    max_time = [BATCH['TIME']] * NUM_SIM
+    max_displacement = list(BATCH['DISP'])
+    max_velocity = list(BATCH['VELO'])
+    max_acceleration = list(BATCH['ACCEL'])
+    max_base_reaction = list(BATCH['BASE'])
+    max_DI = list((BATCH['DISP_END'] - ey) / (esu - ey))   # Final ductility damage index
+    max_T = list(np.pi / BATCH['OMEGA'])                     # Same period expression as ANALYSIS_SDOF
+elif SEQUENTIAL:
+    # Batches of BATCH_SIZE realizations until the running estimates are known within their tolerance
+    # Capacity model of RELIABILITY_ANALYSIS: R ~ N(mean fu, std fu), one seeded draw per realization. The base
+    # reaction stays below fu, so P_f has no event in practice and converges once its rule-of-three bound is below 1%
+    CAPACITY_R = np.random.default_rng(SEED).normal(np.mean(fu), np.std(fu), NUM_SIM)
+    TARGETS = [S04.ProbabilityTarget(f'P(ductility >= {DUCTILITY_LIMIT:g})', lambda i, R: R[1] >= DUCTILITY_LIMIT * ey[i], TOLERANCE=0.10),
+               S04.ProbabilityTarget('P_f (base reaction >= R)', lambda i, R: R[4] >= CAPACITY_R[i], TOLERANCE=0.10, P_NEGLIGIBLE=0.01),
+               S04.MeanTarget('Mean max displacement', lambda i, R: R[1], TOLERANCE=0.05),
+               S04.QuantileTarget('95th percentile DI', lambda i, R: R[5], 0.95, TOLERANCE=0.15)]
+    RESULTS, THROUGHPUT, SUMMARY = S04.SEQUENTIAL_MONTE_CARLO(ANALYSIS_SDOF, NUM_SIM, TARGETS, BATCH_SIZE=BATCH_SIZE, TIME_BUDGET=TIME_BUDGET,
+                                                              REDUCE_FUN=MAX_ABS_SDOF, SEED=SEED, MAX_WORKERS=MAX_WORKERS, WIPE=False, JOURNAL=JOURNAL, CONFIG=JOURNAL_CONFIG,
+                                                              SHARED={'M': M, 'fy': fy, 'fu': fu, 'Es': Es, 'ey': ey, 'esu': esu, 'DR': DR})
+    max_time, max_displacement, max_velocity, max_acceleration, max_base_reaction, max_DI, max_T, TRACES = [list(X) for X in zip(*RESULTS)]
+    # Keep the inputs of the realizations that were needed
+    NUM_SIM = SUMMARY['NUM_SIM']
+    fy, fu, Es, ey, esu, b, M, DR = [V[:NUM_SIM] for V in (fy, fu, Es, ey, esu, b, M, DR)]
 else:
-    print('Analysis completed successfully')    
+    # NUM_SIM is the number of simulations - realizations are spread over MAX_WORKERS processes
+    RESULTS, THROUGHPUT = S04.PARALLEL_MONTE_CARLO(ANALYSIS_SDOF, NUM_SIM, REDUCE_FUN=MAX_ABS_SDOF, SEED=SEED, MAX_WORKERS=MAX_WORKERS, WIPE=False,
+                                                   JOURNAL=JOURNAL, CONFIG=JOURNAL_CONFIG, SHARED={'M': M, 'fy': fy, 'fu': fu, 'Es': Es, 'ey': ey, 'esu': esu, 'DR': DR})
+    max_time, max_displacement, max_velocity, max_acceleration, max_base_reaction, max_DI, max_T, TRACES = [list(X) for X in zip(*RESULTS)]
+print('Analysis completed successfully')
 
-totaltime = ti.process_time() - starttime
+# Time histories of the last realization for the plots (re-run in this process if it was not traced)
+if ENGINE == 'BATCH' or TRACES[NUM_SIM - 1] is None:
+    STREAM, PERIOD = ANALYSIS_SDOF(NUM_SIM - 1, TRACE=True)
+    TRACE = STREAM.trace
+else:
+    TRACE = TRACES[NUM_SIM - 1]
+time, displacement, velocity, acceleration, base_reaction, DI = [TRACE[KEY] for KEY in ('TIME', 'DISP', 'VELO', 'ACCEL', 'BASE', 'DI')]
+
+totaltime = ti.time() - starttime
 print(f'\nTotal time (s): {totaltime:.4f} \n\n') 
 #------------------------------------------------------------------------------------------------
 # Print the last results
@@ -446,6 +529,11 @@ DATA_TOTAL = {
     'Ductility_Damage_Index': max_DI,
     'Period': max_T,
 }
+if INTENSITY:
+    # PGA, PGV, Sa at the median period, Arias intensity, CAV, D5-95 and SI of the record of every realization
+    IM = S11.STORE_INTENSITY_MEASURES(STORE, [i if RECORD_INDEX is None else RECORD_INDEX for i in range(NUM_SIM)],
+                                      PERIODS=[np.median(max_T)], ZETA=0.05, FACTOR=9.81)
+    DATA_TOTAL.update({f'IM_{NAME}': VALUES for NAME, VALUES in IM.items()})
 # Convert to DataFrame
 results_df = pd.DataFrame(DATA_TOTAL)
 # Export the DataFrame to an Excel file
@@ -558,4 +646,23 @@ file_path = None        # Not used when 'file_tf' is False
 DATA = max_DI # If not using a file, replace None with a NumPy array of data
 
 S03.MARKOV_CHAIN(FILE_TF, file_path, DATA)
-#------------------------------------------------------------------------------------------------
\ No newline at end of file
+#------------------------------------------------------------------------------------------------
+# SUBSET SIMULATION FOR SMALL FAILURE PROBABILITIES
+# Limit state g = R - D: normal capacity R against the base reaction D of the SDOF analysis of the sampled
+# variables, under one fixed ground-motion record so g is a function of the random variables only
+if SUBSET:
+    RECORD_INDEX = 0
+    TRACE_INDICES = []
+    def SUBSET_LIMIT_STATE(Z):
+        global fy, fu, Es, ey, esu, M, DR
+        X = S09.BETA_FROM_NORMAL(VARIABLES, Z[:, :-1])
+        fy, Es, esu, M, DR = X['fy'], X['Es'], X['esu'], X['M'], X['DR']
+        fu = 1.5 * fy
+        ey = fy / Es
+        RESULTS, _ = S04.PARALLEL_MONTE_CARLO(ANALYSIS_SDOF, len(Z), REDUCE_FUN=MAX_ABS_SDOF, SEED=SEED, MAX_WORKERS=MAX_WORKERS, WIPE=False, PRINT_EVERY=0,
+                                              SHARED={'M': M, 'fy': fy, 'fu': fu, 'Es': Es, 'ey': ey, 'esu': esu, 'DR': DR,
+                                                      'RECORD_INDEX': RECORD_INDEX, 'TRACE_INDICES': TRACE_INDICES})
+        CAPACITY = mean_capacity + std_dev_capacity * Z[:, -1]
+        return CAPACITY - np.array([R[4] for R in RESULTS])
+    P_f_SUBSET, COV_SUBSET, CALLS_SUBSET = S01.SUBSET_SIMULATION(SUBSET_LIMIT_STATE, len(VARIABLES) + 1, N=SUBSET_N, P0=0.1, SEED=SEED)
+#------------------------------------------------------------------------------------------------
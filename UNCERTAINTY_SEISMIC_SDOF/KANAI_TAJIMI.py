@@ -36,18 +36,11 @@ that can be used for the design and analysis of structures to withstand seismic
 """
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.integrate import odeint
 import time as ti
 from SALAR_MATH import BETA_PDF, HISROGRAM_BOXPLOT
+import GROUND_MOTION_STORE as GMS
+from KANAI_TAJIMI_GENERATOR import KANAI_TAJIMI_BATCH, KANAI_TAJIMI_SPECTRAL, JENNINGS_ENVELOPE, VALIDATE_PSD
 #-------------------------------------------------------------------------------------------
-# Kanai-Tajimi model differential equations
-def kanai_tajimi_model(Y, t, omega_g, zeta_g, white_noise, dt):
-    x, v = Y
-    index = min(int(t / dt), len(white_noise) - 1)  # Ensure index is within bounds
-    dxdt = v
-    dvdt = -2 * zeta_g * omega_g * v - omega_g**2 * x + white_noise[index]
-    return [dxdt, dvdt]
-
 # Kanai-Tajimi Power Spectral Density function
 def kanai_tajimi_psd(omega, omega_g, zeta_g, S_0):
     return S_0 * (1 + (2 * zeta_g * omega / omega_g)**2) / ((1 - (omega / omega_g)**2)**2 + (2 * zeta_g * omega / omega_g)**2)
@@ -56,6 +49,8 @@ def kanai_tajimi_psd(omega, omega_g, zeta_g, S_0):
 t_max = 10                  # Total time for simulation (s)
 NUM_SIM = 6000             # Total number for simulation
 dt = 0.01                   # Time step (s)
+SEED = 42                   # Seed of the parameters and of the white noise (same seed, same records)
+np.random.seed(SEED)
 # Define the frequency range for the simulation
 freq = np.linspace(dt, t_max, 1000)
 # The selection of alpha and beta coefficients in the beta probability distribution is crucial.
@@ -66,6 +61,12 @@ s_0 = BETA_PDF(0.9, 1.1, 1, 1, NUM_SIM)    # Intensity of the ground motion
 #  Z and W are variables that play a role in defining the natural frequency of the ground (𝜔𝑔) and, by extension, influence the earthquake simulation         
 ZZ = BETA_PDF(1.8, 2.2,1, 1, NUM_SIM)      #Constant Value
 WW = BETA_PDF(2.3, 2.7,1, 1, NUM_SIM)      #Variable Value 
+STORE_PATH = 'GROUND_MOTIONS'              # Binary ground-motion store (GROUND_MOTIONS.bin + GROUND_MOTIONS.json)
+TXT_EXPORT = False                         # Also write the Ground_Acceleration_{i}.txt files
+METHOD = 'FILTER'                          # 'FILTER': time-domain Kanai-Tajimi filter - 'SPECTRAL': spectral representation of kanai_tajimi_psd
+OMEGA_F = None                             # Clough-Penzien high-pass frequency (rad/s) for METHOD = 'SPECTRAL' (None: no correction)
+ZETA_F = 0.6                               # Clough-Penzien high-pass damping ratio
+ENVELOPE = None                            # Jennings envelope (T1, T2, C) for METHOD = 'SPECTRAL', e.g. (1.5, 5.0, 0.5) (None: stationary)
 #-------------------------------------------------------------------------------------------
 HISROGRAM_BOXPLOT(ZETA_G, HISTO_COLOR='blue', LABEL='Damping ratio of the ground')
 HISROGRAM_BOXPLOT(s_0, HISTO_COLOR='purple', LABEL='Velocity')
@@ -76,36 +77,33 @@ HISROGRAM_BOXPLOT(WW, HISTO_COLOR='gold', LABEL='Variable Value')
 starttime = ti.process_time()
 
 TIME = np.arange(dt, t_max, dt)
+# Define the Kanai-Tajimi model parameters
+OMEGA_G = ZZ * np.pi * WW  # Natural frequency of the ground (rad/s)
+# Calculate the PSD of every record
+psd = kanai_tajimi_psd(np.outer(ZZ * np.pi, freq), OMEGA_G[:, None], ZETA_G[:, None], s_0[:, None])
+max_psd = np.max(np.abs(psd), axis=1)
+if METHOD == 'SPECTRAL':
+    # Generate all ground acceleration time histories at once by FFT superposition of the PSD
+    ENVELOPE_VALUES = JENNINGS_ENVELOPE(TIME - dt, *ENVELOPE) if ENVELOPE is not None else None
+    GROUND_ACCELERATION, OMEGA_SR, PSD_SR = KANAI_TAJIMI_SPECTRAL(OMEGA_G, ZETA_G, s_0, len(TIME), dt, OMEGA_F, ZETA_F,
+                                                                  ENVELOPE_VALUES, SEED, PSD_FUN=kanai_tajimi_psd)
+    _, _, PSD_ERROR, VARIANCE_RATIO = VALIDATE_PSD(GROUND_ACCELERATION, dt, OMEGA_SR, PSD_SR, ENVELOPE_VALUES)
+    print(f'Ensemble PSD error: {100 * PSD_ERROR:.2f} % - Variance ratio: {VARIANCE_RATIO:.4f}')
+else:
+    # Generate all ground acceleration time histories at once (exact discrete-time Kanai-Tajimi filter)
+    GROUND_ACCELERATION = KANAI_TAJIMI_BATCH(OMEGA_G, ZETA_G, s_0, len(TIME), dt, SEED=SEED)
+# Find the maximum absolute ground acceleration
+MAX_GROUND_ACCELERATION = np.max(np.abs(GROUND_ACCELERATION), axis=1)
+# Collect the ground acceleration for the ground-motion store
+RECORDS = GROUND_ACCELERATION[:, 1:]
+META = [{'ZETA_G': ZETA_G[I], 'S_0': s_0[I], 'OMEGA_G': OMEGA_G[I]} for I in range(NUM_SIM)]
 for I in range(NUM_SIM):
-    # Define the Kanai-Tajimi model parameters
-    Z = ZZ[I]
-    W = WW[I]
-    omega_g = Z * np.pi * W  # Natural frequency of the ground (rad/s)
-    omega = Z * np.pi * freq
-    zeta_g = ZETA_G[I]
-    S_0 = s_0[I]
-    # Calculate the PSD
-    psd = kanai_tajimi_psd(omega, omega_g, zeta_g, S_0)
-    # Find the psd
-    max_psd = np.max(np.abs(psd))
-    # White noise generation
-    white_noise = BETA_PDF(-np.sqrt(s_0[I]), np.sqrt(s_0[I]), 0.5, 0.5, len(TIME))
-    # Initial conditions
-    Y0 = [0, 0]
-    # Solve the differential equations
-    sol = odeint(kanai_tajimi_model, Y0, TIME, args=(omega_g, zeta_g, white_noise, dt))
-    # Extract the ground acceleration time history
-    ground_acceleration = sol[:, 1]
-    # Find the maximum absolute ground acceleration
-    max_ground_acceleration = np.max(np.abs(ground_acceleration))
-    # Print ground acceleration to a text file
-    with open(f'Ground_Acceleration_{I+1}.txt', 'w') as file:
-        new_ground_acceleration = ground_acceleration[1:]
-        for acc in new_ground_acceleration:
-            file.write(f'{acc:.6f}\n')
+    print(f'{I+1} Maximum absolute ground acceleration: {MAX_GROUND_ACCELERATION[I]:.6f} m/s²')
 
-    print(f'{I+1} Maximum absolute ground acceleration: {max_ground_acceleration:.6f} m/s²')
-    print(f'      Ground acceleration data has been printed to ground_acceleration_{I+1} .txt')
+GMS.WRITE_STORE(STORE_PATH, RECORDS, dt, META)
+print(f'Ground acceleration data has been written to {STORE_PATH}.bin')
+if TXT_EXPORT:
+    GMS.EXPORT_TXT(GMS.OPEN_STORE(STORE_PATH), NAME='Ground_Acceleration_{}.txt')
     
 totaltime = ti.process_time() - starttime
 print(f'\nTotal time (s): {totaltime:.4f} \n\n')   
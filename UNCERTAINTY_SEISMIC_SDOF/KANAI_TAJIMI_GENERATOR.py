@@ -0,0 +1,295 @@
+"""
+Vectorized Kanai-Tajimi ground-motion generators.
+
+- KANAI_TAJIMI_BATCH    -> time domain: exact discrete-time filtering of bounded white noise (all records together)
+- KANAI_TAJIMI_SPECTRAL -> frequency domain: spectral representation of the (Clough-Penzien corrected) PSD
+                           with an optional time-modulating envelope, one inverse FFT per record
+- VALIDATE_PSD          -> ensemble-average PSD of generated records against the target PSD
+- KanaiTajimiSource     -> lazy source: record i generated on demand from (master seed, i), small LRU cache of read-only records
+
+KANAI_TAJIMI.py and KANAI_TAJIMI_SINE.py integrated the soil filter
+
+    x'' + 2 * zeta_g * omega_g * x' + omega_g^2 * x = w(t)
+
+one record at a time with odeint, calling a Python right-hand side for every evaluation. The white noise
+w(t) is held constant over every time step (the right-hand side looked it up with int(t / dt)), so the
+filter is a linear state-space system s' = A s + B w with a zero-order-hold input and can be advanced
+exactly in discrete time:
+
+    s[k+1] = PHI s[k] + GAMMA w[k+1]       PHI = expm(A dt),  GAMMA = A^-1 (PHI - I) B
+
+PHI and GAMMA of every record come from one batched matrix exponential of the augmented matrix
+[[A, B], [0, 0]] * dt, and all records are advanced together, one NumPy operation per time step.
+The ground acceleration is the velocity state x', as in the original scripts.
+
+KANAI_TAJIMI_SPECTRAL draws records directly from the target PSD, so its cost is O(N * n log n) array work
+and long records do not add Python steps.
+"""
+import numpy as np
+from collections import OrderedDict
+from scipy.linalg import expm
+
+# -----------------------------------------------
+
+def KANAI_TAJIMI_TRANSITION(OMEGA_G, ZETA_G, DT):
+    """
+    Exact discrete-time transition of the Kanai-Tajimi filter for a zero-order-hold input.
+
+    Parameters:
+    - OMEGA_G (np.array): Natural frequency of the ground of every record [rad/s].
+    - ZETA_G (np.array): Damping ratio of the ground of every record.
+    - DT (float): Time step [s].
+
+    Returns:
+    - PHI (np.array): State transition matrices (N, 2, 2).
+    - GAMMA (np.array): Input vectors (N, 2).
+    """
+    OMEGA_G = np.atleast_1d(np.asarray(OMEGA_G, dtype=float))
+    ZETA_G = np.broadcast_to(np.asarray(ZETA_G, dtype=float), OMEGA_G.shape)
+    AUG = np.zeros((OMEGA_G.size, 3, 3))
+    AUG[:, 0, 1] = 1.0
+    AUG[:, 1, 0] = -OMEGA_G ** 2
+    AUG[:, 1, 1] = -2.0 * ZETA_G * OMEGA_G
+    AUG[:, 1, 2] = 1.0
+    EXP = expm(AUG * DT)
+    return EXP[:, :2, :2], EXP[:, :2, 2]
+
+# -----------------------------------------------
+
+def WHITE_NOISE_BATCH(S_0, NUM_STEPS, SEED=None):
+    # Bounded white noise of every record: arcsine distribution on [-sqrt(S_0), sqrt(S_0)] (BETA_PDF with a = b = 0.5)
+    RNG = np.random.default_rng(SEED)
+    AMPLITUDE = np.sqrt(np.atleast_1d(np.asarray(S_0, dtype=float)))[:, None]
+    return -AMPLITUDE + 2.0 * AMPLITUDE * RNG.beta(0.5, 0.5, (AMPLITUDE.shape[0], NUM_STEPS))
+
+# -----------------------------------------------
+
+def KANAI_TAJIMI_BATCH(OMEGA_G, ZETA_G, S_0, NUM_STEPS, DT, SEED=None, WHITE_NOISE=None):
+    """
+    Generate an ensemble of Kanai-Tajimi ground accelerations in one vectorized pass.
+
+    Parameters:
+    - OMEGA_G (np.array): Natural frequency of the ground of every record [rad/s].
+    - ZETA_G (np.array): Damping ratio of the ground of every record.
+    - S_0 (np.array): Intensity of every record (white noise bounded by +/- sqrt(S_0)).
+    - NUM_STEPS (int): Number of time points of every record (the first one is the state at rest).
+    - DT (float): Time step [s].
+    - SEED (int): Seed of the white noise (the same seed gives the same ensemble).
+    - WHITE_NOISE (np.array): Optional white noise (N, NUM_STEPS) instead of the seeded one.
+
+    Returns:
+    - ACCEL (np.array): Ground acceleration of every record (N, NUM_STEPS) [m/s^2].
+    """
+    PHI, GAMMA = KANAI_TAJIMI_TRANSITION(OMEGA_G, ZETA_G, DT)
+    N = PHI.shape[0]
+    if WHITE_NOISE is None:
+        WHITE_NOISE = WHITE_NOISE_BATCH(np.broadcast_to(S_0, (N,)), NUM_STEPS, SEED)
+    P00, P01, P10, P11 = PHI[:, 0, 0], PHI[:, 0, 1], PHI[:, 1, 0], PHI[:, 1, 1]
+    G0, G1 = GAMMA[:, 0], GAMMA[:, 1]
+    x = np.zeros(N)
+    v = np.zeros(N)
+    ACCEL = np.zeros((N, NUM_STEPS))
+    for K in range(NUM_STEPS - 1):
+        # Noise sample K+1 is held over the step from time point K to K+1
+        W = WHITE_NOISE[:, K + 1]
+        x, v = P00 * x + P01 * v + G0 * W, P10 * x + P11 * v + G1 * W
+        ACCEL[:, K + 1] = v
+    return ACCEL
+
+# -----------------------------------------------
+
+def KANAI_TAJIMI_PSD(OMEGA, OMEGA_G, ZETA_G, S_0):
+    # Two-sided Kanai-Tajimi power spectral density (same as kanai_tajimi_psd of KANAI_TAJIMI.py)
+    R = 2 * ZETA_G * OMEGA / OMEGA_G
+    return S_0 * (1 + R**2) / ((1 - (OMEGA / OMEGA_G)**2)**2 + R**2)
+
+# -----------------------------------------------
+
+def CLOUGH_PENZIEN_FILTER(OMEGA, OMEGA_F, ZETA_F):
+    # High-pass correction of Clough and Penzien: removes the finite Kanai-Tajimi ordinate at zero frequency
+    RATIO = OMEGA / OMEGA_F
+    return RATIO**4 / ((1 - RATIO**2)**2 + (2 * ZETA_F * RATIO)**2)
+
+# -----------------------------------------------
+
+def JENNINGS_ENVELOPE(TIME, T1, T2, C):
+    # Time-modulating function: quadratic rise up to T1, strong phase up to T2, exponential decay after T2
+    TIME = np.asarray(TIME, dtype=float)
+    return np.where(TIME < T1, (TIME / T1)**2, np.where(TIME <= T2, 1.0, np.exp(-C * (TIME - T2))))
+
+# -----------------------------------------------
+
+def SPECTRAL_FREQUENCIES(NUM_STEPS, DT, PAD=2):
+    # FFT length (power of 2, at least PAD * NUM_STEPS so the records do not repeat) and its frequencies 0 ... pi/DT [rad/s]
+    M = 2 ** int(np.ceil(np.log2(PAD * NUM_STEPS)))
+    return M, 2 * np.pi * np.fft.rfftfreq(M, DT)
+
+# -----------------------------------------------
+
+def KANAI_TAJIMI_SPECTRAL(OMEGA_G, ZETA_G, S_0, NUM_STEPS, DT, OMEGA_F=None, ZETA_F=None,
+                          ENVELOPE=None, SEED=None, PSD_FUN=KANAI_TAJIMI_PSD, PAD=2):
+    """
+    Generate an ensemble of Kanai-Tajimi (or Clough-Penzien) ground accelerations by spectral representation.
+
+    Every record is a superposition of cosines with random phases (Shinozuka and Deodatis):
+
+        a(t) = sqrt(2) * sum_k sqrt(2 * S(w_k) * dw) * cos(w_k * t + phi_k)
+
+    evaluated for all time points at once with one real inverse FFT per record.
+
+    Parameters:
+    - OMEGA_G (np.array): Natural frequency of the ground of every record [rad/s].
+    - ZETA_G (np.array): Damping ratio of the ground of every record.
+    - S_0 (np.array): Two-sided PSD ordinate of the bedrock white noise of every record.
+    - NUM_STEPS (int): Number of time points of every record.
+    - DT (float): Time step [s].
+    - OMEGA_F (float or np.array): Frequency of the Clough-Penzien high-pass filter [rad/s] (None: plain Kanai-Tajimi).
+    - ZETA_F (float or np.array): Damping ratio of the Clough-Penzien high-pass filter.
+    - ENVELOPE (np.array or callable): Time-modulating function, values (NUM_STEPS,) or (N, NUM_STEPS), or a function of TIME.
+    - SEED (int): Seed of the random phases (the same seed gives the same ensemble).
+    - PSD_FUN (callable): PSD_FUN(OMEGA, OMEGA_G, ZETA_G, S_0), e.g. kanai_tajimi_psd of KANAI_TAJIMI.py.
+    - PAD (int): The FFT period is at least PAD times the record duration.
+
+    Returns:
+    - ACCEL (np.array): Ground acceleration of every record (N, NUM_STEPS) [m/s^2].
+    - OMEGA (np.array): Frequencies of the superposition [rad/s].
+    - PSD (np.array): Target two-sided PSD of every record on OMEGA (N, len(OMEGA)).
+    """
+    OMEGA_G = np.atleast_1d(np.asarray(OMEGA_G, dtype=float))
+    N = OMEGA_G.size
+    M, OMEGA = SPECTRAL_FREQUENCIES(NUM_STEPS, DT, PAD)
+    DOMEGA = OMEGA[1]
+
+    def COLUMN(X):
+        return np.broadcast_to(np.asarray(X, dtype=float), (N,))[:, None]
+
+    PSD = PSD_FUN(OMEGA[None, :], OMEGA_G[:, None], COLUMN(ZETA_G), COLUMN(S_0))
+    if OMEGA_F is not None:
+        PSD = PSD * CLOUGH_PENZIEN_FILTER(OMEGA[None, :], COLUMN(OMEGA_F), COLUMN(ZETA_F))
+    PSD = np.array(np.broadcast_to(PSD, (N, OMEGA.size)))
+    # No mean value and no (degenerate) Nyquist cosine
+    PSD[:, 0] = 0.0
+    PSD[:, -1] = 0.0
+    AMPLITUDE = np.sqrt(2.0) * np.sqrt(2.0 * PSD * DOMEGA)
+    PHASE = np.random.default_rng(SEED).uniform(0.0, 2.0 * np.pi, PSD.shape)
+    # irfft(Y)[n] = (2 / M) * Re(sum_k Y[k] * exp(i w_k t_n)) for zero end bins
+    ACCEL = np.fft.irfft(0.5 * M * AMPLITUDE * np.exp(1j * PHASE), n=M, axis=1)[:, :NUM_STEPS]
+    if ENVELOPE is not None:
+        if callable(ENVELOPE):
+            ENVELOPE = ENVELOPE(DT * np.arange(NUM_STEPS))
+        ACCEL *= ENVELOPE
+    return ACCEL, OMEGA, PSD
+
+# -----------------------------------------------
+
+def VALIDATE_PSD(ACCEL, DT, OMEGA, PSD, ENVELOPE=None):
+    """
+    Compare the ensemble-average PSD of generated records with the target PSD.
+
+    The periodogram of every record, dt / (2 pi T) * |FFT|^2, is averaged over the ensemble on the
+    frequencies OMEGA of the generator. For modulated records it is divided by the mean square of the envelope.
+
+    Parameters:
+    - ACCEL (np.array): Generated records (N, NUM_STEPS).
+    - DT (float): Time step [s].
+    - OMEGA (np.array): Frequencies of the target PSD (as returned by KANAI_TAJIMI_SPECTRAL) [rad/s].
+    - PSD (np.array): Target two-sided PSD, (len(OMEGA),) or one row per record.
+    - ENVELOPE (np.array): Envelope values the records were modulated with.
+
+    Returns:
+    - PSD_EST (np.array): Ensemble-average PSD on OMEGA.
+    - PSD_TARGET (np.array): Ensemble-average target PSD on OMEGA.
+    - ERROR (float): Relative L1 error, sum(|PSD_EST - PSD_TARGET|) / sum(PSD_TARGET).
+    - VARIANCE_RATIO (float): Variance of the records over the target variance.
+    """
+    ACCEL = np.atleast_2d(ACCEL)
+    NUM_STEPS = ACCEL.shape[1]
+    M = 2 * (len(OMEGA) - 1)
+    PERIODOGRAM = DT / (2 * np.pi * NUM_STEPS) * np.abs(np.fft.rfft(ACCEL, n=M, axis=1))**2
+    PSD_EST = PERIODOGRAM.mean(axis=0)
+    PSD_TARGET = np.atleast_2d(PSD).mean(axis=0)
+    SCALE = 1.0
+    if ENVELOPE is not None:
+        SCALE = np.mean(np.asarray(ENVELOPE)**2)
+        PSD_EST = PSD_EST / SCALE
+    ERROR = np.sum(np.abs(PSD_EST - PSD_TARGET)) / np.sum(PSD_TARGET)
+    VARIANCE_RATIO = np.mean(ACCEL**2) / SCALE / (2.0 * np.sum(PSD_TARGET) * OMEGA[1])
+    return PSD_EST, PSD_TARGET, ERROR, VARIANCE_RATIO
+
+# -----------------------------------------------
+
+# Beta distributions (MIN_X, MAX_X, a, b) of the parameters of KANAI_TAJIMI.py
+KANAI_TAJIMI_PARAMETERS = {'ZETA_G': (0.5, 0.7, 1, 1),  # Damping ratio of the ground
+                           'S_0': (0.9, 1.1, 1, 1),     # Intensity of the ground motion
+                           'ZZ': (1.8, 2.2, 1, 1),      # omega_g = ZZ * pi * WW
+                           'WW': (2.3, 2.7, 1, 1)}
+
+# -----------------------------------------------
+
+class KanaiTajimiSource:
+    """
+    Lazy ground-motion source: record I is generated on demand from (SEED, I) only.
+
+    No record is written to disk. Every worker process makes the records it needs itself, so there is no
+    pre-generation step and no shared filesystem, and disk and memory use do not grow with NUM_SIM. The same
+    (SEED, I) always gives the same record, in any process and in any order. The source can be passed to the
+    GROUND_MOTION_STORE functions (READ_RECORD, RECORD_META, RECORD_MATRIX, ...) instead of an opened store.
+
+    Parameters:
+    - NUM_RECORDS (int): Number of records.
+    - DT (float): Time step [s].
+    - T_MAX (float): Duration of the generation (the records have the length of KANAI_TAJIMI.py records).
+    - SEED (int): Master seed.
+    - PARAMETERS (dict): Beta distributions {NAME: (MIN_X, MAX_X, a, b)} of 'ZETA_G', 'S_0', 'ZZ' and 'WW'.
+    - METHOD (str): 'FILTER' (KANAI_TAJIMI_BATCH) or 'SPECTRAL' (KANAI_TAJIMI_SPECTRAL).
+    - CACHE_SIZE (int): Number of recently used records kept in memory (0: no cache).
+    - OPTIONS: Extra arguments of KANAI_TAJIMI_SPECTRAL (OMEGA_F, ZETA_F, ENVELOPE).
+    """
+    def __init__(self, NUM_RECORDS, DT=0.01, T_MAX=10.0, SEED=0, PARAMETERS=None, METHOD='FILTER', CACHE_SIZE=8, **OPTIONS):
+        self.num_records = NUM_RECORDS
+        self.dt = DT
+        self.num_steps = len(np.arange(DT, T_MAX, DT))
+        self.seed = SEED
+        self.parameters = dict(KANAI_TAJIMI_PARAMETERS, **(PARAMETERS or {}))
+        self.method = METHOD
+        self.cache_size = CACHE_SIZE
+        self.options = OPTIONS
+        self.cache = OrderedDict()
+
+    def __len__(self):
+        return self.num_records
+
+    def _generate(self, I):
+        RNG = np.random.default_rng([self.seed, I])
+        P = {NAME: MIN_X + (MAX_X - MIN_X) * RNG.beta(a, b) for NAME, (MIN_X, MAX_X, a, b) in self.parameters.items()}
+        OMEGA_G = P['ZZ'] * np.pi * P['WW']
+        META = {'ZETA_G': P['ZETA_G'], 'S_0': P['S_0'], 'OMEGA_G': OMEGA_G, 'SEED': self.seed, 'INDEX': I}
+        if self.method == 'SPECTRAL':
+            ACCEL = KANAI_TAJIMI_SPECTRAL(OMEGA_G, P['ZETA_G'], P['S_0'], self.num_steps, self.dt, SEED=RNG, **self.options)[0]
+        else:
+            ACCEL = KANAI_TAJIMI_BATCH(OMEGA_G, P['ZETA_G'], P['S_0'], self.num_steps, self.dt, SEED=RNG)
+        RECORD = ACCEL[0, 1:]  # First point is the state at rest, as in KANAI_TAJIMI.py
+        RECORD.setflags(write=False)  # Read-only like the memory-mapped views of GROUND_MOTION_STORE: cached records cannot be scaled in place
+        return RECORD, META
+
+    def _record(self, I):
+        if I < 0 or I >= self.num_records:
+            raise IndexError(f'Record {I} out of range (0 ... {self.num_records - 1})')
+        if I in self.cache:
+            self.cache.move_to_end(I)
+            return self.cache[I]
+        ENTRY = self._generate(I)
+        if self.cache_size > 0:
+            self.cache[I] = ENTRY
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return ENTRY
+
+    def read_record(self, I):
+        # Same return values as GROUND_MOTION_STORE.READ_RECORD
+        return self._record(I)[0], self.dt
+
+    def record_meta(self, I):
+        return dict(self._record(I)[1])
+
+# -----------------------------------------------
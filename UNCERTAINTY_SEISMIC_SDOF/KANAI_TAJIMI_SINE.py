@@ -39,17 +39,10 @@ for variability in soil properties and ground motion intensity.
 """
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.integrate import odeint
 import time as ti
 from SALAR_MATH import BETA_PDF, HISROGRAM_BOXPLOT
-
-# Kanai-Tajimi model differential equations
-def kanai_tajimi_model(Y, t, omega_g, zeta_g, white_noise, dt):
-    x, v = Y
-    index = min(int(t / dt), len(white_noise) - 1)  # Ensure index is within bounds
-    dxdt = v
-    dvdt = -2 * zeta_g * omega_g * v - omega_g**2 * x + white_noise[index]
-    return [dxdt, dvdt]
+import GROUND_MOTION_STORE as GMS
+from KANAI_TAJIMI_GENERATOR import KANAI_TAJIMI_BATCH
 
 # Kanai-Tajimi Power Spectral Density function
 def kanai_tajimi_psd(omega, omega_g, zeta_g, S_0):
@@ -59,6 +52,8 @@ def kanai_tajimi_psd(omega, omega_g, zeta_g, S_0):
 t_max = 10                  # Total time for simulation (s)
 NUM_SIM = 6000              # Total number for simulation (set to 1 for simplicity)
 dt = 0.01                   # Time step (s)
+SEED = 42                   # Seed of the parameters and of the white noise (same seed, same records)
+np.random.seed(SEED)
 # Define the frequency range for the simulation
 freq = np.linspace(dt, t_max, 1000)
 ZETA_G = BETA_PDF(0.5, 0.7, 1, 1, NUM_SIM) # Damping ratio of the ground
@@ -69,6 +64,8 @@ ZZ = BETA_PDF(1.8, 2.2,1, 1, NUM_SIM)      #Constant Value
 WW = BETA_PDF(2.3, 2.7,1, 1, NUM_SIM)      #Variable Value 
 
 AF = 0.005 # Amplitude Factor 
+STORE_PATH = 'COMBINED_MOTIONS'            # Binary ground-motion store (COMBINED_MOTIONS.bin + COMBINED_MOTIONS.json)
+TXT_EXPORT = False                         # Also write the Combined_Acceleration_{i}.txt files
 
 HISROGRAM_BOXPLOT(ZETA_G, HISTO_COLOR='blue', LABEL='Damping ratio of the ground')
 HISROGRAM_BOXPLOT(s_0, HISTO_COLOR='purple', LABEL='Velocity')
@@ -80,49 +77,33 @@ TIME = np.arange(dt, t_max, dt)
 # Analysis Durations:
 starttime = ti.process_time()
     
-for I in range(NUM_SIM):
-    # Define the Kanai-Tajimi model parameters
-    Z = ZZ[I]
-    W = WW[I]
-    omega_g = Z * np.pi * W  # Natural frequency of the ground (rad/s)
-    omega = Z * np.pi * freq
-    zeta_g = ZETA_G[I]
-    S_0 = s_0[I]
-    # Calculate the PSD
-    psd = kanai_tajimi_psd(omega, omega_g, zeta_g, S_0)
-    # Find the psd
-    max_psd = np.max(np.abs(psd))
-    
-    # White noise generation
-    white_noise = BETA_PDF(-np.sqrt(s_0[I]), np.sqrt(s_0[I]), 0.5, 0.5, len(TIME))
-
-    # Initial conditions
-    Y0 = [0, 0]
+# Define the Kanai-Tajimi model parameters
+OMEGA_G = ZZ * np.pi * WW  # Natural frequency of the ground (rad/s)
+# Calculate the PSD of every record
+psd = kanai_tajimi_psd(np.outer(ZZ * np.pi, freq), OMEGA_G[:, None], ZETA_G[:, None], s_0[:, None])
+max_psd = np.max(np.abs(psd), axis=1)
 
-    # Solve the differential equations
-    sol = odeint(kanai_tajimi_model, Y0, TIME, args=(omega_g, zeta_g, white_noise, dt))
+# Generate all ground acceleration time histories at once (exact discrete-time Kanai-Tajimi filter)
+GROUND_ACCELERATION = KANAI_TAJIMI_BATCH(OMEGA_G, ZETA_G, s_0, len(TIME), dt, SEED=SEED)
 
-    # Extract the ground acceleration time history
-    ground_acceleration = sol[:, 1]
+# Add an increasing sinusoidal function to the ground acceleration
+sinusoidal_amplitude = AF * TIME  # Amplitude increases over time
+sinusoidal_frequency = 2 * np.pi  # Frequency of the sinusoidal function
+sinusoidal_component = sinusoidal_amplitude * np.sin(sinusoidal_frequency * TIME)
 
-    # Add an increasing sinusoidal function to the ground acceleration
-    sinusoidal_amplitude = AF * TIME  # Amplitude increases over time
-    sinusoidal_frequency = 2 * np.pi  # Frequency of the sinusoidal function
-    sinusoidal_component = sinusoidal_amplitude * np.sin(sinusoidal_frequency * TIME)
+# Combine Kanai-Tajimi and sinusoidal components
+COMBINED_ACCELERATION = GROUND_ACCELERATION + sinusoidal_component
 
-    # Combine Kanai-Tajimi and sinusoidal components
-    combined_acceleration = ground_acceleration + sinusoidal_component
+# Find the maximum absolute combined acceleration
+MAX_COMBINED_ACCELERATION = np.max(np.abs(COMBINED_ACCELERATION), axis=1)
 
-    # Find the maximum absolute combined acceleration
-    max_combined_acceleration = np.max(np.abs(combined_acceleration))
+# Collect the combined acceleration for the ground-motion store
+RECORDS = COMBINED_ACCELERATION
+META = [{'ZETA_G': ZETA_G[I], 'S_0': s_0[I], 'OMEGA_G': OMEGA_G[I], 'AF': AF} for I in range(NUM_SIM)]
 
-    # Print combined acceleration to a text file
-    with open(f'Combined_Acceleration_{I+1}.txt', 'w') as file:
-        for acc in combined_acceleration:
-            file.write(f'{acc:.6f}\n')
-
-    print(f'{I+1} Maximum absolute combined acceleration: {max_combined_acceleration:.6f} m/s²')
-    print(f'      Combined acceleration data has been printed to combined_acceleration_{I+1}.txt')
+for I in range(NUM_SIM):
+    combined_acceleration = COMBINED_ACCELERATION[I]
+    print(f'{I+1} Maximum absolute combined acceleration: {MAX_COMBINED_ACCELERATION[I]:.6f} m/s²')
 
     # Plot the combined acceleration
     plt.figure(figsize=(10, 6))
@@ -134,5 +115,10 @@ for I in range(NUM_SIM):
     plt.grid(True)
     plt.show()
 
+GMS.WRITE_STORE(STORE_PATH, RECORDS, dt, META)
+print(f'Combined acceleration data has been written to {STORE_PATH}.bin')
+if TXT_EXPORT:
+    GMS.EXPORT_TXT(GMS.OPEN_STORE(STORE_PATH), NAME='Combined_Acceleration_{}.txt')
+
 totaltime = ti.process_time() - starttime
 print(f'\nTotal time (s): {totaltime:.4f} \n\n')
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+Build-once model template for OpenSeesPy Monte Carlo realizations.
+
+The analysis functions of the uncertainty drivers call ops.wipe() and rebuild nodes, materials,
+elements, time series and analysis objects for every realization, although only a few sampled
+scalars change. TEMPLATE_MODEL builds the model once per (worker) process and afterwards only
+resets it to its initial state (ops.reset: committed states reverted, time set to zero).
+The sampled values of the realization are then pushed with UPDATE_PARAMETERS (parameters
+declared with ops.parameter inside the build function) and the excitation is swapped with
+REPLACE_EXCITATION.
+
+- A KEY that changes (e.g. sampled geometry or fiber layout, which can not be updated through
+  ops.parameter) forces a rebuild, so the template is always safe to use.
+- A model wiped by somebody else (e.g. PARALLEL_MONTE_CARLO with WIPE=True) is rebuilt as well.
+- Materials only refresh what they use in setTrialStrain: Hysteretic keeps the initial tangent
+  of the build, so frequencies must come from the sampled values instead of ops.eigen.
+"""
+import openseespy.opensees as ops
+
+_TEMPLATE = {'KEY': None, 'BUILDS': 0, 'REUSES': 0}
+
+# -----------------------------------------------
+
+def TEMPLATE_MODEL(BUILD_FUN, KEY=None):
+    """
+    Build the model with BUILD_FUN() once, or reset the model built before.
+
+    Parameters:
+    - BUILD_FUN (callable): Builds the model, its ops.parameter tags and the analysis objects.
+    - KEY (hashable): Identifies the model topology; a different KEY forces a rebuild.
+
+    Returns:
+    - BUILT (bool): True if the model was built, False if the existing model was reset.
+    """
+    if _TEMPLATE['BUILDS'] == 0 or _TEMPLATE['KEY'] != KEY or len(ops.getNodeTags()) == 0:
+        ops.wipe()
+        BUILD_FUN()
+        _TEMPLATE['KEY'] = KEY
+        _TEMPLATE['BUILDS'] += 1
+        return True
+    ops.reset()
+    _TEMPLATE['REUSES'] += 1
+    return False
+
+# -----------------------------------------------
+
+def UPDATE_PARAMETERS(VALUES):
+    # VALUES: {parameter tag: new value}
+    for TAG, VALUE in VALUES.items():
+        ops.updateParameter(int(TAG), float(VALUE))
+
+# -----------------------------------------------
+
+def REPLACE_EXCITATION(TS_TAG, PATTERN_TAG, TS_ARGS, PATTERN_ARGS):
+    """
+    Remove the load pattern and time series of the previous realization and define the new ones.
+
+    Parameters:
+    - TS_TAG (int): Time series tag.
+    - PATTERN_TAG (int): Load pattern tag.
+    - TS_ARGS (list): ops.timeSeries arguments without the tag, e.g. ['Path', '-dt', dt, '-values', *values].
+    - PATTERN_ARGS (list): ops.pattern arguments without the tag, e.g. ['UniformExcitation', 1, '-accel', TS_TAG].
+    """
+    if PATTERN_TAG in ops.getPatterns():
+        ops.remove('loadPattern', PATTERN_TAG)
+    try:
+        ops.remove('timeSeries', TS_TAG)
+    except Exception:
+        pass
+    ops.timeSeries(TS_ARGS[0], TS_TAG, *TS_ARGS[1:])
+    ops.pattern(PATTERN_ARGS[0], PATTERN_TAG, *PATTERN_ARGS[1:])
+
+# -----------------------------------------------
+
+def TEMPLATE_STATS():
+    # Number of model builds and reuses in this process
+    return {'BUILDS': _TEMPLATE['BUILDS'], 'REUSES': _TEMPLATE['REUSES']}
+
+# -----------------------------------------------
@@ -0,0 +1,506 @@
+"""
+Process-pool Monte Carlo executor for OpenSeesPy realizations.
+
+The uncertainty drivers call an analysis function ANALYSIS_FUN(i) once per realization i.
+PARALLEL_MONTE_CARLO spreads those calls over worker processes, so every worker owns its
+own OpenSeesPy domain (the domain is a process-global object and can not be shared).
+
+- Every realization i reseeds NumPy's global generator from (SEED, i) before it runs, so any
+  random draw made inside ANALYSIS_FUN is reproducible and independent of which worker ran it.
+- Results are returned in sample order, whatever the order in which the workers finish.
+- Throughput (samples per second) is printed while the run progresses and returned at the end.
+- An optional REDUCE_FUN(i, OUTPUT) runs inside the worker, so only the reduced values
+  (e.g. maximum absolute responses) travel back to the main process instead of full traces.
+- Resuming is opt-in: with JOURNAL set, every worker appends its reduced results to its own shard
+  JOURNAL/shard_<pid>.jsonl, one line {"i": i, "seed": SEED, "hash": HASH, "result": ...} per
+  realization, written in batches of JOURNAL_EVERY lines. Shards are never shared between processes,
+  so the workers can not corrupt each other's records. HASH (CONFIG_HASH) covers NUM_SIM, the source
+  of ANALYSIS_FUN and REDUCE_FUN, SHARED and the CONFIG of the run (settings and sampled inputs),
+  and is kept with the seed in the header JOURNAL/header.json. A rerun with the same JOURNAL and the
+  same HASH skips the indices already in the journal and rebuilds RESULTS from it, so a crashed
+  campaign resumes where it stopped. Records of another configuration or master seed are never
+  reused (a changed NUM_SIM, SAMPLING, VARIABLES or model starts from scratch), and a line cut by a
+  crash is discarded. The journal stores JSON values: tuples come back as lists and arrays as nested lists.
+
+SEQUENTIAL_MONTE_CARLO runs the same realizations in batches of BATCH_SIZE and stops as soon as
+every target statistic is known well enough, instead of always running NUM_SIM samples:
+- MeanTarget        -> mean of a response               (half-width z * s / sqrt(n))
+- ProbabilityTarget -> probability of an event, e.g. failure (Wilson score interval; while no event has
+                       occurred, the rule-of-three upper bound, converged once it is below P_NEGLIGIBLE)
+- QuantileTarget    -> quantile of a response, e.g. 95th percentile DI (order-statistic interval)
+A target is converged when the half-width of its confidence interval is below TOLERANCE times
+the estimate (RELATIVE=True) or below TOLERANCE. The run also stops when TIME_BUDGET seconds have
+passed or MAX_SIM samples are done, and the summary reports how many samples were needed.
+Realizations run in index order, so with a Latin hypercube design an early stop keeps the first
+n rows, which are a plain random subset of the design (a Sobol prefix stays well balanced).
+
+On Linux the 'fork' start method is used: workers inherit the sampled arrays (M, fy, DR, ...)
+of the driver script, so the existing ANALYSIS_SDOF(i) functions run unchanged.
+On platforms without 'fork' (Windows) the driver body must sit under `if __name__ == '__main__':`
+and the sampled arrays must be passed through SHARED, which is copied into the globals of
+ANALYSIS_FUN inside every worker.
+"""
+import os
+import json
+import hashlib
+import inspect
+import time as TI
+import multiprocessing
+import concurrent.futures
+from statistics import NormalDist
+import numpy as np
+
+# -----------------------------------------------
+
+def SAMPLE_SEED(SEED, I):
+    # Independent random stream of realization I
+    return np.random.SeedSequence(SEED, spawn_key=(int(I),))
+
+# -----------------------------------------------
+
+def _JSON(VALUE):
+    # JSON fallback for NumPy values of the reduced results
+    if isinstance(VALUE, np.ndarray):
+        return VALUE.tolist()
+    if isinstance(VALUE, np.generic):
+        return VALUE.item()
+    raise TypeError(f'Object of type {type(VALUE).__name__} can not be journaled')
+
+# -----------------------------------------------
+
+def _CANONICAL(VALUE):
+    # Stable JSON form of a run configuration: text keys, array digests and function sources
+    if isinstance(VALUE, dict):
+        return {str(KEY): _CANONICAL(ITEM) for KEY, ITEM in VALUE.items()}
+    if isinstance(VALUE, (list, tuple)):
+        return [_CANONICAL(ITEM) for ITEM in VALUE]
+    if isinstance(VALUE, np.ndarray):
+        if VALUE.dtype == object:
+            return _CANONICAL(VALUE.tolist())
+        return [str(VALUE.dtype), list(VALUE.shape), hashlib.sha1(np.ascontiguousarray(VALUE).tobytes()).hexdigest()]
+    if isinstance(VALUE, np.generic):
+        return VALUE.item()
+    if callable(VALUE):
+        try:
+            return inspect.getsource(VALUE)
+        except (OSError, TypeError):
+            return f"{getattr(VALUE, '__module__', '')}.{getattr(VALUE, '__qualname__', type(VALUE).__name__)}"
+    return VALUE
+
+# -----------------------------------------------
+
+def CONFIG_HASH(CONFIG):
+    # SHA-1 of a run configuration (dicts, lists, arrays, numbers, text and functions)
+    TEXT = json.dumps(_CANONICAL(CONFIG), sort_keys=True, default=lambda VALUE: type(VALUE).__name__)
+    return hashlib.sha1(TEXT.encode()).hexdigest()
+
+# -----------------------------------------------
+
+def JOURNAL_SHARD(JOURNAL):
+    # Journal shard of this process
+    return os.path.join(JOURNAL, f'shard_{os.getpid()}.jsonl')
+
+# -----------------------------------------------
+
+def WRITE_JOURNAL(JOURNAL, LINES):
+    # Append journal lines to the shard of this process and flush them to disk
+    if not LINES:
+        return
+    SHARD = JOURNAL_SHARD(JOURNAL)
+    with open(SHARD, 'a+b') as file:
+        if file.tell() > 0:
+            file.seek(-1, os.SEEK_END)
+            if file.read(1) != b'\n':
+                file.write(b'\n')  # Close a line cut by a crash
+        file.write(''.join(LINES).encode())
+        file.flush()
+        os.fsync(file.fileno())
+
+# -----------------------------------------------
+
+def LOAD_JOURNAL(JOURNAL, SEED=None, HASH=None):
+    """
+    Read the completed realizations of a journal.
+
+    Parameters:
+    - JOURNAL (str): Journal directory.
+    - SEED (int): Master seed of the run (None accepts the seed of the first record).
+    - HASH (str): Configuration hash of the run (CONFIG_HASH); records of another hash are rejected.
+
+    Returns:
+    - DONE (dict): {i: result} of every completed realization.
+    - SEED (int): Master seed of the journaled records.
+    """
+    DONE = {}
+    if not os.path.isdir(JOURNAL):
+        return DONE, SEED
+    for NAME in sorted(os.listdir(JOURNAL)):
+        if not NAME.endswith('.jsonl'):
+            continue
+        with open(os.path.join(JOURNAL, NAME)) as file:
+            for LINE in file:
+                try:
+                    RECORD = json.loads(LINE)
+                except ValueError:
+                    continue  # Line cut by a crash
+                if HASH is not None and RECORD.get('hash') != HASH:
+                    continue  # Record of another configuration
+                if SEED is None:
+                    SEED = RECORD['seed']
+                if RECORD['seed'] == SEED:
+                    DONE[RECORD['i']] = RECORD['result']
+    return DONE, SEED
+
+# -----------------------------------------------
+
+def OPEN_JOURNAL(JOURNAL, HASH, SEED=None):
+    """
+    Open a journal for a run: check its header and read the records that can be reused.
+
+    Parameters:
+    - JOURNAL (str): Journal directory (created if needed).
+    - HASH (str): Configuration hash of the run (CONFIG_HASH).
+    - SEED (int): Master seed of the run (None: seed of a journal of the same configuration, else a new one).
+
+    Returns:
+    - DONE (dict): {i: result} of the completed realizations of this configuration and seed.
+    - SEED (int): Master seed of the run.
+    """
+    os.makedirs(JOURNAL, exist_ok=True)
+    HEADER = os.path.join(JOURNAL, 'header.json')
+    OLD = {}
+    if os.path.exists(HEADER):
+        try:
+            with open(HEADER) as file:
+                OLD = json.load(file)
+        except ValueError:
+            OLD = {}
+    if OLD and OLD.get('hash') != HASH:
+        print(f'Journal {JOURNAL}: written for another configuration (NUM_SIM, inputs or model changed) - its records are not reused')
+    elif SEED is None:
+        SEED = OLD.get('seed')
+    if SEED is None:
+        SEED = np.random.SeedSequence().entropy
+    DONE, SEED = LOAD_JOURNAL(JOURNAL, SEED, HASH)
+    with open(HEADER, 'w') as file:
+        json.dump({'hash': HASH, 'seed': SEED}, file)
+    return DONE, SEED
+
+# -----------------------------------------------
+
+def _INIT_WORKER(ANALYSIS_FUN, SHARED):
+    # Runs once in every worker process
+    if SHARED:
+        ANALYSIS_FUN.__globals__.update(SHARED)
+
+# -----------------------------------------------
+
+def _RUN_CHUNK(ANALYSIS_FUN, REDUCE_FUN, INDICES, SEED, WIPE, JOURNAL=None, JOURNAL_EVERY=50, HASH=None):
+    OUTPUT = []
+    LINES = []
+    for i in INDICES:
+        np.random.seed(SAMPLE_SEED(SEED, i).generate_state(4))
+        RESULT = ANALYSIS_FUN(i)
+        if REDUCE_FUN is not None:
+            RESULT = REDUCE_FUN(i, RESULT)
+        if WIPE:
+            import openseespy.opensees as ops
+            ops.wipe()  # Release the domain and close the recorder files of this realization
+        OUTPUT.append((i, RESULT))
+        if JOURNAL is not None:
+            LINES.append(json.dumps({'i': int(i), 'seed': SEED, 'hash': HASH, 'result': RESULT}, default=_JSON) + '\n')
+            if len(LINES) >= JOURNAL_EVERY:
+                WRITE_JOURNAL(JOURNAL, LINES)
+                LINES = []
+    if JOURNAL is not None:
+        WRITE_JOURNAL(JOURNAL, LINES)
+    return OUTPUT
+
+# -----------------------------------------------
+
+def PARALLEL_MONTE_CARLO(ANALYSIS_FUN, NUM_SIM, REDUCE_FUN=None, SEED=None, MAX_WORKERS=None,
+                         CHUNKSIZE=None, SHARED=None, WIPE=True, PRINT_EVERY=100, JOURNAL=None, JOURNAL_EVERY=50,
+                         CONFIG=None):
+    """
+    Run ANALYSIS_FUN(i) for i = 0 ... NUM_SIM-1 on a pool of worker processes.
+
+    Parameters:
+    - ANALYSIS_FUN (callable): Module-level function of the sample index i.
+    - NUM_SIM (int): Number of Monte Carlo realizations.
+    - REDUCE_FUN (callable): Optional module-level function REDUCE_FUN(i, OUTPUT) applied in the worker.
+    - SEED (int): Master seed of the per-realization random streams (None draws one from the OS).
+    - MAX_WORKERS (int): Number of worker processes (default: all cores). 1 runs serially in this process.
+    - CHUNKSIZE (int): Realizations per task (default: about 4 tasks per worker).
+    - SHARED (dict): Global variables copied into the module of ANALYSIS_FUN inside every worker.
+    - WIPE (bool): Call ops.wipe() after every realization.
+    - PRINT_EVERY (int): Progress report interval in realizations (0 disables it).
+    - JOURNAL (str): Optional journal directory (None: no journal); completed realizations of the same
+      configuration found there are skipped.
+    - JOURNAL_EVERY (int): Journal lines buffered by a worker before they are written.
+    - CONFIG (dict): Settings and sampled inputs the results depend on, hashed into the journal header with
+      NUM_SIM, ANALYSIS_FUN, REDUCE_FUN and SHARED (e.g. {'VARIABLES': VARIABLES, 'SAMPLING': SAMPLING, 'INPUTS': X}).
+
+    Returns:
+    - RESULTS (list): Output of every realization, in sample order.
+    - THROUGHPUT (float): Samples per second over the whole run.
+    """
+    RESULTS = [None] * NUM_SIM
+    PENDING = list(range(NUM_SIM))
+    HASH = None
+    if JOURNAL is not None:
+        HASH = CONFIG_HASH({'NUM_SIM': NUM_SIM, 'ANALYSIS_FUN': ANALYSIS_FUN, 'REDUCE_FUN': REDUCE_FUN, 'SHARED': SHARED, 'CONFIG': CONFIG})
+        JOURNALED, SEED = OPEN_JOURNAL(JOURNAL, HASH, SEED)
+        for i, RESULT in JOURNALED.items():
+            if i < NUM_SIM:
+                RESULTS[i] = RESULT
+        PENDING = [i for i in PENDING if i not in JOURNALED]
+        if len(PENDING) < NUM_SIM:
+            print(f'Journal {JOURNAL}: {NUM_SIM - len(PENDING)} / {NUM_SIM} realizations already done - resuming')
+    if SEED is None:
+        SEED = np.random.SeedSequence().entropy
+    if MAX_WORKERS is None:
+        MAX_WORKERS = os.cpu_count() or 1
+    MAX_WORKERS = max(1, min(MAX_WORKERS, len(PENDING)))
+    if CHUNKSIZE is None:
+        CHUNKSIZE = max(1, len(PENDING) // (4 * MAX_WORKERS))
+    CHUNKS = [PENDING[I:I + CHUNKSIZE] for I in range(0, len(PENDING), CHUNKSIZE)]
+
+    DONE = RESUMED = NUM_SIM - len(PENDING)
+    NEXT_PRINT = (DONE // PRINT_EVERY + 1) * PRINT_EVERY if PRINT_EVERY else 0
+    starttime = TI.perf_counter()
+
+    def COLLECT(OUTPUT):
+        nonlocal DONE, NEXT_PRINT
+        for i, RESULT in OUTPUT:
+            RESULTS[i] = RESULT
+        DONE += len(OUTPUT)
+        if PRINT_EVERY and (DONE >= NEXT_PRINT or DONE == NUM_SIM):
+            ELAPSED = TI.perf_counter() - starttime
+            print(f'{DONE} / {NUM_SIM} DONE - {(DONE - RESUMED) / ELAPSED:.2f} samples/s')
+            NEXT_PRINT = (DONE // PRINT_EVERY + 1) * PRINT_EVERY
+
+    if MAX_WORKERS == 1:
+        _INIT_WORKER(ANALYSIS_FUN, None)
+        for INDICES in CHUNKS:
+            COLLECT(_RUN_CHUNK(ANALYSIS_FUN, REDUCE_FUN, INDICES, SEED, WIPE, JOURNAL, JOURNAL_EVERY, HASH))
+    else:
+        METHODS = multiprocessing.get_all_start_methods()
+        CONTEXT = multiprocessing.get_context('fork' if 'fork' in METHODS else None)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=CONTEXT,
+                                                    initializer=_INIT_WORKER,
+                                                    initargs=(ANALYSIS_FUN, SHARED)) as executor:
+            futures = [executor.submit(_RUN_CHUNK, ANALYSIS_FUN, REDUCE_FUN, INDICES, SEED, WIPE, JOURNAL, JOURNAL_EVERY, HASH)
+                       for INDICES in CHUNKS]
+            for future in concurrent.futures.as_completed(futures):
+                COLLECT(future.result())
+
+    totaltime = TI.perf_counter() - starttime
+    THROUGHPUT = len(PENDING) / totaltime if totaltime > 0 else np.inf
+    print(f'\nMonte Carlo: {len(PENDING)} samples on {MAX_WORKERS} workers in {totaltime:.4f} s ({THROUGHPUT:.2f} samples/s) - SEED: {SEED}\n')
+    return RESULTS, THROUGHPUT
+
+# -----------------------------------------------
+
+def _Z(CONFIDENCE):
+    # Two-sided standard normal quantile
+    return NormalDist().inv_cdf(0.5 + 0.5 * CONFIDENCE)
+
+# -----------------------------------------------
+
+def _CONVERGED(ESTIMATE, HALF_WIDTH, TOLERANCE, RELATIVE):
+    if RELATIVE:
+        return ESTIMATE != 0 and HALF_WIDTH <= TOLERANCE * abs(ESTIMATE)
+    return HALF_WIDTH <= TOLERANCE
+
+# -----------------------------------------------
+
+class MeanTarget:
+    # Running mean of VALUE_FUN(i, RESULT) (Welford update)
+    def __init__(self, NAME, VALUE_FUN, TOLERANCE, RELATIVE=True, CONFIDENCE=0.95):
+        self.NAME = NAME
+        self.VALUE_FUN = VALUE_FUN
+        self.TOLERANCE = TOLERANCE
+        self.RELATIVE = RELATIVE
+        self.z = _Z(CONFIDENCE)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, OUTPUT):
+        for i, RESULT in OUTPUT:
+            X = float(self.VALUE_FUN(i, RESULT))
+            self.count += 1
+            DELTA = X - self.mean
+            self.mean += DELTA / self.count
+            self.m2 += DELTA * (X - self.mean)
+
+    def result(self):
+        if self.count < 2:
+            return self.mean, np.inf
+        return self.mean, self.z * np.sqrt(self.m2 / (self.count - 1) / self.count)
+
+    def converged(self):
+        return _CONVERGED(*self.result(), self.TOLERANCE, self.RELATIVE)
+
+# -----------------------------------------------
+
+class ProbabilityTarget:
+    # Probability of the event EVENT_FUN(i, RESULT) == True (Wilson score interval). Without any event the
+    # estimate is 0 and the half-width is the one-sided upper bound -ln(1 - CONFIDENCE) / n (rule of three at 95%):
+    # a relative tolerance can never be met then, so the target converges once that bound is below P_NEGLIGIBLE.
+    def __init__(self, NAME, EVENT_FUN, TOLERANCE, RELATIVE=True, CONFIDENCE=0.95, P_NEGLIGIBLE=None):
+        self.NAME = NAME
+        self.EVENT_FUN = EVENT_FUN
+        self.TOLERANCE = TOLERANCE
+        self.RELATIVE = RELATIVE
+        self.P_NEGLIGIBLE = P_NEGLIGIBLE
+        self.z = _Z(CONFIDENCE)
+        self.ZERO_BOUND = -np.log(1.0 - CONFIDENCE)
+        self.count = 0
+        self.events = 0
+
+    def update(self, OUTPUT):
+        for i, RESULT in OUTPUT:
+            self.count += 1
+            self.events += bool(self.EVENT_FUN(i, RESULT))
+
+    def result(self):
+        if self.count == 0:
+            return 0.0, np.inf
+        if self.events == 0:
+            return 0.0, self.ZERO_BOUND / self.count
+        N, P, Z2 = self.count, self.events / self.count, self.z ** 2
+        return P, self.z * np.sqrt(P * (1 - P) / N + Z2 / (4 * N * N)) / (1 + Z2 / N)
+
+    def converged(self):
+        if self.events == 0 and self.P_NEGLIGIBLE is not None:
+            return self.result()[1] <= self.P_NEGLIGIBLE
+        return _CONVERGED(*self.result(), self.TOLERANCE, self.RELATIVE)
+
+# -----------------------------------------------
+
+class QuantileTarget:
+    # Quantile Q of VALUE_FUN(i, RESULT) with a distribution-free order-statistic interval
+    def __init__(self, NAME, VALUE_FUN, Q, TOLERANCE, RELATIVE=True, CONFIDENCE=0.95):
+        self.NAME = NAME
+        self.VALUE_FUN = VALUE_FUN
+        self.Q = Q
+        self.TOLERANCE = TOLERANCE
+        self.RELATIVE = RELATIVE
+        self.z = _Z(CONFIDENCE)
+        self.values = []
+
+    def update(self, OUTPUT):
+        self.values.extend(float(self.VALUE_FUN(i, RESULT)) for i, RESULT in OUTPUT)
+
+    def result(self):
+        N = len(self.values)
+        if N < 2:
+            return np.nan, np.inf
+        X = np.sort(self.values)
+        SPREAD = self.z * np.sqrt(N * self.Q * (1 - self.Q))
+        LOW = int(np.floor(N * self.Q - SPREAD))
+        HIGH = int(np.ceil(N * self.Q + SPREAD))
+        if LOW < 0 or HIGH > N - 1:
+            return np.quantile(X, self.Q), np.inf  # Too few samples to bracket the quantile
+        return np.quantile(X, self.Q), 0.5 * (X[HIGH] - X[LOW])
+
+    def converged(self):
+        return _CONVERGED(*self.result(), self.TOLERANCE, self.RELATIVE)
+
+# -----------------------------------------------
+
+def SEQUENTIAL_MONTE_CARLO(ANALYSIS_FUN, MAX_SIM, TARGETS, BATCH_SIZE=None, MIN_SIM=None, TIME_BUDGET=None,
+                           REDUCE_FUN=None, SEED=None, MAX_WORKERS=None, SHARED=None, WIPE=True,
+                           JOURNAL=None, JOURNAL_EVERY=50, CONFIG=None):
+    """
+    Run ANALYSIS_FUN(i) for i = 0, 1, ... in batches until the TARGETS converge.
+
+    Parameters:
+    - ANALYSIS_FUN, REDUCE_FUN, SEED, MAX_WORKERS, SHARED, WIPE, JOURNAL, JOURNAL_EVERY, CONFIG: As in PARALLEL_MONTE_CARLO
+      (the journal hash uses MAX_SIM as NUM_SIM).
+    - MAX_SIM (int): Maximum number of realizations (the inputs must be sampled for MAX_SIM).
+    - TARGETS (list): MeanTarget, ProbabilityTarget and QuantileTarget objects, updated with (i, RESULT).
+    - BATCH_SIZE (int): Realizations between two convergence checks (default: max(100, 10 * MAX_WORKERS)).
+    - MIN_SIM (int): Realizations run before the first convergence check (default: BATCH_SIZE).
+    - TIME_BUDGET (float): Wall-clock budget in seconds, checked after every batch (None: no budget).
+
+    Returns:
+    - RESULTS (list): Output of the realizations 0 ... NUM_SIM-1 that were run.
+    - THROUGHPUT (float): Samples per second over the whole run.
+    - SUMMARY (dict): 'NUM_SIM' (samples needed), 'STOP' ('CONVERGED', 'TIME_BUDGET' or 'MAX_SIM'),
+                      'TIME' and 'TARGETS' ({NAME: (ESTIMATE, HALF_WIDTH)}).
+    """
+    JOURNALED = {}
+    HASH = None
+    if JOURNAL is not None:
+        HASH = CONFIG_HASH({'NUM_SIM': MAX_SIM, 'ANALYSIS_FUN': ANALYSIS_FUN, 'REDUCE_FUN': REDUCE_FUN, 'SHARED': SHARED, 'CONFIG': CONFIG})
+        JOURNALED, SEED = OPEN_JOURNAL(JOURNAL, HASH, SEED)
+    if SEED is None:
+        SEED = np.random.SeedSequence().entropy
+    if MAX_WORKERS is None:
+        MAX_WORKERS = os.cpu_count() or 1
+    MAX_WORKERS = max(1, min(MAX_WORKERS, MAX_SIM))
+    if BATCH_SIZE is None:
+        BATCH_SIZE = max(100, 10 * MAX_WORKERS)
+    if MIN_SIM is None:
+        MIN_SIM = BATCH_SIZE
+
+    RESULTS = []
+    RUN = 0
+    STOP = 'MAX_SIM'
+    starttime = TI.perf_counter()
+    executor = None
+    if MAX_WORKERS == 1:
+        _INIT_WORKER(ANALYSIS_FUN, None)
+    else:
+        METHODS = multiprocessing.get_all_start_methods()
+        CONTEXT = multiprocessing.get_context('fork' if 'fork' in METHODS else None)
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=CONTEXT,
+                                                          initializer=_INIT_WORKER, initargs=(ANALYSIS_FUN, SHARED))
+    try:
+        while len(RESULTS) < MAX_SIM:
+            INDICES = range(len(RESULTS), min(len(RESULTS) + BATCH_SIZE, MAX_SIM))
+            OUTPUT = {i: JOURNALED[i] for i in INDICES if i in JOURNALED}
+            PENDING = [i for i in INDICES if i not in OUTPUT]
+            CHUNKSIZE = max(1, -(-len(PENDING) // MAX_WORKERS))
+            CHUNKS = [PENDING[I:I + CHUNKSIZE] for I in range(0, len(PENDING), CHUNKSIZE)]
+            if executor is None:
+                for CHUNK in CHUNKS:
+                    OUTPUT.update(_RUN_CHUNK(ANALYSIS_FUN, REDUCE_FUN, CHUNK, SEED, WIPE, JOURNAL, JOURNAL_EVERY, HASH))
+            else:
+                futures = [executor.submit(_RUN_CHUNK, ANALYSIS_FUN, REDUCE_FUN, CHUNK, SEED, WIPE, JOURNAL, JOURNAL_EVERY, HASH)
+                           for CHUNK in CHUNKS]
+                for future in concurrent.futures.as_completed(futures):
+                    OUTPUT.update(future.result())
+            RUN += len(PENDING)
+            BATCH = [(i, OUTPUT[i]) for i in INDICES]
+            RESULTS.extend(RESULT for i, RESULT in BATCH)
+            for TARGET in TARGETS:
+                TARGET.update(BATCH)
+
+            ELAPSED = TI.perf_counter() - starttime
+            STATUS = ' - '.join(f'{T.NAME}: {E:.4g} ± {H:.2g}' for T, (E, H) in zip(TARGETS, (T.result() for T in TARGETS)))
+            print(f'{len(RESULTS)} / {MAX_SIM} DONE - {STATUS}')
+            if len(RESULTS) >= MIN_SIM and all(TARGET.converged() for TARGET in TARGETS):
+                STOP = 'CONVERGED'
+                break
+            if TIME_BUDGET is not None and ELAPSED >= TIME_BUDGET:
+                STOP = 'TIME_BUDGET'
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    totaltime = TI.perf_counter() - starttime
+    THROUGHPUT = RUN / totaltime if totaltime > 0 else np.inf
+    SUMMARY = {'NUM_SIM': len(RESULTS), 'STOP': STOP, 'TIME': totaltime,
+               'TARGETS': {TARGET.NAME: TARGET.result() for TARGET in TARGETS}}
+    print(f'\nSequential Monte Carlo: {len(RESULTS)} of {MAX_SIM} samples needed ({STOP}) on {MAX_WORKERS} workers '
+          f'in {totaltime:.4f} s ({THROUGHPUT:.2f} samples/s) - SEED: {SEED}')
+    for NAME, (ESTIMATE, HALF_WIDTH) in SUMMARY['TARGETS'].items():
+        print(f'{NAME}: {ESTIMATE:.6g} ± {HALF_WIDTH:.3g}')
+    print()
+    return RESULTS, THROUGHPUT, SUMMARY
+
+# -----------------------------------------------
@@ -0,0 +1,169 @@
+"""
+Streaming response reducers for the transient loops.
+
+The analysis functions used to append time, displacement, velocity, acceleration, base reaction
+and damage index to Python lists at every step, while the callers only kept np.max(np.abs(...))
+or the last value. A ResponseStream feeds every step to a set of online reducers that update in
+O(1) memory; the full traces are kept only when TRACE=True (e.g. for the realizations that are
+plotted).
+
+Every reducer reads one or two channels of the step values (a dict such as
+{'TIME': t, 'DISP': u, 'VELO': v, 'ACCEL': a, 'BASE': f, 'DI': di}) and reports one number
+under its NAME:
+- PeakAbs          -> maximum absolute value                  ('MAX_ABS_<KEY>')
+- TimeOfPeak       -> time of the maximum absolute value      ('TIME_PEAK_<KEY>')
+- Residual         -> value at the last step                  ('RESIDUAL_<KEY>')
+- RMS              -> root mean square over the steps         ('RMS_<KEY>')
+- HystereticEnergy -> cumulative trapezoidal integral of force over displacement ('ENERGY')
+- LogDecrement     -> mean logarithmic decrement of the positive peaks ('LOG_DECREMENT_<KEY>')
+
+The mean of ln(p[k] / p[k+1]) over consecutive peaks telescopes to ln(p[0] / p[n-1]) / (n - 1),
+so LogDecrement only keeps the first peak, the last peak and the number of peaks.
+"""
+import numpy as np
+
+# -----------------------------------------------
+
+class PeakAbs:
+    def __init__(self, KEY, NAME=None):
+        self.KEY = KEY
+        self.NAME = NAME or f'MAX_ABS_{KEY}'
+        self.value = 0.0
+
+    def update(self, VALUES):
+        X = abs(VALUES[self.KEY])
+        if X > self.value:
+            self.value = X
+
+    def result(self):
+        return self.value
+
+# -----------------------------------------------
+
+class TimeOfPeak:
+    def __init__(self, KEY, NAME=None, TIME_KEY='TIME'):
+        self.KEY = KEY
+        self.TIME_KEY = TIME_KEY
+        self.NAME = NAME or f'TIME_PEAK_{KEY}'
+        self.peak = -1.0
+        self.time = 0.0
+
+    def update(self, VALUES):
+        X = abs(VALUES[self.KEY])
+        if X > self.peak:
+            self.peak = X
+            self.time = VALUES[self.TIME_KEY]
+
+    def result(self):
+        return self.time
+
+# -----------------------------------------------
+
+class Residual:
+    def __init__(self, KEY, NAME=None):
+        self.KEY = KEY
+        self.NAME = NAME or f'RESIDUAL_{KEY}'
+        self.value = 0.0
+
+    def update(self, VALUES):
+        self.value = VALUES[self.KEY]
+
+    def result(self):
+        return self.value
+
+# -----------------------------------------------
+
+class RMS:
+    def __init__(self, KEY, NAME=None):
+        self.KEY = KEY
+        self.NAME = NAME or f'RMS_{KEY}'
+        self.sum_square = 0.0
+        self.count = 0
+
+    def update(self, VALUES):
+        X = VALUES[self.KEY]
+        self.sum_square += X * X
+        self.count += 1
+
+    def result(self):
+        return (self.sum_square / self.count) ** 0.5 if self.count > 0 else 0.0
+
+# -----------------------------------------------
+
+class HystereticEnergy:
+    # Cumulative work of the restoring force: sum of 0.5 * (F[k] + F[k-1]) * (u[k] - u[k-1])
+    def __init__(self, FORCE_KEY='BASE', DISP_KEY='DISP', NAME='ENERGY'):
+        self.FORCE_KEY = FORCE_KEY
+        self.DISP_KEY = DISP_KEY
+        self.NAME = NAME
+        self.energy = 0.0
+        self.last = None
+
+    def update(self, VALUES):
+        F, U = VALUES[self.FORCE_KEY], VALUES[self.DISP_KEY]
+        if self.last is not None:
+            self.energy += 0.5 * (F + self.last[0]) * (U - self.last[1])
+        self.last = (F, U)
+
+    def result(self):
+        return self.energy
+
+# -----------------------------------------------
+
+class LogDecrement:
+    # Peaks are the samples larger than both neighbours, as in the damping-ratio scripts
+    def __init__(self, KEY='DISP', NAME=None):
+        self.KEY = KEY
+        self.NAME = NAME or f'LOG_DECREMENT_{KEY}'
+        self.prev2 = None
+        self.prev1 = None
+        self.first_peak = None
+        self.last_peak = None
+        self.num_peaks = 0
+
+    def update(self, VALUES):
+        X = VALUES[self.KEY]
+        if self.prev2 is not None and self.prev1 > self.prev2 and self.prev1 > X:
+            if self.first_peak is None:
+                self.first_peak = self.prev1
+            self.last_peak = self.prev1
+            self.num_peaks += 1
+        self.prev2, self.prev1 = self.prev1, X
+
+    def result(self):
+        if self.num_peaks < 2:
+            return np.nan
+        return np.log(self.first_peak / self.last_peak) / (self.num_peaks - 1)
+
+# -----------------------------------------------
+
+class ResponseStream:
+    """
+    Feed the step values of one transient analysis to a set of reducers.
+
+    Parameters:
+    - REDUCERS (list): Reducer objects (PeakAbs, Residual, RMS, ...).
+    - TRACE (bool): Also keep the full trace of every channel in self.trace.
+    """
+    def __init__(self, REDUCERS, TRACE=False):
+        self.reducers = list(REDUCERS)
+        self.trace = {} if TRACE else None
+
+    def update(self, VALUES):
+        for REDUCER in self.reducers:
+            REDUCER.update(VALUES)
+        if self.trace is not None:
+            for KEY, VALUE in VALUES.items():
+                self.trace.setdefault(KEY, []).append(VALUE)
+
+    def result(self):
+        return {REDUCER.NAME: REDUCER.result() for REDUCER in self.reducers}
+
+# -----------------------------------------------
+
+def SDOF_REDUCERS():
+    # Default reducers of the SDOF transient loops
+    return [PeakAbs('TIME'), PeakAbs('DISP'), PeakAbs('VELO'), PeakAbs('ACCEL'), PeakAbs('BASE'), PeakAbs('DI'),
+            Residual('DISP'), Residual('DI'), RMS('DISP'), TimeOfPeak('DISP'), HystereticEnergy('BASE', 'DISP')]
+
+# -----------------------------------------------